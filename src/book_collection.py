@@ -1,20 +1,73 @@
 #=================================================
 # IMPORT
 #=================================================
+import collection_snapshot
+import gc
+import io
 import json
+import os
+import quote_rng
 import random
 import re
+import sys
+import threading
+import time
+import zipfile
 
+from collections.abc import Iterable, Iterator, Sequence
 from constants_loader import constants
+from contextlib import contextmanager
 from datetime import datetime
+from library_reader import (
+    DEFAULT_CHUNK_SIZE, LibraryShardReader, iter_library_raw, open_library, raw_fingerprint,
+    resolve_library_source
+)
+from load_report import LoadReport, NULL_LOAD_REPORT, profiling_enabled
+from text_store import StoredText, TextStore
+from typing import Any, Callable, TextIO
+
+#=================================================
+# CONSTANTS
+#=================================================
+# shared by every Book until it gets its first quote
+_NO_QUOTES: tuple = ()
+
+# Book slots of the running session and their value in a snapshot
+_SESSION_SLOTS: dict[str, Any] = {
+    "_long_deck": None, "_short_deck": None, "_long_left": 0, "_short_left": 0,
+    "on_remaining_change": None,
+}
+
+# a read date before this (local) time means "not read"
+_FIRST_READ_TIMESTAMP: float = datetime(1971, 1, 1).timestamp()
+
+# builds may overlap (e.g. a GUI reload on a worker thread), see _gc_paused
+_gc_pause_lock = threading.Lock()
+_gc_pause_depth: int = 0
+_gc_was_enabled: bool = True
 
 #=================================================
 # CLASSES
 #=================================================
 class Quote:
-    def __init__(self, text: str, page_number: int) -> None:
-        self.text = text
+    __slots__ = ("_text", "page", "insert_time", "source")
+
+    def __init__(self, text: str, page_number: int, insert_time: int = 0, source: str = "") -> None:
+        # either the text itself or a reference into a TextStore
+        self._text: str | StoredText = text
         self.page = page_number
+        # ReadEra note_insert_time (ms)
+        self.insert_time = insert_time
+        # the backup the quote was merged from (empty for a single source)
+        self.source = source
+
+    @property
+    def text(self) -> str:
+        return self._text if isinstance(self._text, str) else str(self._text)
+
+    def __reduce__(self) -> tuple:
+        # compact snapshot entry, rebuilt through __init__
+        return Quote, (self._text, self.page, self.insert_time, self.source)
 
     #=================================================
     # string representation
@@ -24,53 +77,182 @@ class Quote:
 
 
 class Book:
+    __slots__ = (
+        "title", "author", "folder", "folders", "file_id", "_annotation",
+        "pages_count", "published_date", "file_modified_time", "have_read_time",
+        "activity_time", "quotes_per_page", "quotes", "short_quotes",
+        "_long_deck", "_short_deck", "_long_left", "_short_left",
+        "first_q_timestamp", "last_q_timestamp", "rating", "ratings_count",
+        "on_remaining_change",
+    )
+
     def __init__(self, title: str) -> None:
         self.title = title
         self.author: str = ""
         self.folder: str = ""
+        # ReadEra allows a doc in more than one collection, folder is the first one
+        # (books with the same folders share one tuple)
+        self.folders: tuple[str, ...] = ()
         self.file_id: str = ""
-        self.annotation: str = ""
+        self._annotation: str | StoredText = ""
         self.pages_count: int = 0
         self.published_date: int = 0
-        self.file_modified_date: datetime = datetime.fromtimestamp(0)
-        self.have_read_date: datetime = datetime.fromtimestamp(0)
+        # seconds since the epoch, see file_modified_date / have_read_date
+        self.file_modified_time: float = 0
+        self.have_read_time: float = 0
         self.activity_time: int = 0
         self.quotes_per_page: float = 0.0
-        self.quotes: list[Quote] = []
-        self.short_quotes: list[Quote] = []
-        self.selected_quotes_set: set[Quote] = set()
+        # empty containers are shared until the first item is added
+        self.quotes: Sequence[Quote] = _NO_QUOTES
+        self.short_quotes: Sequence[Quote] = _NO_QUOTES
+        # random draws without replacement: a deck per length holds its quotes,
+        # the first *_left entries are not selected yet (created on the first draw)
+        self._long_deck: list[Quote] | None = None
+        self._short_deck: list[Quote] | None = None
+        self._long_left: int = 0
+        self._short_left: int = 0
         self.first_q_timestamp: float = 0
         self.last_q_timestamp: float = 0
         self.rating: float = 0.0
         self.ratings_count: float = 0.0
+        # called with (book, delta) when the number of remaining quotes changes
+        # (see book_filter.RemainingCounters), not part of a snapshot
+        self.on_remaining_change: Callable[[Book, int], None] | None = None
+
+    def __getstate__(self) -> tuple[None, dict[str, Any]]:
+        # slot state (restored by pickle's default), the listener and the decks
+        # of the running session are not kept: a snapshot starts with nothing
+        # selected (shown quotes come back from the journal), and a reload
+        # may pickle the Books while the UI thread is drawing from them
+        state = {name: getattr(self, name) for name in Book.__slots__ if name not in _SESSION_SLOTS}
+        state.update(_SESSION_SLOTS)
+        return None, state
+
+    def add_quote(self, text: str, page_number: int, is_long: bool=False, insert_time: int = 0) -> None:
+        self.append_quote(Quote(text, page_number, insert_time), is_long)
 
-    def add_quote(self, text: str, page_number: int, is_long: bool=False) -> None:
-        quote: Quote = Quote(text, page_number)
+    def append_quote(self, quote: Quote, is_long: bool=False) -> None:
         if is_long:
+            if not self.quotes:
+                self.quotes = []
             self.quotes.append(quote)
         else:
+            if not self.short_quotes:
+                self.short_quotes = []
             self.short_quotes.append(quote)
 
+        # a new quote joins the unselected part of an existing deck
+        if self._long_deck is not None:
+            if is_long:
+                self._long_left = _deck_insert(self._long_deck, self._long_left, quote)
+            else:
+                self._short_left = _deck_insert(self._short_deck, self._short_left, quote)
+        if self.on_remaining_change is not None:
+            self.on_remaining_change(self, 1)
+
+    @property
+    def annotation(self) -> str:
+        return self._annotation if isinstance(self._annotation, str) else str(self._annotation)
+
+    @annotation.setter
+    def annotation(self, text: str) -> None:
+        self._annotation = text
+
+    def in_folder(self, folder: str) -> bool:
+        return folder in self.folders
+
+    @property
+    def file_modified_date(self) -> datetime:
+        return datetime.fromtimestamp(self.file_modified_time)
+
+    @property
+    def have_read_date(self) -> datetime:
+        return datetime.fromtimestamp(self.have_read_time)
+
     def get_all_quotes_list(self) -> list[Quote]:
-        return self.quotes + self.short_quotes
+        return [*self.quotes, *self.short_quotes]
 
-    def get_random_q(self) -> tuple[Quote | None, int]:
-        all_q: list[Quote] = self.get_all_quotes_list()
-        return self._rnd_q(all_q)
+    def get_random_q(self, rng: random.Random | None = None) -> tuple[Quote | None, int]:
+        # (quote, remaining quotes of any length), drawn from rng or the quote stream
+        remaining: int = self.remaining_quote_count
+        if not remaining:
+            return None, 0
+        self._init_decks()
 
-    def get_random_short_q(self) -> tuple[Quote | None, int]:
-        return self._rnd_q(self.short_quotes)
+        # one index over both unselected parts, so every quote is equally likely
+        index: int = (rng or quote_rng.quote_stream).randrange(remaining)
+        if index < self._short_left:
+            return self._draw_short(index), remaining - 1
+        self._long_left -= 1
+        if self.on_remaining_change is not None:
+            self.on_remaining_change(self, -1)
+        return _deck_take(self._long_deck, index - self._short_left, self._long_left), remaining - 1
 
-    def _rnd_q(self, quotes_list: list[Quote]) -> tuple[Quote | None, int]:
-        unselected_quotes: list[Quote] = [q for q in quotes_list if q not in self.selected_quotes_set]
-        if not unselected_quotes:
+    def get_random_short_q(self, rng: random.Random | None = None) -> tuple[Quote | None, int]:
+        # (quote, remaining short quotes)
+        remaining: int = self.remaining_short_quote_count
+        if not remaining:
             return None, 0
-        random_quote: Quote = random.choice(unselected_quotes)
-        self.selected_quotes_set.add(random_quote)
-        return random_quote, len(unselected_quotes) - 1
+        self._init_decks()
+        return self._draw_short((rng or quote_rng.quote_stream).randrange(remaining)), remaining - 1
+
+    def _draw_short(self, index: int) -> Quote:
+        self._short_left -= 1
+        if self.on_remaining_change is not None:
+            self.on_remaining_change(self, -1)
+        return _deck_take(self._short_deck, index, self._short_left)
+
+    def _init_decks(self) -> None:
+        if self._long_deck is None:
+            self._long_deck = list(self.quotes)
+            self._short_deck = list(self.short_quotes)
+            self._long_left = len(self._long_deck)
+            self._short_left = len(self._short_deck)
 
     def clear_selected_set(self) -> None:
-        self.selected_quotes_set.clear()
+        # the decks keep their order, every quote is unselected again
+        if self._long_deck is not None:
+            selected = len(self._long_deck) - self._long_left + len(self._short_deck) - self._short_left
+            self._long_left = len(self._long_deck)
+            self._short_left = len(self._short_deck)
+            if selected and self.on_remaining_change is not None:
+                self.on_remaining_change(self, selected)
+
+    def return_quote(self, quote: Quote) -> None:
+        # undo a draw (e.g. of a prefetched quote that was never shown),
+        # O(1) when the quotes are returned in reverse draw order
+        if self._long_deck is None:
+            return
+        if self._short_left < len(self._short_deck) and self._short_deck[self._short_left] is quote:
+            is_short = True
+        elif self._long_left < len(self._long_deck) and self._long_deck[self._long_left] is quote:
+            is_short = False
+        else:
+            is_short = quote in self.short_quotes
+
+        remaining = self._long_left + self._short_left
+        if is_short:
+            self._short_left = _deck_return(self._short_deck, self._short_left, quote)
+        else:
+            self._long_left = _deck_return(self._long_deck, self._long_left, quote)
+        if self.on_remaining_change is not None and self._long_left + self._short_left != remaining:
+            self.on_remaining_change(self, 1)
+
+    def restore_selection(self, shown: bytes | bytearray) -> None:
+        # shown: one bit per quote of get_all_quotes_list (see selection_journal)
+        remaining = self.remaining_quote_count
+        self._long_deck = list(self.quotes)
+        self._short_deck = list(self.short_quotes)
+        self._long_left = _deck_partition(self._long_deck, shown, 0)
+        self._short_left = _deck_partition(self._short_deck, shown, len(self.quotes))
+        if self.on_remaining_change is not None and self.remaining_quote_count != remaining:
+            self.on_remaining_change(self, self.remaining_quote_count - remaining)
+
+    @property
+    def selected_quotes(self) -> list[Quote]:
+        if self._long_deck is None:
+            return []
+        return self._long_deck[self._long_left:] + self._short_deck[self._short_left:]
 
     #=================================================
     # @property decorator is used to define a method
@@ -90,15 +272,23 @@ class Book:
 
     @property
     def has_remaining_short_quotes(self) -> bool:
-        return any(q not in self.selected_quotes_set for q in self.short_quotes)
+        return self.remaining_short_quote_count > 0
 
     @property
     def remaining_quote_count(self) -> int:
-        return self.total_quotes - len(self.selected_quotes_set)
+        if self._long_deck is None:
+            return self.total_quotes
+        return self._long_left + self._short_left
+
+    @property
+    def remaining_short_quote_count(self) -> int:
+        if self._short_deck is None:
+            return len(self.short_quotes)
+        return self._short_left
 
     @property
     def is_read(self) -> bool:
-        return self.have_read_date.year > 1970
+        return self.have_read_time >= _FIRST_READ_TIMESTAMP
 
     #=================================================
     # string representation
@@ -114,6 +304,22 @@ class BookCollection:
         self.books_by_title: dict[str, Book] = {}
         self.authors_with_quotes: list[str] = []
         self.folders: dict[str, set] = {}
+        # uri -> every folder (collection) the doc belongs to, in file order
+        self.folders_by_uri: dict[str, list[str]] = {}
+        # uri -> (doc content hash, Book or None for inactive docs)
+        self.docs_by_uri: dict[str, tuple[bytes, Book | None]] = {}
+        # library.json, a ReadEra backup or a folder of backups,
+        # or a list of those (e.g. one per device) that is merged
+        self.source: str | list[str] = constants.LIBRARY_SOURCE
+        # the file that was actually loaded (the first one if merged)
+        self.source_path: str = ""
+        self.source_paths: list[str] = []
+        # timings and counters of the last build, if profiling was on
+        self.load_report: LoadReport | None = None
+        self._report: LoadReport = NULL_LOAD_REPORT
+        # receives the books parsed so far while a build runs (see build_the_collection)
+        self._on_progress: Callable[[list[Book]], None] | None = None
+        self._progress_sent: int = 0
 
     def get_book_by_title(self, title: str) -> Book | None:
         return self.books_by_title.get(title)
@@ -121,126 +327,742 @@ class BookCollection:
     #=================================================
     # FUNCTION: build The Collection
     #=================================================
-    def build_the_collection(self) -> Exception | None:
+    def build_the_collection(
+        self,
+        source: str | list[str] | None = None,
+        streaming: bool | None = None,
+        use_snapshot: bool | None = None,
+        workers: int | None = None,
+        use_text_store: bool | None = None,
+        profile: bool | None = None,
+        on_progress: Callable[[list[Book]], None] | None = None
+    ) -> Exception | None:
+        """
+        on_progress is called (on the building thread) with every batch of
+        LOAD_PROGRESS_BATCH newly parsed books, in file order and before the
+        collection is sorted and indexed. Books of a snapshot or merged load
+        only arrive with the finished collection.
+        """
+        # profiling: constants.LOAD_PROFILE or the READERA_LOAD_PROFILE environment variable
+        if profile is None:
+            profile = profiling_enabled()
+
+        self._on_progress = on_progress
+        try:
+            with self._profiled(profile):
+                return self._build(source, streaming, use_snapshot, workers, use_text_store, profile)
+        finally:
+            self._on_progress = None
+
+    def _build(
+        self,
+        source: str | list[str] | None,
+        streaming: bool | None,
+        use_snapshot: bool | None,
+        workers: int | None,
+        use_text_store: bool | None,
+        profile: bool
+    ) -> Exception | None:
         # return value
         error: Exception | None = None
+        report: LoadReport = self._report
+
+        if streaming is None:
+            streaming = constants.STREAMING_LOADER
+        if workers is None:
+            workers = constants.LOAD_WORKERS
+        if use_text_store is None:
+            use_text_store = constants.USE_TEXT_STORE
+        if use_snapshot is None:
+            use_snapshot = constants.USE_SNAPSHOT_CACHE
+        if source is not None:
+            self.source = source
 
         # reset state
+        self._reset()
+
+        # several backups, each one is loaded (and cached) on its own
+        if isinstance(self.source, list):
+            report.mode = "merged"
+            error = self._build_merged(streaming, use_snapshot, use_text_store, profile)
+            if error is None:
+                self._finalize()
+            return error
+
+        # open and read the JSON file (directly from the backup if needed)
+        try:
+            with report.phase("resolve source"):
+                self.source_path = resolve_library_source(self.source)
+            self.source_paths = [self.source_path]
+            report.source_path = self.source_path
+
+            with _gc_paused():
+                # use the parsed collection from the previous launch if the file is unchanged
+                if use_snapshot:
+                    report.mode = "snapshot"
+                    with report.phase("snapshot load"):
+                        loaded = self._load_snapshot()
+                    if loaded:
+                        report.count("books", len(self.books))
+                        return error
+
+                # backups are compressed, shards need random access to the file
+                if workers > 1 and not zipfile.is_zipfile(self.source_path):
+                    report.mode = "parallel"
+                    parsed = self._build_parallel(workers)
+                else:
+                    parsed = False
+
+                if not parsed:
+                    with open_library(self.source_path) as file:
+                        if streaming:
+                            report.mode = "streaming"
+                            self._build_from_stream(file)
+                        else:
+                            # read at once, then decoded doc by doc from memory, so the
+                            # docs get the fingerprints of their JSON text (see load_changes)
+                            report.mode = "json"
+                            with report.phase("read file"):
+                                text = file.read()
+                            self._build_from_stream(io.StringIO(text), chunk_size=len(text) + 1)
+                            del text
+        except (FileNotFoundError, json.JSONDecodeError, zipfile.BadZipFile) as error:
+            return error
+
+        self._finalize()
+
+        if use_text_store:
+            with report.phase("text store"):
+                self._move_texts_to_store()
+
+        if use_snapshot:
+            with report.phase("snapshot save"):
+                self._save_snapshot()
+
+        return error
+
+    @contextmanager
+    def _profiled(self, profile: bool) -> Iterator[None]:
+        # the report is shared by the build helpers through self._report
+        self._report = LoadReport() if profile else NULL_LOAD_REPORT
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._report.total_seconds = time.perf_counter() - start
+            self.load_report = self._report if profile else None
+            self._report = NULL_LOAD_REPORT
+
+    #=================================================
+    # FUNCTION: reload The Collection
+    #=================================================
+    def reload_the_collection(self, use_snapshot: bool | None = None) -> Exception | None:
+        """
+        Re-read the library source and re-parse only the docs that were added
+        or changed since the last build. Books of unchanged docs are kept as they
+        are (including their selected quotes), removed docs are dropped.
+        The current state is kept if the source cannot be read.
+        Texts of re-parsed docs stay in memory, the text store is not modified.
+        """
+        fresh, error = self.load_changes(use_snapshot)
+        if error is None:
+            self.adopt(fresh)
+        return error
+
+    def load_changes(self, use_snapshot: bool | None = None) -> tuple["BookCollection", Exception | None]:
+        """
+        First half of reload_the_collection: build a new collection from the
+        library source, reusing the Books of unchanged docs. This instance is
+        only read, so it can run on a worker thread while the UI keeps using it,
+        the result is then taken over with adopt() on the UI thread.
+        """
+        if use_snapshot is None:
+            use_snapshot = constants.USE_SNAPSHOT_CACHE
+
+        # build into a fresh instance, so a failed read leaves this one intact
+        # (a folder source may resolve to a newer backup by now)
+        fresh = BookCollection()
+        fresh.source = self.source
+
+        # merged sources are built again (each from its own snapshot if unchanged)
+        if isinstance(self.source, list):
+            return fresh, fresh.build_the_collection(use_snapshot=use_snapshot)
+
+        with fresh._profiled(profiling_enabled()):
+            report: LoadReport = fresh._report
+            report.mode = "reload"
+            try:
+                with report.phase("resolve source"):
+                    fresh.source_path = resolve_library_source(self.source)
+                fresh.source_paths = [fresh.source_path]
+                report.source_path = fresh.source_path
+                with _gc_paused(), open_library(fresh.source_path) as file:
+                    fresh._build_from_stream(file, previous_docs=self.docs_by_uri)
+            except (FileNotFoundError, json.JSONDecodeError, zipfile.BadZipFile) as error:
+                return fresh, error
+
+            fresh._finalize()
+
+            if use_snapshot:
+                with report.phase("snapshot save"):
+                    fresh._save_snapshot()
+
+        return fresh, None
+
+    def adopt(self, other: "BookCollection") -> None:
+        """
+        Take over the state of a collection built by load_changes.
+        """
+        self.books = other.books
+        self.books_by_title = other.books_by_title
+        self.authors_with_quotes = other.authors_with_quotes
+        self.folders = other.folders
+        self.folders_by_uri = other.folders_by_uri
+        self.docs_by_uri = other.docs_by_uri
+        self.source_path = other.source_path
+        self.source_paths = other.source_paths
+
+        # the search index of other's books (e.g. built by the watcher thread)
+        from quote_search import adopt_index
+        adopt_index(self, other)
+
+    def _reset(self) -> None:
         self.books = []
         self.books_by_title = {}
         self.authors_with_quotes = []
         self.folders = {}
+        self.folders_by_uri = {}
+        self.docs_by_uri = {}
+        self.source_paths = []
+        self._progress_sent = 0
+
+    def _build_from_stream(
+        self,
+        file: TextIO,
+        previous_docs: dict[str, tuple[bytes, Book | None]] | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        previous_docs = previous_docs or {}
+        report: LoadReport = self._report
+
+        # docs are parsed one by one, the decoded doc is dropped right after
+        # its Book was built, so the whole JSON tree is never in memory
+        start: float = report.clock()
+        for section, item, raw in iter_library_raw(file, chunk_size=chunk_size):
+            start = report.lap("stream decode", start)
+            if section == 'colls':
+                self._add_folder(item)
+                start = report.lap("folders", start)
+                continue
+
+            # reuse the Book of an unchanged doc (see reload_the_collection)
+            report.count("docs seen")
+            fingerprint: bytes = raw_fingerprint(raw)
+            previous = previous_docs.get(item['uri'])
+            if previous is not None and previous[0] == fingerprint:
+                book: Book | None = previous[1]
+                report.count("books reused")
+            else:
+                start = report.lap("fingerprint", start)
+                book = build_book_from_doc(item, report)
+
+            self.docs_by_uri[item['uri']] = (fingerprint, book)
+            if book is not None:
+                self.books.append(book)
+                self._report_progress()
+            start = report.clock()
+
+        # "colls" is not guaranteed to precede "docs" in the file
+        with report.phase("folder assignment"):
+            self._assign_folders()
+
+    def _build_parallel(self, workers: int) -> bool:
+        """
+        Parse byte ranges of library.json in a process pool and merge the
+        shards in file order, so the result is identical to a serial load.
+        Returns False (nothing is merged) if the shards cannot be used.
+        """
+        # imported on demand (multiprocessing is slow to import, most loads never use it)
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        report: LoadReport = self._report
+        profile: bool = report is not NULL_LOAD_REPORT
+        size: int = os.path.getsize(self.source_path)
+        bounds: list[int] = [size * i // workers for i in range(workers + 1)]
 
-        # open and read the JSON file
         try:
-            with open('library.json', 'r', encoding="utf8") as file:
-                data: dict = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError) as error:
+            with report.phase("parallel parse"), ProcessPoolExecutor(max_workers=workers) as pool:
+                shards = list(pool.map(
+                    _parse_library_shard,
+                    [self.source_path] * workers,
+                    bounds[:-1],
+                    bounds[1:],
+                    [profile] * workers
+                ))
+        except (BrokenProcessPool, OSError):
+            return False
+
+        # every shard has to start exactly where the previous one stopped
+        expected_start: int | None = None
+        for i, (_entries, first_start, next_start, _report) in enumerate(shards):
+            shard_start = first_start if first_start is not None else next_start
+            if i > 0 and shard_start != expected_start:
+                return False
+            expected_start = next_start
+        if expected_start is not None:
+            return False
+
+        for entries, _first_start, _next_start, shard_report in shards:
+            # per-doc phases are summed over the workers
+            if shard_report is not None:
+                report.merge(shard_report)
+            start: float = report.clock()
+            for section, payload in entries:
+                if section == 'colls':
+                    self._add_folder(payload)
+                    continue
+                uri, fingerprint, book = payload
+                self.docs_by_uri[uri] = (fingerprint, book)
+                if book is not None:
+                    # strings lose their identity on the way from the worker
+                    book.author = _intern(book.author)
+                    self.books.append(book)
+                    self._report_progress()
+            report.lap("merge shards", start)
+
+        with report.phase("folder assignment"):
+            self._assign_folders()
+
+        return True
+
+    def _build_merged(
+        self,
+        streaming: bool,
+        use_snapshot: bool,
+        use_text_store: bool,
+        profile: bool
+    ) -> Exception | None:
+        """
+        Load every source of the list concurrently, then merge them in list order.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not self.source:
+            return FileNotFoundError("No library source given")
+        try:
+            self.source_paths = [resolve_library_source(source) for source in self.source]
+        except FileNotFoundError as error:
             return error
+        self.source_path = self.source_paths[0]
+        report: LoadReport = self._report
+        report.source_path = ", ".join(self.source_paths)
 
-        # get the folders dictionary, each value will be a set of book IDs
-        for coll in data['colls']:
-            self.folders[coll['data']['coll_title']] = set(coll['docs'])
-
-        for doc in data['docs']:
-            if doc['data']['doc_active'] == 1:
-                # Use regex to remove non-alphabet characters from the beginning of the title
-                book_title: str = re.sub(r"^[^a-zA-Z]+", "", doc['data']['doc_file_name_title'])
-
-                # handle renamed books, book_title is the default return
-                book_title = constants.BOOK_RENAME_DICTIONARY.get(book_title, book_title)
-                # remove funny character (Zero Width Space)
-                book_title = book_title.replace('\u200b', '').strip()
-
-                # add the book to The Collection (which is a list of instances)
-                this_book: Book = Book(book_title)
-                self.books.append(this_book)
-
-                # store additional data
-                this_book.file_id = doc['uri']
-                this_book.author = doc['data'].get('user_authors') or doc['data'].get('doc_authors')
-                this_book.annotation = doc['data'].get('doc_annotation', "")
-
-                # store file date as a date object, activity time as a simple timestamp
-                aux_date: datetime = datetime.fromtimestamp(doc['data'].get('file_modified_time') / 1000)
-                this_book.file_modified_date = aux_date
-                this_book.activity_time = doc['data'].get('doc_activity_time')
-
-                # get the folder, if available
-                this_book.folder = "unassigned"
-                if self.folders:
-                    for folder, ids in self.folders.items():
-                        if this_book.file_id in ids:
-                            this_book.folder = folder
-                            break
-
-                # get pages count if available
-                try:
-                    doc_data: dict = json.loads(doc['data']['doc_position'])
-                    this_book.pages_count = doc_data['pagesCount']
-                except (KeyError, ValueError, IndexError, TypeError, AttributeError):
-                    this_book.pages_count = 0
-
-                # get goodreads data if available
-                try:
-                    review_note: str = doc['reviews'][0]['note_body']
-                    this_book.published_date = int(review_note.split(';')[0].strip())
-                    this_book.rating = float(review_note.split(';')[1].strip())
-                    this_book.ratings_count = float(review_note.split(';')[2].strip().replace('k', '.'))
-                except (KeyError, ValueError, IndexError, TypeError, AttributeError):
-                    this_book.published_date = 0
-                    this_book.rating = 0.0
-                    this_book.ratings_count = 0.0
-
-                # get the citations
-                if len(doc['citations']) > 0:
-                    quote_dates: list[int] = []
-                    for citation in doc['citations']:
-                        q_is_long: bool = len(citation['note_body']) > constants.MAX_CHAR_IN_SHORT_QUOTE
-                        this_book.add_quote(citation['note_body'], citation['note_page'], q_is_long)
-                        quote_dates.append(citation['note_insert_time'])
-
-                    # sort the dates list to easily access first and last, convert to seconds
-                    quote_dates.sort()
-                    this_book.first_q_timestamp = quote_dates[0] / 1000
-                    this_book.last_q_timestamp = quote_dates[-1] / 1000
-
-                    # calculate the q/p ratio, avoid division by zero
-                    if this_book.pages_count > 0:
-                        this_book.quotes_per_page = round(this_book.total_quotes / this_book.pages_count, 2)
-
-                # check if current doc was finished or not
-                read_at_timestamp: float = doc['data'].get('doc_have_read_time') / 1000
-                if doc['data'].get('doc_have_read_time') != 0:
-                    if this_book.title in constants.EXCEPTION_TITLES_FOR_READ_DATE:
-                        aux_date = datetime.fromtimestamp(constants.EXCEPTION_DATE_FOR_READ_DATE)
-                    elif ((this_book.last_q_timestamp - this_book.first_q_timestamp) > constants.ONE_DAY_IN_SECONDS and
-                        this_book.title not in constants.EXCLUDED_TITLES_FROM_READ_DATE ):
-                        # sanity check for doc have read time
-                        if (read_at_timestamp - this_book.last_q_timestamp) < constants.MAX_SEC_BETWEEN_LAST_QUOTE_AND_READ_DATE:
-                            aux_date = datetime.fromtimestamp(read_at_timestamp)
-                        else:
-                            aux_date = datetime.fromtimestamp(this_book.last_q_timestamp)
-                    else:
-                        # use default date
-                        aux_date = datetime.fromtimestamp(constants.DEFAULT_DATE_FOR_READ_DATE)
-                else:
-                    aux_date = datetime.fromtimestamp(0)
+        # the snapshot and text store files are per directory,
+        # only the first source of a directory uses them
+        parts: list[BookCollection] = []
+        uses_cache: list[bool] = []
+        cached_dirs: set[str] = set()
+        for path in self.source_paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            uses_cache.append(directory not in cached_dirs)
+            cached_dirs.add(directory)
+            parts.append(BookCollection())
+
+        def load_part(part: BookCollection, path: str, use_cache: bool) -> Exception | None:
+            # no process pool per part, forking from several threads is not safe
+            return part.build_the_collection(
+                source=path,
+                streaming=streaming,
+                use_snapshot=use_snapshot and use_cache,
+                workers=1,
+                use_text_store=use_text_store and use_cache,
+                profile=profile
+            )
+
+        with report.phase("load sources"), ThreadPoolExecutor(max_workers=len(parts)) as pool:
+            errors = list(pool.map(load_part, parts, self.source_paths, uses_cache))
+        report.parts = [part.load_report for part in parts if part.load_report is not None]
+
+        for error in errors:
+            if error is not None:
+                return error
+
+        with report.phase("merge"), _gc_paused():
+            self._merge_parts(parts)
+        return None
+
+    def _merge_parts(self, parts: list["BookCollection"]) -> None:
+        # books are matched by uri, then by title, with the books of earlier
+        # sources only (two docs of one backup are never merged), the first
+        # source wins for the book data, later ones only add their quotes
+        books_by_uri: dict[str, Book] = {}
+        books_by_title: dict[str, Book] = {}
+        # (text, insert time) of the quotes of every book that received quotes
+        quote_keys: dict[Book, set[tuple[str, int]]] = {}
+
+        for part in parts:
+            for folder, file_ids in part.folders.items():
+                self.folders.setdefault(folder, set()).update(file_ids)
+            for file_id, folders in part.folders_by_uri.items():
+                self._add_book_folders(file_id, folders)
+
+            new_books: list[Book] = []
+            for book in part.books:
+                for quote in book.get_all_quotes_list():
+                    quote.source = part.source_path
+
+                target = books_by_uri.get(book.file_id) or books_by_title.get(book.title)
+                if target is None:
+                    new_books.append(book)
+                    continue
+
+                added: int = _merge_book(target, book, quote_keys)
+                self._report.count("books merged")
+                self._report.count("quotes added", added)
+                self._report.count("duplicate quotes", book.total_quotes - added)
+                # the same book under another uri keeps the folders of both
+                self._add_book_folders(target.file_id, part.folders_by_uri.get(book.file_id, ()))
+
+            for book in new_books:
+                books_by_uri.setdefault(book.file_id, book)
+                books_by_title.setdefault(book.title, book)
+                self.books.append(book)
+
+        self._assign_folders()
+
+    def _add_book_folders(self, file_id: str, folders: Iterable[str]) -> None:
+        book_folders = self.folders_by_uri.setdefault(file_id, [])
+        for folder in folders:
+            if folder not in book_folders:
+                book_folders.append(folder)
+
+    def _add_folder(self, coll: dict) -> None:
+        folder: str = sys.intern(coll['data']['coll_title'])
+        self.folders[folder] = set(coll['docs'])
 
-                # add the constructed date
-                this_book.have_read_date = aux_date
+        # inverted index, so a book finds its folders with a single lookup
+        for file_id in coll['docs']:
+            book_folders = self.folders_by_uri.setdefault(file_id, [])
+            if folder not in book_folders:
+                book_folders.append(folder)
+
+    def _report_progress(self) -> None:
+        # hand every full batch of new books to the progress callback
+        if self._on_progress is None:
+            return
+        if len(self.books) - self._progress_sent >= constants.LOAD_PROGRESS_BATCH:
+            self._on_progress(self.books[self._progress_sent:])
+            self._progress_sent = len(self.books)
+
+    def _assign_folders(self) -> None:
+        # get the folder(s), if available, books in the same folders share the tuple
+        shared: dict[tuple[str, ...], tuple[str, ...]] = {}
+        for book in self.books:
+            folders = tuple(self.folders_by_uri.get(book.file_id, ()))
+            book.folders = shared.setdefault(folders, folders)
+            book.folder = folders[0] if folders else "unassigned"
+
+    def _finalize(self) -> None:
+        report: LoadReport = self._report
 
         # alphabetical order by title
-        self.books.sort(key=lambda bk: bk.title)
+        with report.phase("sort"):
+            self.books.sort(key=lambda bk: bk.title)
 
         # gather books into a dictionary and authors into a set
-        authors_set = set()
+        with report.phase("index"):
+            authors_set = set()
+            for book in self.books:
+                self.books_by_title[book.title] = book
+                if book.total_quotes > 0:
+                    authors_set.add(book.author)
+
+            # sort them alphabetically
+            self.authors_with_quotes = sorted(authors_set)
+        report.count("books", len(self.books))
+
+    def _move_texts_to_store(self) -> None:
+        # write every quote and annotation text into a new store file,
+        # the objects then only keep a reference (see text_store.TextStore)
+        store_path: str = os.path.join(os.path.dirname(self.source_path), constants.TEXT_STORE_FILE)
+        try:
+            store, refs = TextStore.write(store_path, self._iter_texts())
+        except OSError:
+            # texts simply stay in memory
+            return
+
+        refs_iter = iter(refs)
         for book in self.books:
-            self.books_by_title[book.title] = book
-            if book.total_quotes > 0:
-                authors_set.add(book.author)
+            if book.annotation:
+                book._annotation = StoredText(store, *next(refs_iter))
+            for quote in book.get_all_quotes_list():
+                quote._text = StoredText(store, *next(refs_iter))
 
-        # sort them alphabetically
-        self.authors_with_quotes = sorted(authors_set)
+    def _iter_texts(self) -> Iterator[str]:
+        # same order as consumed in _move_texts_to_store
+        for book in self.books:
+            if book.annotation:
+                yield book.annotation
+            for quote in book.get_all_quotes_list():
+                yield quote.text
 
-        return error
+    #=================================================
+    # snapshot cache
+    #=================================================
+    def _load_snapshot(self) -> bool:
+        snapshot_path = collection_snapshot.snapshot_path_for(self.source_path)
+        snapshot: dict | None = collection_snapshot.load_snapshot(snapshot_path, self.source_path)
+        if snapshot is None:
+            return False
+
+        self.books = snapshot['books']
+        self.folders = snapshot['folders']
+        self.folders_by_uri = snapshot['folders_by_uri']
+        self.authors_with_quotes = snapshot['authors_with_quotes']
+        self.docs_by_uri = snapshot['docs_by_uri']
+        self.books_by_title = {book.title: book for book in self.books}
+
+        # so books re-parsed by a reload share the author strings again
+        for book in self.books:
+            book.author = _intern(book.author)
+        return True
+
+    def _save_snapshot(self) -> None:
+        # a failed snapshot write only costs a full parse on the next launch
+        snapshot_path = collection_snapshot.snapshot_path_for(self.source_path)
+        collection_snapshot.save_snapshot(snapshot_path, self.source_path, {
+            'books': self.books,
+            'folders': self.folders,
+            'folders_by_uri': self.folders_by_uri,
+            'authors_with_quotes': self.authors_with_quotes,
+            'docs_by_uri': self.docs_by_uri,
+        })
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def _deck_take(deck: list[Quote], index: int, last: int) -> Quote:
+    # swap the drawn quote to the end of the unselected part (last = new count)
+    deck[index], deck[last] = deck[last], deck[index]
+    return deck[last]
+
+
+def _deck_return(deck: list[Quote], left: int, quote: Quote) -> int:
+    # move a selected quote back to the unselected part, returns the new count
+    # (the quote drawn last is at deck[left])
+    if left >= len(deck):
+        return left
+    if deck[left] is not quote:
+        try:
+            index = deck.index(quote, left)
+        except ValueError:
+            return left
+        deck[left], deck[index] = deck[index], deck[left]
+    return left + 1
+
+
+def _deck_partition(deck: list[Quote], shown: bytes | bytearray, first_bit: int) -> int:
+    # unselected quotes first, returns their count
+    selected: list[Quote] = []
+    unselected: list[Quote] = []
+    for i, quote in enumerate(deck, first_bit):
+        if i >> 3 < len(shown) and shown[i >> 3] >> (i & 7) & 1:
+            selected.append(quote)
+        else:
+            unselected.append(quote)
+    deck[:] = unselected + selected
+    return len(unselected)
+
+
+def _deck_insert(deck: list[Quote], left: int, quote: Quote) -> int:
+    # append as unselected: the first selected quote moves to the end
+    deck.append(quote)
+    deck[left], deck[-1] = deck[-1], deck[left]
+    return left + 1
+
+
+def _intern(text: str) -> str:
+    # author/folder strings are repeated across many books
+    return sys.intern(text)
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # building the collection only creates long-lived objects, the cyclic GC
+    # would keep re-scanning the growing object graph for nothing
+    # (the GC is process-wide, it is enabled again when the last build ends)
+    global _gc_pause_depth, _gc_was_enabled
+    with _gc_pause_lock:
+        if _gc_pause_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pause_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pause_depth -= 1
+            if _gc_pause_depth == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def _parse_library_shard(
+    path: str,
+    start: int,
+    end: int,
+    profile: bool = False
+) -> tuple[list[tuple[str, Any]], int | None, int | None, LoadReport | None]:
+    """
+    Process pool worker: build the books of the docs starting in [start, end).
+    Returns the entries in file order, the shard boundaries and the
+    shard's load report (None if not profiling).
+    """
+    shard = LibraryShardReader(path, start, end)
+    entries: list[tuple[str, Any]] = []
+    report: LoadReport = LoadReport() if profile else NULL_LOAD_REPORT
+
+    with _gc_paused():
+        start_time: float = report.clock()
+        for section, item, raw, _offset in shard:
+            start_time = report.lap("shard decode", start_time)
+            if section == 'colls':
+                entries.append((section, item))
+            else:
+                report.count("docs seen")
+                entries.append((section, (item['uri'], raw_fingerprint(raw), build_book_from_doc(item, report))))
+            start_time = report.clock()
+
+    return entries, shard.first_start, shard.next_start, report if profile else None
+
+
+def _merge_book(target: Book, book: Book, quote_keys: dict[Book, set[tuple[str, int]]]) -> int:
+    # hash based, so merging stays linear in the number of quotes,
+    # returns the number of quotes added to the target
+    keys = quote_keys.get(target)
+    if keys is None:
+        keys = quote_keys[target] = {(q.text, q.insert_time) for q in target.get_all_quotes_list()}
+
+    added: int = 0
+    for quotes, is_long in ((book.quotes, True), (book.short_quotes, False)):
+        for quote in quotes:
+            key = (quote.text, quote.insert_time)
+            if key not in keys:
+                keys.add(key)
+                target.append_quote(quote, is_long)
+                added += 1
+
+    if added:
+        target.first_q_timestamp = min(
+            (t for t in (target.first_q_timestamp, book.first_q_timestamp) if t), default=0
+        )
+        target.last_q_timestamp = max(target.last_q_timestamp, book.last_q_timestamp)
+        if target.pages_count > 0:
+            target.quotes_per_page = round(target.total_quotes / target.pages_count, 2)
+
+    # finished on another device
+    if not target.is_read and book.is_read:
+        target.have_read_time = book.have_read_time
+
+    return added
+
+
+def build_book_from_doc(doc: dict, report: LoadReport = NULL_LOAD_REPORT) -> Book | None:
+    """
+    Build a Book from a single ReadEra doc (folder is not resolved here).
+    Returns None for inactive docs.
+    """
+    start: float = report.clock()
+    if doc['data']['doc_active'] != 1:
+        report.count("inactive docs")
+        return None
+    report.count("active docs")
+
+    # Use regex to remove non-alphabet characters from the beginning of the title
+    book_title: str = re.sub(r"^[^a-zA-Z]+", "", doc['data']['doc_file_name_title'])
+
+    # handle renamed books, book_title is the default return
+    book_title = constants.BOOK_RENAME_DICTIONARY.get(book_title, book_title)
+    # remove funny character (Zero Width Space)
+    book_title = book_title.replace('\u200b', '').strip()
+
+    this_book: Book = Book(book_title)
+
+    # store additional data
+    this_book.file_id = doc['uri']
+    # "" for docs without an author, so authors always compare and sort as strings
+    this_book.author = _intern(doc['data'].get('user_authors') or doc['data'].get('doc_authors') or "")
+    this_book.annotation = doc['data'].get('doc_annotation', "")
+
+    # store file date and activity time as simple timestamps (dates are derived on demand)
+    this_book.file_modified_time = doc['data'].get('file_modified_time') / 1000
+    this_book.activity_time = doc['data'].get('doc_activity_time')
+    start = report.lap("doc fields", start)
+
+    # get pages count if available
+    try:
+        doc_data: dict = json.loads(doc['data']['doc_position'])
+        this_book.pages_count = doc_data['pagesCount']
+    except (KeyError, ValueError, IndexError, TypeError, AttributeError):
+        this_book.pages_count = 0
+        report.fail("doc_position")
+    start = report.lap("doc_position", start)
+
+    # get goodreads data if available
+    try:
+        review_note: str = doc['reviews'][0]['note_body']
+        this_book.published_date = int(review_note.split(';')[0].strip())
+        this_book.rating = float(review_note.split(';')[1].strip())
+        this_book.ratings_count = float(review_note.split(';')[2].strip().replace('k', '.'))
+    except (KeyError, ValueError, IndexError, TypeError, AttributeError):
+        this_book.published_date = 0
+        this_book.rating = 0.0
+        this_book.ratings_count = 0.0
+        # no review at all is not a failure
+        if doc.get('reviews'):
+            report.fail("reviews")
+    start = report.lap("reviews", start)
+
+    # get the citations
+    report.count("citations", len(doc['citations']))
+    if len(doc['citations']) > 0:
+        quote_dates: list[int] = []
+        for citation in doc['citations']:
+            q_is_long: bool = len(citation['note_body']) > constants.MAX_CHAR_IN_SHORT_QUOTE
+            this_book.add_quote(citation['note_body'], citation['note_page'], q_is_long, citation['note_insert_time'])
+            quote_dates.append(citation['note_insert_time'])
+
+        # sort the dates list to easily access first and last, convert to seconds
+        quote_dates.sort()
+        this_book.first_q_timestamp = quote_dates[0] / 1000
+        this_book.last_q_timestamp = quote_dates[-1] / 1000
+
+        # calculate the q/p ratio, avoid division by zero
+        if this_book.pages_count > 0:
+            this_book.quotes_per_page = round(this_book.total_quotes / this_book.pages_count, 2)
+    report.count("long quotes", len(this_book.quotes))
+    start = report.lap("citations", start)
+
+    # check if current doc was finished or not
+    read_at_timestamp: float = doc['data'].get('doc_have_read_time') / 1000
+    if doc['data'].get('doc_have_read_time') != 0:
+        if this_book.title in constants.EXCEPTION_TITLES_FOR_READ_DATE:
+            read_time: float = constants.EXCEPTION_DATE_FOR_READ_DATE
+        elif ((this_book.last_q_timestamp - this_book.first_q_timestamp) > constants.ONE_DAY_IN_SECONDS and
+            this_book.title not in constants.EXCLUDED_TITLES_FROM_READ_DATE ):
+            # sanity check for doc have read time
+            if (read_at_timestamp - this_book.last_q_timestamp) < constants.MAX_SEC_BETWEEN_LAST_QUOTE_AND_READ_DATE:
+                read_time = read_at_timestamp
+            else:
+                read_time = this_book.last_q_timestamp
+        else:
+            # use default date
+            read_time = constants.DEFAULT_DATE_FOR_READ_DATE
+    else:
+        read_time = 0
+
+    # add the constructed date
+    this_book.have_read_time = read_time
+    report.lap("read date", start)
+
+    return this_book
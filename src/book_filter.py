@@ -0,0 +1,198 @@
+#=================================================
+# IMPORT
+#=================================================
+import weakref
+
+from book_collection import Book, BookCollection
+from collections.abc import Iterable, Sequence
+from constants_loader import constants
+
+#=================================================
+# CLASSES
+#=================================================
+class RemainingCounters:
+    """
+    Remaining (unselected) quotes in total, per folder, per author and per
+    (folder, author) pair. The books report every change of their count
+    (Book.on_remaining_change), so a drawn or returned quote and a cleared
+    set update the sums in O(folders of the book) and every filter scope
+    is read in O(1). The count of a single book is its remaining_quote_count.
+    """
+
+    def __init__(self, books: Iterable[Book]) -> None:
+        self.total: int = 0
+        self.by_folder: dict[str, int] = {}
+        self.by_author: dict[str, int] = {}
+        self.by_folder_author: dict[tuple[str, str], int] = {}
+
+        # one bound method for every book
+        listener = self.add
+        for book in books:
+            count = book.remaining_quote_count
+            if count:
+                self.add(book, count)
+            book.on_remaining_change = listener
+
+    def add(self, book: Book, delta: int) -> None:
+        author = book.author
+        self.total += delta
+        self.by_author[author] = self.by_author.get(author, 0) + delta
+        for folder in book.folders:
+            self.by_folder[folder] = self.by_folder.get(folder, 0) + delta
+            self.by_folder_author[folder, author] = self.by_folder_author.get((folder, author), 0) + delta
+
+    def count(self, folder: str = constants.ANY_FOLDER, author: str = constants.ANY_AUTHOR) -> int:
+        """
+        Return the remaining quotes of the books matching the filters.
+        """
+        if folder == constants.ANY_FOLDER:
+            return self.total if author == constants.ANY_AUTHOR else self.by_author.get(author, 0)
+        if author == constants.ANY_AUTHOR:
+            return self.by_folder.get(folder, 0)
+        return self.by_folder_author.get((folder, author), 0)
+
+
+class BookIndex:
+    """
+    Bitsets over the books of a collection, bit i stands for books[i]:
+    one per folder, per author and per publication year, the read books and
+    the books with quotes.
+    A combination of filters is the intersection of its bitsets, its size
+    (and the count of every dropdown entry) a bit count, and the selected
+    books come out in collection order.
+    The remaining quotes of every folder/author scope are kept up to date
+    in remaining (see RemainingCounters).
+    """
+
+    def __init__(self, books: Sequence[Book]) -> None:
+        self.books = books
+        self.size = len(books)
+        self.all = (1 << self.size) - 1
+        self._positions: dict[str, int] = {}
+
+        folders: dict[str, list[int]] = {}
+        authors: dict[str, list[int]] = {}
+        years: dict[int, list[int]] = {}
+        read: list[int] = []
+        with_quotes: list[int] = []
+        for i, book in enumerate(books):
+            self._positions[book.title] = i
+            for folder in book.folders:
+                folders.setdefault(folder, []).append(i)
+            authors.setdefault(book.author, []).append(i)
+            if book.published_date:
+                years.setdefault(book.published_date, []).append(i)
+            if book.is_read:
+                read.append(i)
+            if book.total_quotes > 0:
+                with_quotes.append(i)
+
+        self.by_folder: dict[str, int] = {folder: self.mask_of(positions) for folder, positions in folders.items()}
+        self.by_author: dict[str, int] = {author: self.mask_of(positions) for author, positions in sorted(authors.items())}
+        self.by_year: dict[int, int] = {year: self.mask_of(positions) for year, positions in sorted(years.items())}
+        self.read: int = self.mask_of(read)
+        self.with_quotes: int = self.mask_of(with_quotes)
+        self.remaining = RemainingCounters(books)
+
+    #=================================================
+    # filters
+    #=================================================
+    def select(
+        self,
+        folder: str = constants.ANY_FOLDER,
+        author: str = constants.ANY_AUTHOR,
+        *,
+        with_quotes: bool = True,
+        read: bool | None = None
+    ) -> int:
+        """
+        Return the bitset of the books matching every given filter
+        (ANY_FOLDER / ANY_AUTHOR / None do not filter).
+        """
+        mask = self.with_quotes if with_quotes else self.all
+        if folder != constants.ANY_FOLDER:
+            mask &= self.by_folder.get(folder, 0)
+        if author != constants.ANY_AUTHOR:
+            mask &= self.by_author.get(author, 0)
+        if read is not None:
+            mask &= self.read if read else self.all ^ self.read
+        return mask
+
+    def position(self, title: str) -> int | None:
+        return self._positions.get(title)
+
+    def mask_of(self, positions: Iterable[int]) -> int:
+        # built as bytes, setting the bits one by one would copy the int each time
+        bits = bytearray((self.size >> 3) + 1)
+        for i in positions:
+            bits[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(bits, "little")
+
+    def mask_of_titles(self, titles: Iterable[str]) -> int:
+        # unknown titles (e.g. ANY_BOOK) are skipped
+        positions = self._positions
+        return self.mask_of(positions[title] for title in titles if title in positions)
+
+    #=================================================
+    # results
+    #=================================================
+    @staticmethod
+    def positions_of(mask: int) -> list[int]:
+        # lowest bit first: the digits of the reversed binary string
+        return [i for i, bit in enumerate(bin(mask)[:1:-1]) if bit == "1"]
+
+    def books_of(self, mask: int) -> list[Book]:
+        books = self.books
+        return [books[i] for i in self.positions_of(mask)]
+
+    def titles_of(self, mask: int) -> list[str]:
+        books = self.books
+        return [books[i].title for i in self.positions_of(mask)]
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return mask.bit_count()
+
+    #=================================================
+    # facet counts
+    #=================================================
+    def folder_counts(self, mask: int) -> dict[str, int]:
+        """
+        Books of the mask in every folder (0 for folders without any).
+        """
+        return {folder: (bits & mask).bit_count() for folder, bits in self.by_folder.items()}
+
+    def author_counts(self, mask: int) -> dict[str, int]:
+        """
+        Books of the mask by every author that has any, in alphabetical order
+        (books without an author are not listed).
+        """
+        counts: dict[str, int] = {}
+        for author, bits in self.by_author.items():
+            count = (bits & mask).bit_count()
+            if count and author:
+                counts[author] = count
+        return counts
+
+#=================================================
+# FUNCTIONS
+#=================================================
+# one index per collection, rebuilt when its books were replaced (build, reload)
+_indexes: "weakref.WeakKeyDictionary[BookCollection, BookIndex]" = weakref.WeakKeyDictionary()
+
+def book_index(collection: BookCollection) -> BookIndex:
+    """
+    Return the index of the collection's books (built on first use).
+    """
+    index = _indexes.get(collection)
+    if index is None or index.books is not collection.books or index.size != len(collection.books):
+        index = _indexes[collection] = BookIndex(collection.books)
+    return index
+
+def facet_label(value: str, count: int) -> str:
+    """
+    Return the dropdown text of a filter value with its book count.
+    """
+    if not constants.SHOW_FACET_COUNTS:
+        return value
+    return f"{value} ({count})"
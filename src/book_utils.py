@@ -1,70 +1,80 @@
 #=================================================
 # IMPORT
 #=================================================
+import quote_rng
 import random
-import re
 
-from book_collection import Book, Quote
+from book_collection import Book, BookCollection, Quote
+from collections.abc import Mapping, Sequence
 from constants_loader import constants
+from quote_sampler import QuoteSampler
+from quote_search import mark_matches, search_index
+from search_query import search
 from typing import TypedDict
 
 #=================================================
 # helper
 #=================================================
-def find_book_by_title(collection: list[Book], title: str) -> Book | None:
+def find_book_by_title(books_by_title: Mapping[str, Book], title: str) -> Book | None:
     """
-    Return the book instance with the given title from the collection.
+    Return the book instance with the given title (e.g. from
+    BookCollection.books_by_title).
     """
-    return next((book for book in collection if book.title == title), None)
+    return books_by_title.get(title)
 
 #=================================================
 # functions for random print
 #=================================================
 def get_random_book(
-    collection: list[Book],
-    filtered_titles: list[str],
+    filtered_books: Sequence[Book],
     *,
     length: str = "any",
-    only_with_available_quotes: bool = False
+    only_with_available_quotes: bool = False,
+    rng: random.Random | None = None
 ) -> Book | None:
     """
-    Return a random book matching the filtered titles.
+    Return a random book of the filtered books (drawn from rng,
+    default: the quote stream).
     If only_with_available_quotes is True, only return books with remaining quotes.
     """
-
-    books: list[Book] = [
-        book
-        for book in collection
-        if book.title in filtered_titles
-        and (
-            not only_with_available_quotes
-            or (
+    books: Sequence[Book] = filtered_books
+    if only_with_available_quotes:
+        books = [
+            book
+            for book in filtered_books
+            if (
                 book.has_remaining_quotes
                 if length != "short"
                 else book.has_remaining_short_quotes
             )
-        )
-    ]
+        ]
 
-    return random.choice(books) if books else None
+    return (rng or quote_rng.quote_stream).choice(books) if books else None
 
 def get_book_for_random_quote(
-    collection: list[Book],
+    books_by_title: Mapping[str, Book],
     selected_title: str,
-    filtered_titles: list[str],
-    length: str = "any"
+    filtered_books: Sequence[Book],
+    length: str = "any",
+    sampler: QuoteSampler | None = None,
+    rng: random.Random | None = None
 ) -> tuple[Book | None, str | None]:
     """
     Return a valid book for random quote selection or None.
     Also returns a message if no book/quote is available.
+    Without a selected book, the sampler (built from the filtered books)
+    picks it, otherwise every book with remaining quotes is equally likely.
     """
     if selected_title == constants.ANY_BOOK:
-        book = get_random_book(
-            collection,
-            filtered_titles,
-            length=length,
-            only_with_available_quotes=True
-        )
+        if sampler is not None:
+            book = sampler.draw()
+        else:
+            book = get_random_book(
+                filtered_books,
+                length=length,
+                only_with_available_quotes=True,
+                rng=rng
+            )
 
         if book is None:
             return None, "All quotes were printed."
@@ -72,7 +82,7 @@ def get_book_for_random_quote(
         return book, None
     else:
         # get the selected book instance
-        book: Book | None = find_book_by_title(collection, selected_title)
+        book: Book | None = find_book_by_title(books_by_title, selected_title)
 
         if book is None:
             return None, "Book not found."
@@ -87,13 +97,17 @@ def get_book_for_random_quote(
         # book is valid for random quote
         return book, None
 
-def get_random_quote(book: Book, length: str = "any") -> tuple[Quote | None, int]:
+def get_random_quote(
+    book: Book,
+    length: str = "any",
+    rng: random.Random | None = None
+) -> tuple[Quote | None, int]:
     """
     Return (quote, remaining_count).
     """
     if length != "short":
-        return book.get_random_q()
-    return book.get_random_short_q()
+        return book.get_random_q(rng)
+    return book.get_random_short_q(rng)
 
 
 #=================================================
@@ -129,27 +143,46 @@ def get_and_export_quotes(book: Book, filename: str) -> list[Quote]:
 class SearchMatches(TypedDict):
     titles: set[str]
     quotes: dict[str, list[str]]
-
-def search_books(books: list[Book], query: str) -> SearchMatches:
+    # (start, end) of the matches in every quote of quotes
+    spans: dict[str, list[list[tuple[int, int]]]]
+    # 1.0 for exact matches; fuzzy ones are ranked, best first
+    title_scores: dict[str, float]
+    scores: dict[str, list[float]]
+    fuzzy: bool
+
+def search_books(books: list[Book], query: str, collection: BookCollection) -> SearchMatches:
+    """
+    Search the long and short quotes of the books (of the collection) with a
+    query of search_query, raises QueryError if it is not valid. Titles are
+    matched if the query only searches the quote text. A fuzzy search (see
+    search_query.search) groups the quotes by book in the order of their best one.
+    """
 
     # initialize the search results
     matches: SearchMatches = {
         "titles": set(),
-        "quotes": {}
+        "quotes": {},
+        "spans": {},
+        "title_scores": {},
+        "scores": {},
+        "fuzzy": False
     }
 
-    query = query.strip().lower()
-
-    if not query:
+    if not query.strip():
         return matches
 
-    for book in books:
-        if query in book.title.lower():
-            matches["titles"].add(book.title)
+    index = search_index(collection)
+    scope = None if books is collection.books else index.positions_of(books)
+    hits, titles, matches["fuzzy"] = search(collection, query, scope)
 
-        for quote in book.quotes:
-            if query in quote.text.lower():
-                matches["quotes"].setdefault(book.title, []).append(quote.text)
+    for position, score in titles:
+        title = index.books[position].title
+        matches["titles"].add(title)
+        matches["title_scores"][title] = score
+    for hit in hits:
+        matches["quotes"].setdefault(hit.book.title, []).append(hit.quote.text)
+        matches["spans"].setdefault(hit.book.title, []).append(hit.spans)
+        matches["scores"].setdefault(hit.book.title, []).append(hit.score)
 
     return matches
 
@@ -173,6 +206,12 @@ def format_search_results_text(
     if not (matches["titles"] or matches["quotes"]):
         return "No match found."
 
+    # fuzzy results are ranked and show their score
+    fuzzy = matches["fuzzy"]
+    if fuzzy:
+        output.append("Closest results (fuzzy search):")
+        add_blank_line(output, 2)
+
     # title matches
     if show_headers and matches["titles"]:
         header = "Title matches"
@@ -180,8 +219,13 @@ def format_search_results_text(
         output.append("-" * len(header))
         add_blank_line(output)
 
-        for title in sorted(matches["titles"]):
-            output.append(title)
+        if fuzzy:
+            scores = matches["title_scores"]
+            for title in sorted(matches["titles"], key=lambda title: -scores[title]):
+                output.append(f"{title}  ({scores[title]:.2f})")
+        else:
+            for title in sorted(matches["titles"]):
+                output.append(title)
 
         # add spacing between sections
         if matches["quotes"]:
@@ -196,19 +240,20 @@ def format_search_results_text(
             output.append("-" * len(header))
             add_blank_line(output)
 
-        # compile a case-insensitive regex pattern for the literal query text
-        pattern = re.compile(re.escape(query), re.IGNORECASE) if query else None
-
         for i, (book_title, quotes) in enumerate(matches["quotes"].items()):
             if show_headers:
                 output.append(book_title)
                 output.append("-" * len(book_title))
 
+            # the matches were found by search_books
+            spans = matches["spans"][book_title]
             for j, q in enumerate(quotes):
                 # highlight matches if enabled
-                if pattern and highlight_match:
-                    q = pattern.sub(query.upper(), q)
+                if highlight_match:
+                    q = mark_matches(q, spans[j])
 
+                if fuzzy:
+                    output.append(f"({matches['scores'][book_title][j]:.2f})")
                 output.append(q)
                 # don't add double-spacing after last quote
                 if j != len(matches["quotes"][book_title]) - 1:
@@ -4,6 +4,7 @@
 import book_utils
 import datetime
 import os
+import quote_rng
 import random
 import subprocess
 import sys
@@ -11,8 +12,14 @@ import textwrap
 import unicodedata
 
 from book_collection import BookCollection, Book
+from book_filter import book_index, facet_label
 from book_statistics import Statistics, StatisticsReporter
 from constants_loader import constants
+from load_report import print_load_report
+from quote_prefetch import PrefetchedQuote, QuotePrefetcher
+from quote_sampler import QuoteSampler
+from search_query import QueryError
+from selection_journal import SelectionJournal, open_selection_journal
 from typing import Optional
 
 #=================================================
@@ -136,15 +143,53 @@ def print_random_quotes(
     books_for_print: list[Book],
     method: str,
     print_title: bool = True,
+    journal: SelectionJournal | None = None,
+    rng: random.Random | None = None
 ) -> None:
-    while True:
-        # random book for every iteration (or same book for a single-element list)
-        book = random.choice(books_for_print)
-        random_quote, quotes_left = getattr(book, method)()
+    # the sampler picks the book of every iteration (see RANDOM_QUOTE_WEIGHTING),
+    # everything is drawn from rng (default: the quote stream)
+    length = "short" if method == "get_random_short_q" else "any"
+    rng = rng or quote_rng.quote_stream
+    sampler = QuoteSampler(books_for_print, length, constants.RANDOM_QUOTE_WEIGHTING, rng)
+    columns = get_terminal_columns()
+
+    # the next quotes are drawn and wrapped while the current one is read
+    def draw() -> PrefetchedQuote | None:
+        while True:
+            book = sampler.draw()
+            if book is None:
+                return None
+            random_quote, quotes_left = getattr(book, method)(rng)
+            sampler.update(book)
+            # get random returns None if there is no more quote left in that book
+            if random_quote:
+                return PrefetchedQuote(book, random_quote, quotes_left, wrap_text(random_quote.text, columns))
+
+    prefetcher = QuotePrefetcher(constants.PREFETCH_QUOTES, draw)
+    try:
+        while True:
+            # wrapped for another terminal width, draw them again
+            if get_terminal_columns() != columns:
+                columns = get_terminal_columns()
+                for book in prefetcher.drop():
+                    sampler.update(book)
+
+            item = prefetcher.take()
+            if item is None:
+                # with a journal, the printed books start over next time
+                if journal is not None:
+                    for book in books_for_print:
+                        book.clear_selected_set()
+                        journal.clear_book(book)
+                input("All quotes were printed.")
+                return
 
-        # get random returns None if there is no more quote left in that book
-        if random_quote:
-            print_wrapped_text(random_quote.text)
+            book = item.book
+            if journal is not None:
+                journal.record(book, item.quote)
+
+            print(item.text)
+            prefetcher.fill()
 
             # "delay" title print, but exit immediately if requested
             if is_exit_requested():
@@ -152,20 +197,16 @@ def print_random_quotes(
 
             # print the "delayed" title if needed
             if print_title:
-                print(f"{book.title}   / {quotes_left} left /")
+                print(f"{book.title}   / {item.quotes_left} left /")
                 print(f"{'-' * len(book.title)}")
                 if is_exit_requested():
                     return
 
             # separate printed title from the next quote
             print('\n')
-        else:
-            # refresh the list if no more quote is in the book
-            books_for_print.remove(book)
-
-        if not books_for_print:
-            input("All quotes were printed.")
-            return
+    finally:
+        # the quotes drawn ahead were not shown
+        prefetcher.drop()
 
 #=================================================
 # check exit request ('x')
@@ -178,7 +219,11 @@ def is_exit_requested() -> bool:
 # print wrapped text
 #=================================================
 def print_wrapped_text(text: str) -> None:
-    print(*textwrap.wrap(f"{text}\n", get_terminal_columns() - 1), sep='\n')
+    print(wrap_text(text, get_terminal_columns()))
+
+
+def wrap_text(text: str, columns: int) -> str:
+    return '\n'.join(textwrap.wrap(f"{text}\n", columns - 1))
 
 #=================================================
 # print items with selection numbers
@@ -240,13 +285,16 @@ def choose_a_book(attr: str) -> Book:
     if choice:
         return books_for_selection[choice - 1]
 
-    return random.choice(books_for_selection)
+    return quote_rng.quote_stream.choice(books_for_selection)
 
 #=================================================
 # user can choose an author
 #=================================================
-def choose_an_author(authors: list[str]) -> str:
-    print_selection_list(authors)
+def choose_an_author(authors: list[str], counts: dict[str, int] | None = None) -> str:
+    # counts: number of books per author, shown next to the names
+    print_selection_list(
+        authors if counts is None else [facet_label(author, counts[author]) for author in authors]
+    )
     choice = get_user_choice("author", len(authors))
     print_separator_line()
     return authors[choice - 1]
@@ -279,6 +327,7 @@ def choose_a_property() -> str:
 def choose_a_folder(
     folders: dict[str, set],
     allow_select_all: bool = True,
+    counts: dict[str, int] | None = None,
 ) -> Optional[str]:
     def strip_accents(s: str) -> str:
         return ''.join(
@@ -291,7 +340,10 @@ def choose_a_folder(
         key=lambda s: strip_accents(s).lower()
     )
 
-    print_selection_list(folders_list)
+    # counts: number of books per folder, shown next to the names
+    print_selection_list(
+        folders_list if counts is None else [facet_label(folder, counts.get(folder, 0)) for folder in folders_list]
+    )
 
     choice = get_user_choice(
         "folder",
@@ -314,335 +366,361 @@ def choose_quote_length() -> str:
 #=================================================
 # MAIN
 #=================================================
-collection = BookCollection()
-error = collection.build_the_collection()
+if __name__ == "__main__":
+    # --seed (see quote_rng)
+    quote_rng.apply_command_line(recording=False)
 
-if error:
-    print(error)
-    sys.exit()
+    collection = BookCollection()
+    error = collection.build_the_collection()
 
-options_menu = create_options_menu(OPTIONS)
-#=================================================
-# main loop for printing
-#=================================================
-while True:
-    # start with empty window
-    subprocess.run(["cmd", "/c", "cls"])
+    if error:
+        print(error)
+        sys.exit()
 
-    # print the main title and options
-    string = f"== The Collection =="
-    separator = '=' * len(string)
-    print(f"{separator}\n{string}\n{separator}\n")
+    # quotes shown in earlier sessions stay selected (None if disabled)
+    journal = open_selection_journal(collection)
 
-    # get option also prints the options menu
-    option = get_option()
-    print_separator_line()
+    # the screen is cleared in the main loop, wait until the report was read
+    if collection.load_report:
+        print_load_report(collection.load_report)
+        input("\nPress Enter to continue...")
 
+    options_menu = create_options_menu(OPTIONS)
     #=================================================
-    # random quotes
+    # main loop for printing
     #=================================================
-    if (option == "Random / All Quotes" or
-        option == "Random / Selected Author" or
-        option == "Random / Selected Folder"):
-
-        # start with full list (all quotes)
-        books = [book for book in collection.books if book.total_quotes > 0]
-
-        # narrow down list if necessary
-        if option == "Random / Selected Author":
-            selected_author = choose_an_author(collection.authors_with_quotes)
-            books = [b for b in books if b.author == selected_author]
-
-        elif option == "Random / Selected Folder":
-            selected_folder = (
-                choose_a_folder(
-                    collection.folders,
-                    allow_select_all=False
-                )
-                if collection.folders
-                else None
-            )
-            if selected_folder is not None:
-                books = [b for b in books if b.folder == selected_folder]
+    while True:
+        # start with empty window
+        subprocess.run(["cmd", "/c", "cls"])
 
-        length = choose_quote_length()
-        print_random_quotes(books, LENGTH_TO_METHOD[length])
+        # print the main title and options
+        string = f"== The Collection =="
+        separator = '=' * len(string)
+        print(f"{separator}\n{string}\n{separator}\n")
 
-    #=================================================
-    # selected book section
-    #=================================================
-    elif (option == "Book / every quote" or
-          option == "Book / quote distribution"):
-
-        # get a book from the printed list
-        selected_book = choose_a_book("with_quotes")
+        # get option also prints the options menu
+        option = get_option()
+        print_separator_line()
 
         #=================================================
-        # all quotes in page order
+        # random quotes
         #=================================================
-        if option == "Book / every quote":
-            # open output file with context manager
-            filename = f"{selected_book.title}.txt"
-            with open(filename, "w", encoding="utf8") as f_output:
-                # create a list sorted by page number of all quotes in the book
-                quotes = selected_book.get_all_quotes_list()
-
-                sorted_by_page = sorted(
-                    quotes,
-                    key=lambda q: q.page
+        if (option == "Random / All Quotes" or
+            option == "Random / Selected Author" or
+            option == "Random / Selected Folder"):
+
+            # start with full list (all books with quotes)
+            index = book_index(collection)
+            mask = index.with_quotes
+
+            # narrow down list if necessary
+            if option == "Random / Selected Author":
+                author_counts = index.author_counts(mask)
+                selected_author = choose_an_author(list(author_counts), author_counts)
+                mask = index.select(author=selected_author)
+
+            elif option == "Random / Selected Folder":
+                selected_folder = (
+                    choose_a_folder(
+                        collection.folders,
+                        allow_select_all=False,
+                        counts=index.folder_counts(mask)
+                    )
+                    if collection.folders
+                    else None
                 )
+                if selected_folder is not None:
+                    mask = index.select(selected_folder)
 
-                print(selected_book.title)
-                print('-' * len(selected_book.title))
-                f_output.write(f"{selected_book.title}\n")
-                f_output.write(f"{'-' * len(selected_book.title)}\n")
-
-                for i, quote in enumerate(sorted_by_page):
-                    string = f"{i + 1} / {len(sorted_by_page)}  (p.{str(quote.page)})"
-                    print(string)
-                    print_wrapped_text(quote.text)
-                    print()
-                    f_output.write(f"{string}\n")
-                    f_output.write(f"{quote.text}\n\n")
+            books = index.books_of(mask)
+            length = choose_quote_length()
+            print_random_quotes(books, LENGTH_TO_METHOD[length], journal=journal)
 
         #=================================================
-        # quote distribution
+        # selected book section
         #=================================================
-        elif option == "Book / quote distribution":
-            print(f"{selected_book.title}\n{'-' * len(selected_book.title)}\n")
-
-            # use terminal width as the base of the diagram size
-            space = "    "
-            columns = get_terminal_columns() - 10
-            rows = round(columns * 0.2)
-            res = selected_book.pages_count / columns
-
-            # collect the distribution of quotes based on calculated resolution
-            # use length of each quote instead of simply just the numbers
-            q_distr = []
-            for i in range(columns):
-                q_distr.append(0)
-                start_page = res * i
-                end_page = res * (i + 1)
-                for quote in selected_book.get_all_quotes_list():
-                    if (quote.page > start_page) and (quote.page <= end_page):
-                        q_distr[i] += len(quote.text)
-
-            # map the distribution from (0) to (rows)
-            old_min, old_max = min(q_distr), max(q_distr)
-            new_min, new_max = 0, rows
-            mapped_distr = [(new_max - new_min) * (x - old_min) / (old_max - old_min) + new_min for x in q_distr]
-
-            print(f"{space}↑")
-            # range is exclusive of the end value, but it's not a problem that rows number
-            # will not be reached, because in this way, compare value (new max - i) will
-            # not reach zero, so a row full of '*' character will not be printed
-            for i in range(rows):
-                row_str_list = []
-                for j in range(columns):
-                    row_str_list.append('*' if mapped_distr[j] >= (new_max - i) else ' ')
-
-                # print the updated row immediately
-                print(f"{space}|{''.join(row_str_list)}")
-
-            print(f"{space}{'-' * columns}→")
-            print(f"{space}1{' ' * (columns - len(str(selected_book.pages_count)) + 1)}{selected_book.pages_count}")
+        elif (option == "Book / every quote" or
+              option == "Book / quote distribution"):
+
+            # get a book from the printed list
+            selected_book = choose_a_book("with_quotes")
+
+            #=================================================
+            # all quotes in page order
+            #=================================================
+            if option == "Book / every quote":
+                # open output file with context manager
+                filename = f"{selected_book.title}.txt"
+                with open(filename, "w", encoding="utf8") as f_output:
+                    # create a list sorted by page number of all quotes in the book
+                    quotes = selected_book.get_all_quotes_list()
+
+                    sorted_by_page = sorted(
+                        quotes,
+                        key=lambda q: q.page
+                    )
+
+                    print(selected_book.title)
+                    print('-' * len(selected_book.title))
+                    f_output.write(f"{selected_book.title}\n")
+                    f_output.write(f"{'-' * len(selected_book.title)}\n")
+
+                    for i, quote in enumerate(sorted_by_page):
+                        string = f"{i + 1} / {len(sorted_by_page)}  (p.{str(quote.page)})"
+                        print(string)
+                        print_wrapped_text(quote.text)
+                        print()
+                        f_output.write(f"{string}\n")
+                        f_output.write(f"{quote.text}\n\n")
+
+            #=================================================
+            # quote distribution
+            #=================================================
+            elif option == "Book / quote distribution":
+                print(f"{selected_book.title}\n{'-' * len(selected_book.title)}\n")
+
+                # use terminal width as the base of the diagram size
+                space = "    "
+                columns = get_terminal_columns() - 10
+                rows = round(columns * 0.2)
+                res = selected_book.pages_count / columns
+
+                # collect the distribution of quotes based on calculated resolution
+                # use length of each quote instead of simply just the numbers
+                q_distr = []
+                for i in range(columns):
+                    q_distr.append(0)
+                    start_page = res * i
+                    end_page = res * (i + 1)
+                    for quote in selected_book.get_all_quotes_list():
+                        if (quote.page > start_page) and (quote.page <= end_page):
+                            q_distr[i] += len(quote.text)
+
+                # map the distribution from (0) to (rows)
+                old_min, old_max = min(q_distr), max(q_distr)
+                new_min, new_max = 0, rows
+                mapped_distr = [(new_max - new_min) * (x - old_min) / (old_max - old_min) + new_min for x in q_distr]
+
+                print(f"{space}↑")
+                # range is exclusive of the end value, but it's not a problem that rows number
+                # will not be reached, because in this way, compare value (new max - i) will
+                # not reach zero, so a row full of '*' character will not be printed
+                for i in range(rows):
+                    row_str_list = []
+                    for j in range(columns):
+                        row_str_list.append('*' if mapped_distr[j] >= (new_max - i) else ' ')
+
+                    # print the updated row immediately
+                    print(f"{space}|{''.join(row_str_list)}")
+
+                print(f"{space}{'-' * columns}→")
+                print(f"{space}1{' ' * (columns - len(str(selected_book.pages_count)) + 1)}{selected_book.pages_count}")
 
-    #=================================================
-    # generate book list by chosen property
-    #=================================================
-    elif option == "Book / list by property":
-
-        book_property = choose_a_property()
-
-        sort_rules = {
-            "added on": (lambda b: b.file_modified_date, True),
-            "reading now": (lambda b: b.published_date, True),
-            "finished list": (lambda b: b.have_read_date, True),
-            "read duration": (lambda b: b.first_q_timestamp, True),
-            "publish date": (lambda b: b.published_date, True),
-            "number of quotes": (lambda b: b.total_quotes, True),
-            "quote/page ratio": (lambda b: b.quotes_per_page, True),
-            "rating": (lambda b: b.rating, True),
-            "folder": (lambda b: b.title, False),
-        }
-
-        sort_key, reverse = sort_rules.get(
-            book_property,
-            (lambda b: b.title, False)
-        )
+        #=================================================
+        # generate book list by chosen property
+        #=================================================
+        elif option == "Book / list by property":
+
+            book_property = choose_a_property()
+
+            sort_rules = {
+                "added on": (lambda b: b.file_modified_date, True),
+                "reading now": (lambda b: b.published_date, True),
+                "finished list": (lambda b: b.have_read_date, True),
+                "read duration": (lambda b: b.first_q_timestamp, True),
+                "publish date": (lambda b: b.published_date, True),
+                "number of quotes": (lambda b: b.total_quotes, True),
+                "quote/page ratio": (lambda b: b.quotes_per_page, True),
+                "rating": (lambda b: b.rating, True),
+                "folder": (lambda b: b.title, False),
+            }
+
+            sort_key, reverse = sort_rules.get(
+                book_property,
+                (lambda b: b.title, False)
+            )
 
-        sorted_books = sorted(collection.books, key=sort_key, reverse=reverse)
+            sorted_books = sorted(collection.books, key=sort_key, reverse=reverse)
 
-        # choose function returns none if all is requested
-        allow_folder_selection = book_property not in {"read duration", "reading now", "finished list"}
-        folder = (
-            choose_a_folder(collection.folders)
-            if collection.folders and allow_folder_selection
-            else None
-        )
+            # choose function returns none if all is requested
+            allow_folder_selection = book_property not in {"read duration", "reading now", "finished list"}
+            index = book_index(collection)
+            folder = (
+                choose_a_folder(collection.folders, counts=index.folder_counts(index.all))
+                if collection.folders and allow_folder_selection
+                else None
+            )
 
-        while True:
-            for book in sorted_books:
-                if not folder or book.folder == folder:
-                    # print book data according to chosen property
-                    if book_property == "added on":
-                        print(f"  -->  {book.file_modified_date.strftime('%Y-%b-%d')}  /  {book.title}")
-
-                    elif book_property in {"reading now", "continued_as_reading_now"}:
-                        if (book.activity_time != 0) and not book.is_read:
-                            print(f"  -->  "
-                                  f"{book.published_date:4d}  /  "
-                                  f"{book.rating:.2f}  /  "
-                                  f"{book.ratings_count:>{6}}k  /  "
-                                  f"{book.pages_count:4d} pages  /  "
-                                  f"{book.title}")
-
-                    elif book_property in {"finished list", "continued_as_publish_date_of_finished"}:
-                        if book.is_read:
-                            if book_property == "finished list":
-                                print(f"  -->  {book.have_read_date.strftime('%Y-%b-%d')}  /  {book.title}")
-                            else:
-                                print(f"  -->  {book.published_date}  /  {book.title}")
-
-                    elif book_property == "read duration":
-                        started_after_limit = (
-                            book.first_q_timestamp > constants.START_DATE_FOR_READ_LIST
-                        )
-
-                        took_more_than_day = (
-                            (book.last_q_timestamp - book.first_q_timestamp)
-                            > constants.ONE_DAY_IN_SECONDS
-                        )
-
-                        not_excluded = (
-                            book.title not in constants.EXCLUDED_TITLES_FROM_READ_DURATION
-                        )
-
-                        is_finished = book.is_read
-
-                        if (
-                            started_after_limit
-                            and took_more_than_day
-                            and not_excluded
-                            and is_finished
-                        ):
-                            dt_first = datetime.datetime.fromtimestamp(book.first_q_timestamp)
-                            elapsed_days = (book.have_read_date - dt_first).days + 1
-                            if dt_first.year == book.have_read_date.year:
-                                dt_string = f"{dt_first.strftime('%Y %b.%d')} - {book.have_read_date.strftime('%b.%d')}"
-                            else:
-                                dt_string = f"{dt_first.strftime('%Y %b.%d')} - {book.have_read_date.strftime('%Y %b.%d')}"
-
-                            print(f"  -->  {dt_string}{' ' * (25-len(dt_string))}  /  "
-                                  f"{book.title}{' ' * (62-len(book.title))}"
-                                  f"/ {book.pages_count:4d} pages  /  {int((book.pages_count / elapsed_days)+0.5):2d} / day")
-
-                    elif book_property == "publish date":
-                        date_data = f"{book.published_date:4d}" if book.published_date else " N/A"
-                        pages_count = f"{book.pages_count:4d}" if book.pages_count else " N/A"
-                        print(f"  -->  {date_data}  /  {pages_count} pages  /  {book.title}")
-
-                    elif book_property == "number of quotes":
-                        if book.total_quotes > 0:
-                            print(f"  -->  {book.total_quotes:3d}  /  {book.title}")
-
-                    elif book_property == "quote/page ratio":
-                        if book.quotes_per_page > 0.0:
-                            string = f"  -->  {book.quotes_per_page:.3f}  /  {book.title}"
-                            print(f"{string}{' ' * (85-len(string))} ( {book.total_quotes:3d} / {book.pages_count:4d} )")
-
-                    elif book_property in {"rating", "continued_as_ratings_count"}:
-                        print(f"  -->  {book.rating:.2f}  /  {book.ratings_count:>{6}}k  /  {book.title}")
-
-                    elif book_property == "folder":
-                        date_data = f"{book.published_date:4d}" if book.published_date else " N/A"
-                        pages_count = f"{book.pages_count:4d}" if book.pages_count else " N/A"
-                        print(f"  -->  {date_data}  /  {pages_count} pages  /  {book.title}")
-
-            if book_property not in {"reading now", "finished list", "rating"}:
-                break
-            else:
-                # rating and finished lists are special
-                print_separator_line()
-                input()
-                if book_property == "reading now":
-                    sorted_books = sorted(collection.books, key=lambda book: book.ratings_count, reverse=True)
-                    book_property = "continued_as_reading_now"
-                elif book_property == "finished list":
-                    # print based on ratings count
-                    sorted_books = sorted(collection.books, key=lambda book: book.published_date, reverse=True)
-                    book_property = "continued_as_publish_date_of_finished"
-                elif book_property == "rating":
-                    # print based on ratings count in the second round
-                    sorted_books = sorted(collection.books, key=lambda book: book.ratings_count, reverse=True)
-                    book_property = "continued_as_ratings_count"
-                else:
+            while True:
+                for book in sorted_books:
+                    if not folder or book.in_folder(folder):
+                        # print book data according to chosen property
+                        if book_property == "added on":
+                            print(f"  -->  {book.file_modified_date.strftime('%Y-%b-%d')}  /  {book.title}")
+
+                        elif book_property in {"reading now", "continued_as_reading_now"}:
+                            if (book.activity_time != 0) and not book.is_read:
+                                print(f"  -->  "
+                                      f"{book.published_date:4d}  /  "
+                                      f"{book.rating:.2f}  /  "
+                                      f"{book.ratings_count:>{6}}k  /  "
+                                      f"{book.pages_count:4d} pages  /  "
+                                      f"{book.title}")
+
+                        elif book_property in {"finished list", "continued_as_publish_date_of_finished"}:
+                            if book.is_read:
+                                if book_property == "finished list":
+                                    print(f"  -->  {book.have_read_date.strftime('%Y-%b-%d')}  /  {book.title}")
+                                else:
+                                    print(f"  -->  {book.published_date}  /  {book.title}")
+
+                        elif book_property == "read duration":
+                            started_after_limit = (
+                                book.first_q_timestamp > constants.START_DATE_FOR_READ_LIST
+                            )
+
+                            took_more_than_day = (
+                                (book.last_q_timestamp - book.first_q_timestamp)
+                                > constants.ONE_DAY_IN_SECONDS
+                            )
+
+                            not_excluded = (
+                                book.title not in constants.EXCLUDED_TITLES_FROM_READ_DURATION
+                            )
+
+                            is_finished = book.is_read
+
+                            if (
+                                started_after_limit
+                                and took_more_than_day
+                                and not_excluded
+                                and is_finished
+                            ):
+                                dt_first = datetime.datetime.fromtimestamp(book.first_q_timestamp)
+                                elapsed_days = (book.have_read_date - dt_first).days + 1
+                                if dt_first.year == book.have_read_date.year:
+                                    dt_string = f"{dt_first.strftime('%Y %b.%d')} - {book.have_read_date.strftime('%b.%d')}"
+                                else:
+                                    dt_string = f"{dt_first.strftime('%Y %b.%d')} - {book.have_read_date.strftime('%Y %b.%d')}"
+
+                                print(f"  -->  {dt_string}{' ' * (25-len(dt_string))}  /  "
+                                      f"{book.title}{' ' * (62-len(book.title))}"
+                                      f"/ {book.pages_count:4d} pages  /  {int((book.pages_count / elapsed_days)+0.5):2d} / day")
+
+                        elif book_property == "publish date":
+                            date_data = f"{book.published_date:4d}" if book.published_date else " N/A"
+                            pages_count = f"{book.pages_count:4d}" if book.pages_count else " N/A"
+                            print(f"  -->  {date_data}  /  {pages_count} pages  /  {book.title}")
+
+                        elif book_property == "number of quotes":
+                            if book.total_quotes > 0:
+                                print(f"  -->  {book.total_quotes:3d}  /  {book.title}")
+
+                        elif book_property == "quote/page ratio":
+                            if book.quotes_per_page > 0.0:
+                                string = f"  -->  {book.quotes_per_page:.3f}  /  {book.title}"
+                                print(f"{string}{' ' * (85-len(string))} ( {book.total_quotes:3d} / {book.pages_count:4d} )")
+
+                        elif book_property in {"rating", "continued_as_ratings_count"}:
+                            print(f"  -->  {book.rating:.2f}  /  {book.ratings_count:>{6}}k  /  {book.title}")
+
+                        elif book_property == "folder":
+                            date_data = f"{book.published_date:4d}" if book.published_date else " N/A"
+                            pages_count = f"{book.pages_count:4d}" if book.pages_count else " N/A"
+                            print(f"  -->  {date_data}  /  {pages_count} pages  /  {book.title}")
+
+                if book_property not in {"reading now", "finished list", "rating"}:
                     break
+                else:
+                    # rating and finished lists are special
+                    print_separator_line()
+                    input()
+                    if book_property == "reading now":
+                        sorted_books = sorted(collection.books, key=lambda book: book.ratings_count, reverse=True)
+                        book_property = "continued_as_reading_now"
+                    elif book_property == "finished list":
+                        # print based on ratings count
+                        sorted_books = sorted(collection.books, key=lambda book: book.published_date, reverse=True)
+                        book_property = "continued_as_publish_date_of_finished"
+                    elif book_property == "rating":
+                        # print based on ratings count in the second round
+                        sorted_books = sorted(collection.books, key=lambda book: book.ratings_count, reverse=True)
+                        book_property = "continued_as_ratings_count"
+                    else:
+                        break
 
-        print_separator_line()
+            print_separator_line()
 
-    #=================================================
-    # statistics
-    #=================================================
-    elif option == "Statistics":
-        stats = Statistics.from_collection(collection)
-        reporter = StatisticsReporter(print)
-        reporter.report(
-            stats=stats,
-            collection=collection,
-            max_short_quote_chars=constants.MAX_CHAR_IN_SHORT_QUOTE,
-            omitted_words=constants.WORDS_TO_OMIT_FROM_SEARCH,
-            top_n_words=30
-        )
+        #=================================================
+        # statistics
+        #=================================================
+        elif option == "Statistics":
+            stats = Statistics.from_collection(collection)
+            reporter = StatisticsReporter(print)
+            reporter.report(
+                stats=stats,
+                collection=collection,
+                max_short_quote_chars=constants.MAX_CHAR_IN_SHORT_QUOTE,
+                omitted_words=constants.WORDS_TO_OMIT_FROM_SEARCH,
+                top_n_words=30
+            )
 
-    #=================================================
-    # search
-    #=================================================
-    elif option == "Search":
-        while True:
-            search_prompt = "Search for at least 3 characters: "
-            str_to_search = input(search_prompt).lower()
-            print('-' * (len(search_prompt) + len(str_to_search)))
+        #=================================================
+        # search
+        #=================================================
+        elif option == "Search":
+            while True:
+                search_prompt = "Search for at least 3 characters (~ for fuzzy): "
+                # not lowercased, AND / OR / NOT are operators (see search_query)
+                str_to_search = input(search_prompt)
+                print('-' * (len(search_prompt) + len(str_to_search)))
+
+                if str_to_search.lower() == 'x':
+                    break
 
-            if str_to_search == 'x':
-                break
+                if len(str_to_search) < 3:
+                    print("Incorrect input. Please enter at least 3 characters.")
+                    print_separator_line()
+                    continue
+
+                # the search index is built by the first search
+                try:
+                    matches: book_utils.SearchMatches = book_utils.search_books(
+                        collection.books,
+                        str_to_search,
+                        collection
+                    )
+                except QueryError as e:
+                    print(f"Invalid query: {e}")
+                    print_separator_line()
+                    continue
+
+                formatted = book_utils.format_search_results_text(
+                    matches,
+                    str_to_search,
+                    highlight_match=True,
+                    show_headers=True
+                )
 
-            if len(str_to_search) < 3:
-                print("Incorrect input. Please enter at least 3 characters.")
+                print(formatted)
+                print('\n')
                 print_separator_line()
-                continue
-
-            matches: book_utils.SearchMatches = book_utils.search_books(
-                collection.books,
-                str_to_search
-            )
-
-            formatted = book_utils.format_search_results_text(
-                matches,
-                str_to_search,
-                highlight_match=True,
-                show_headers=True
-            )
-
-            print(formatted)
-            print('\n')
-            print_separator_line()
 
-    #=================================================
-    # error
-    #=================================================
-    elif option == "Something went wrong":
-        print("Error.")
+        #=================================================
+        # error
+        #=================================================
+        elif option == "Something went wrong":
+            print("Error.")
 
-    #=================================================
-    # hold on and clear screen before next iteration
-    #=================================================
-    if option not in NO_PAUSE_OPTIONS:
-        input()
+        #=================================================
+        # hold on and clear screen before next iteration
+        #=================================================
+        if option not in NO_PAUSE_OPTIONS:
+            input()
 
-    # start over with next iteration
-    for book in collection.books:
-        book.clear_selected_set()
+        # start over with next iteration (the journal keeps the shown quotes)
+        if journal is None:
+            for book in collection.books:
+                book.clear_selected_set()
 
-    subprocess.run(["cmd", "/c", "cls"])
+        subprocess.run(["cmd", "/c", "cls"])
@@ -0,0 +1,137 @@
+#=================================================
+# IMPORT
+#=================================================
+import hashlib
+import os
+import pickle
+
+from constants_loader import constants
+from typing import Any
+
+#=================================================
+# CONSTANTS
+#=================================================
+SNAPSHOT_MAGIC = b"RCSNAP\x00\x01"
+
+# bump this whenever Book/Quote/BookCollection attributes change,
+# snapshots written by older versions are then rebuilt automatically
+SNAPSHOT_FORMAT_VERSION = 9
+
+HASH_CHUNK_SIZE = 1 << 20
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def content_digest(path: str) -> str:
+    """
+    Return a hash of the file content (read in chunks).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_fingerprint() -> str:
+    """
+    Return a hash of every setting that changes the parsed result,
+    so editing the constants invalidates an existing snapshot.
+    """
+    settings = (
+        SNAPSHOT_FORMAT_VERSION,
+        constants.USE_TEXT_STORE,
+        constants.MAX_CHAR_IN_SHORT_QUOTE,
+        constants.ONE_DAY_IN_SECONDS,
+        constants.MAX_SEC_BETWEEN_LAST_QUOTE_AND_READ_DATE,
+        constants.DEFAULT_DATE_FOR_READ_DATE,
+        constants.EXCEPTION_DATE_FOR_READ_DATE,
+        sorted(constants.BOOK_RENAME_DICTIONARY.items()),
+        sorted(constants.EXCEPTION_TITLES_FOR_READ_DATE),
+        sorted(constants.EXCLUDED_TITLES_FROM_READ_DATE),
+    )
+    return hashlib.blake2b(repr(settings).encode("utf8"), digest_size=20).hexdigest()
+
+
+def snapshot_path_for(source_path: str) -> str:
+    return os.path.join(os.path.dirname(source_path), constants.SNAPSHOT_FILE)
+
+
+def load_snapshot(snapshot_path: str, source_path: str) -> Any | None:
+    """
+    Return the stored payload if the snapshot was built from the current
+    source file with the current settings, otherwise None.
+    """
+    try:
+        stat = os.stat(source_path)
+        with open(snapshot_path, "rb") as file:
+            if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+
+            # the header is a separate pickle, the payload is only read on a match
+            header: dict = pickle.load(file)
+            if (header["size"] != stat.st_size or
+                header["settings"] != settings_fingerprint()):
+                return None
+
+            # same size and mtime is trusted, otherwise the content decides
+            # (e.g. the same backup extracted again)
+            mtime_changed = header["mtime_ns"] != stat.st_mtime_ns
+            if mtime_changed and header["digest"] != content_digest(source_path):
+                return None
+
+            payload = pickle.load(file)
+
+    # a missing, truncated or outdated snapshot is simply rebuilt
+    except Exception:
+        return None
+
+    # store the new mtime, so the next launch can skip hashing again
+    if mtime_changed:
+        _refresh_header(snapshot_path, {**header, "mtime_ns": stat.st_mtime_ns})
+
+    return payload
+
+
+def save_snapshot(snapshot_path: str, source_path: str, payload: Any) -> OSError | None:
+    """
+    Write the payload with a header describing the source file.
+    The file is replaced atomically, a failed write leaves no partial snapshot.
+    """
+    tmp_path = f"{snapshot_path}.tmp"
+    try:
+        stat = os.stat(source_path)
+        header = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": content_digest(source_path),
+            "settings": settings_fingerprint(),
+        }
+
+        with open(tmp_path, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError as error:
+        return error
+
+    return None
+
+
+def _refresh_header(snapshot_path: str, header: dict) -> None:
+    # the header size may change, so the payload bytes are copied after it
+    tmp_path = f"{snapshot_path}.tmp"
+    try:
+        with open(snapshot_path, "rb") as file:
+            file.read(len(SNAPSHOT_MAGIC))
+            pickle.load(file)
+            payload_bytes = file.read()
+
+        with open(tmp_path, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.write(payload_bytes)
+        os.replace(tmp_path, snapshot_path)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
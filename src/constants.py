@@ -18,6 +18,96 @@ ONE_DAY_IN_SECONDS = 86400
 MAX_CHAR_IN_SHORT_QUOTE = 300
 MAX_SEC_BETWEEN_LAST_QUOTE_AND_READ_DATE = 7 * ONE_DAY_IN_SECONDS
 
+# how random quotes pick a book (see quote_sampler.WEIGHTINGS):
+# "books" (every book alike), "quotes" (every remaining quote alike),
+# "rating", "recency" or "length" (quotes, weighted by the book's rating,
+# the age of its last quote or its average quote length)
+RANDOM_QUOTE_WEIGHTING = "quotes"
+RECENCY_HALF_LIFE_DAYS = 365
+
+# random quotes drawn ahead (with their text prepared) while the current one is read,
+# they are put back when the filters or the quote length change
+PREFETCH_QUOTES = 3
+
+# the filter dropdowns show how many books (with quotes) every folder and author has
+SHOW_FACET_COUNTS = True
+
+# width of the filter dropdowns (in characters), they are not sized to their longest entry
+PICKER_MIN_CHARS = 20
+
+# the GUIs build the search index of the quotes (quote_search) on their loader
+# and auto-refresh threads and after a Reset, otherwise the first search builds it
+SEARCH_INDEX_AT_LOAD = True
+
+# fuzzy search (typos, missing accents) for a query starting with ~ and, if
+# FUZZY_SEARCH_FALLBACK is on, for one that finds nothing as typed;
+# it shows the FUZZY_TOP_K best quotes and books
+FUZZY_SEARCH_FALLBACK = True
+FUZZY_TOP_K = 30
+
+# remember the quotes shown by random draws across restarts in a journal next to
+# library.json (written in batches every SELECTION_JOURNAL_FLUSH_MS), Reset clears it
+SELECTION_JOURNAL = True
+SELECTION_JOURNAL_FILE = "library.journal"
+SELECTION_JOURNAL_FLUSH_MS = 500
+
+# review mode (spaced repetition, SM-2): states are kept in REVIEW_FILE next to
+# library.json, a quote marked "again" comes back after REVIEW_AGAIN_MINUTES
+REVIEW_FILE = "library.reviews"
+REVIEW_AGAIN_MINUTES = 10
+REVIEW_INITIAL_EASE = 2.5
+
+# random draws are seeded with RANDOM_SEED (None = a new seed every launch; the
+# READERA_SEED environment variable and --seed override it), the GUIs record the
+# draws of a session to SESSION_RECORD_FILE (or --record) to replay with session-replay.py
+RANDOM_SEED = None
+SESSION_RECORD_FILE = None
+
+
+#=================================================
+# collection loading
+#=================================================
+# library.json, a ReadEra backup (.bak) or a folder of backups
+# (the newest .bak is used, library.json is read from inside the archive),
+# a list of sources (e.g. one per device) is merged into one collection
+LIBRARY_SOURCE = "library.json"
+
+# walk library.json doc by doc instead of decoding it at once,
+# peak memory then follows the collection, not the JSON tree
+STREAMING_LOADER = False
+
+# keep a binary snapshot of the parsed collection next to library.json,
+# it is loaded directly while library.json and the constants are unchanged
+USE_SNAPSHOT_CACHE = True
+SNAPSHOT_FILE = "library.snapshot"
+
+# parse library.json in this many processes (0 or 1 = single process),
+# only worth it for very large libraries, backups (.bak) are parsed serially
+LOAD_WORKERS = 0
+
+# keep quote and annotation texts in a memory-mapped file next to library.json,
+# quotes then only hold a reference and the text is decoded on access
+USE_TEXT_STORE = False
+TEXT_STORE_FILE = "library.texts"
+
+# reload the collection in the GUIs when the library source changes,
+# the source is checked every AUTO_REFRESH_POLL_MS and reloaded once it
+# stayed unchanged for AUTO_REFRESH_DEBOUNCE_MS (e.g. a backup being copied)
+AUTO_REFRESH = True
+AUTO_REFRESH_POLL_MS = 2000
+AUTO_REFRESH_DEBOUNCE_MS = 1500
+
+# mini-gui shows its window at once and builds the collection on a worker thread,
+# dropdowns and the quote counter fill in with every LOAD_PROGRESS_BATCH parsed books
+# (from the first doc on with STREAMING_LOADER, otherwise once library.json is read)
+PROGRESSIVE_STARTUP = True
+LOAD_PROGRESS_BATCH = 500
+LOAD_PROGRESS_POLL_MS = 50
+
+# print a per-phase timing report after loading the collection
+# (also enabled by the READERA_LOAD_PROFILE environment variable, "json" for JSON output)
+LOAD_PROFILE = False
+
 
 #=================================================
 # read list can be started from a timestamp
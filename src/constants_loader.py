@@ -1,7 +1,16 @@
 #=================================================
 # IMPORT based on availability
 #=================================================
+import constants
+
 try:
-    import constants_local as constants
+    import constants_local
 except ImportError:
-    import constants
\ No newline at end of file
+    pass
+else:
+    # a constants_local.py copied from an older constants.py keeps working,
+    # settings it does not define get their default from constants.py
+    for name, value in vars(constants).items():
+        if name.isupper() and not hasattr(constants_local, name):
+            setattr(constants_local, name, value)
+    constants = constants_local
@@ -0,0 +1,219 @@
+#=================================================
+# IMPORT
+#=================================================
+import heapq
+import re
+import unicodedata
+import weakref
+
+from array import array
+from book_collection import BookCollection
+from collections import Counter
+from collections.abc import Sequence
+from quote_search import QuoteSearchIndex, SearchHit, match_spans, search_index
+
+#=================================================
+# CONSTANTS
+#=================================================
+WORD_PATTERN = re.compile(r"\w+")
+
+#=================================================
+# CLASSES
+#=================================================
+class FuzzyMatcher:
+    """
+    The terms within a few edits of a word (see max_edits). Every term is
+    listed under the bigrams of " term " and its length: an edit changes at
+    most 3 bigrams, so a term within k edits differs by at most k in length
+    and shares all but 3k bigrams of the word (and of its own). Only the
+    postings of those lengths are counted, only the terms passing both counts
+    are compared with edit_distance.
+    """
+
+    def __init__(self, terms: Sequence[str]) -> None:
+        self.terms = terms
+        # the number of distinct bigrams of every term
+        self._sizes = array("B")
+        bigrams: dict[tuple[str, int], list[int]] = {}
+        for term_id, term in enumerate(terms):
+            term_bigrams = _bigrams(term)
+            self._sizes.append(min(len(term_bigrams), 255))
+            for bigram in term_bigrams:
+                bigrams.setdefault((bigram, len(term)), []).append(term_id)
+        self._bigrams = {key: array("I", term_ids) for key, term_ids in bigrams.items()}
+
+    def similar(self, word: str) -> list[tuple[int, float]]:
+        """
+        Return (term id, similarity) of the terms within max_edits of the
+        (folded) word, the similarity is 1 - edits / the longer length.
+        """
+        limit = max_edits(word)
+        bigrams = _bigrams(word)
+        needed = max(1, len(bigrams) - 3 * limit)
+        lengths = range(max(1, len(word) - limit), len(word) + limit + 1)
+
+        counts: Counter[int] = Counter()
+        for bigram in bigrams:
+            for length in lengths:
+                counts.update(self._bigrams.get((bigram, length), ()))
+
+        terms = self.terms
+        similar: list[tuple[int, float]] = []
+        sizes = self._sizes
+        for term_id, count in counts.items():
+            # the edits also keep all but 3k bigrams of the term
+            if count < needed or count < sizes[term_id] - 3 * limit:
+                continue
+            term = terms[term_id]
+            edits = edit_distance(word, term, limit)
+            if edits <= limit:
+                similar.append((term_id, 1 - edits / max(len(word), len(term))))
+        return similar
+
+
+class FuzzyIndex:
+    """
+    Typo and accent tolerant search over the quote words and the title and
+    author words of a QuoteSearchIndex's books. The terms are the folded words
+    of its vocabulary (see fold), so building it reads the vocabulary, not the
+    quotes. A quote (or book) scores the mean over the query words of its most
+    similar term, only the top ones are returned.
+    """
+
+    def __init__(self, index: QuoteSearchIndex) -> None:
+        self.index = index
+
+        # folded term -> the vocabulary words it comes from
+        quote_terms: dict[str, list[int]] = {}
+        for word_id, word in enumerate(index.quote_words.words):
+            for term in WORD_PATTERN.findall(fold(word)):
+                quote_terms.setdefault(term, []).append(word_id)
+        self._quote_words: list[list[int]] = list(quote_terms.values())
+        self._quote_terms = FuzzyMatcher(list(quote_terms))
+
+        # folded title and author term -> book positions
+        book_terms: dict[str, set[int]] = {}
+        for position, book in enumerate(index.books):
+            for term in WORD_PATTERN.findall(fold(f"{book.title} {book.author}")):
+                book_terms.setdefault(term, set()).add(position)
+        self._book_positions: list[set[int]] = list(book_terms.values())
+        self._book_terms = FuzzyMatcher(list(book_terms))
+
+    def find_quotes(self, text: str, scope: set[int] | None = None, top_k: int = 30) -> list[SearchHit]:
+        """
+        Return the top_k quotes (of the scope's books) most similar to the
+        text, best first, with the spans of their similar words.
+        """
+        words = set(WORD_PATTERN.findall(fold(text)))
+        if not words:
+            return []
+
+        quote_words = self.index.quote_words
+        totals: dict[int, float] = {}
+        matched: set[int] = set()
+        for word in words:
+            # the best similarity of every quote for this word
+            best: dict[int, float] = {}
+            for term_id, similarity in self._quote_terms.similar(word):
+                for word_id in self._quote_words[term_id]:
+                    matched.add(word_id)
+                    for quote_id in quote_words.docs_of(word_id):
+                        if best.get(quote_id, 0.0) < similarity:
+                            best[quote_id] = similarity
+            for quote_id, similarity in best.items():
+                totals[quote_id] = totals.get(quote_id, 0.0) + similarity
+
+        if scope is not None:
+            quote_books = self.index.quote_books
+            totals = {quote_id: total for quote_id, total in totals.items() if quote_books[quote_id] in scope}
+
+        # ties in collection order
+        top = heapq.nlargest(top_k, totals.items(), key=lambda item: (item[1], -item[0]))
+
+        # the similar words are highlighted where they stand alone
+        vocabulary = quote_words.words
+        alternatives = "|".join(re.escape(vocabulary[word_id]) for word_id in matched)
+        pattern = re.compile(rf"(?<!\S)(?:{alternatives})(?!\S)", re.IGNORECASE)
+
+        books, quotes, quote_books = self.index.books, self.index.quotes, self.index.quote_books
+        return [
+            SearchHit(books[quote_books[i]], quotes[i], match_spans(quotes[i].text, pattern), total / len(words))
+            for i, total in top
+        ]
+
+    def find_books(self, text: str, scope: set[int] | None = None, top_k: int = 30) -> list[tuple[int, float]]:
+        """
+        Return (position, score) of the top_k books whose title and author are
+        most similar to the text, best first.
+        """
+        words = set(WORD_PATTERN.findall(fold(text)))
+        if not words:
+            return []
+
+        totals: dict[int, float] = {}
+        for word in words:
+            best: dict[int, float] = {}
+            for term_id, similarity in self._book_terms.similar(word):
+                for position in self._book_positions[term_id]:
+                    if best.get(position, 0.0) < similarity:
+                        best[position] = similarity
+            for position, similarity in best.items():
+                if scope is None or position in scope:
+                    totals[position] = totals.get(position, 0.0) + similarity
+
+        top = heapq.nlargest(top_k, totals.items(), key=lambda item: (item[1], -item[0]))
+        return [(position, total / len(words)) for position, total in top]
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def fold(text: str) -> str:
+    """
+    Return the text in lower case without accents (é -> e, ß -> ss).
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def max_edits(word: str) -> int:
+    # typos allowed in a word of this length
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Return the edits (insert, delete, replace, swap two neighbours) turning a
+    into b, limit + 1 once it is sure to be more than limit.
+    """
+    if a == b:
+        return 0
+    previous: list[int] | None = None
+    row = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = char_a != char_b
+            current[j] = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + cost)
+            if previous is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous, row = row, current
+    return min(row[-1], limit + 1)
+
+def _bigrams(word: str) -> set[str]:
+    padded = f" {word} "
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+# one index per search index, rebuilt with it
+_indexes: "weakref.WeakKeyDictionary[BookCollection, FuzzyIndex]" = weakref.WeakKeyDictionary()
+
+def fuzzy_index(collection: BookCollection) -> FuzzyIndex:
+    """
+    Return the fuzzy index of the collection's books (built on first use).
+    """
+    index = _indexes.get(collection)
+    quotes = search_index(collection)
+    if index is None or index.index is not quotes:
+        index = _indexes[collection] = FuzzyIndex(quotes)
+    return index
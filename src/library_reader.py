@@ -0,0 +1,391 @@
+#=================================================
+# IMPORT
+#=================================================
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import zipfile
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, TextIO
+
+#=================================================
+# CONSTANTS
+#=================================================
+# sections of library.json that are walked element by element
+LIBRARY_SECTIONS = ("colls", "docs")
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+LIBRARY_FILE_NAME = "library.json"
+BACKUP_EXTENSION = ".bak"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# an object that is an array element ("[{" or ",{"), used to resync a shard
+_ELEMENT_START = re.compile(rb"[\[,][ \t\n\r]*\{")
+_BYTES_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+
+#=================================================
+# CLASSES
+#=================================================
+class _StreamBuffer:
+    """
+    Sliding text window over a file object, refilled on demand.
+    Only the not yet consumed part of the file is kept in memory.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.start = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, min_size: int = 0) -> bool:
+        """
+        Read at least one chunk (or min_size characters) from the file.
+        Returns False if the end of the file was already reached.
+        """
+        if self.eof:
+            return False
+
+        # drop the consumed part of the window before growing it
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        chunk = self.file.read(max(self.chunk_size, min_size))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buf += chunk
+        return True
+
+    def skip_ws(self) -> None:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise self.error("Unexpected end of file")
+        return self.buf[self.pos]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char not in chars:
+            raise self.error(f"Expecting one of {chars!r}")
+        self.pos += 1
+        return char
+
+    def decode_value(self) -> Any:
+        """
+        Decode the next complete JSON value, reading more data as needed.
+        The value starts at self.start and ends at self.pos afterwards.
+        """
+        self.skip_ws()
+        while True:
+            self.start = self.pos
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # most likely an incomplete value, read more and try again
+                # (the window doubles, so big values are not re-parsed often)
+                if self.fill(len(self.buf) - self.pos):
+                    continue
+                raise
+
+            # a number at the end of the window may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+class _ShardWindow:
+    """
+    Decoded text window over a memory-mapped file that keeps the byte and
+    character position of the cursor in sync (separators are ASCII, the
+    byte length of decoded values is measured on their raw text).
+    """
+
+    def __init__(self, data: mmap.mmap, offset: int, size: int) -> None:
+        self.data = data
+        self.size = size
+        self.decoder = json.JSONDecoder()
+        self._load(offset, size)
+
+    def _load(self, offset: int, size: int) -> None:
+        # the offset is always on a character boundary, a character
+        # cut at the end of the window is dropped and read again later
+        self.byte_pos = offset
+        self.char_pos = 0
+        self.loaded_end = min(len(self.data), offset + size)
+        self.text = self.data[offset:self.loaded_end].decode("utf8", errors="ignore")
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character ("" at the end of the file).
+        """
+        while True:
+            pos = _WHITESPACE.match(self.text, self.char_pos).end()
+            self.byte_pos += pos - self.char_pos
+            self.char_pos = pos
+            if pos < len(self.text):
+                return self.text[pos]
+            if self.loaded_end >= len(self.data):
+                return ""
+            self._load(self.byte_pos, self.size)
+
+    def advance(self) -> None:
+        # only used for ASCII separators
+        self.char_pos += 1
+        self.byte_pos += 1
+
+    def decode(self, resync: bool) -> tuple[Any, str] | None:
+        """
+        Decode the value at the cursor, returns (value, raw text) or None
+        if it is not valid JSON.
+        """
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.char_pos)
+            except json.JSONDecodeError as error:
+                # a resync candidate may point into a quote text, don't read the
+                # whole file just to find out, an error far from the end is final
+                if (self.loaded_end >= len(self.data) or
+                    (resync and not _is_truncation_error(error, self.text))):
+                    return None
+                # read the value again with a window that is at least twice as big
+                self._load(self.byte_pos, max(self.size, 2 * (self.loaded_end - self.byte_pos)))
+                continue
+
+            raw = self.text[self.char_pos:end]
+            self.char_pos = end
+            self.byte_pos += len(raw.encode("utf8"))
+            return value, raw
+
+
+class LibraryShardReader:
+    """
+    Iterate the colls/docs elements that start within the byte range
+    [start, end) of an uncompressed library.json, for parallel loading.
+    Elements are found by resyncing on "[{" / ",{" and checking the keys of the
+    decoded object, then read one after the other while inside an array.
+    After iteration, first_start is the offset of the first element read and
+    next_start the offset of the first element after the range (None at EOF),
+    so adjacent shards can be checked to meet exactly.
+    """
+
+    def __init__(self, path: str, start: int, end: int, window: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+        self.window = window
+        self.first_start: int | None = None
+        self.next_start: int | None = None
+
+    def __iter__(self) -> Iterator[tuple[str, dict, str, int]]:
+        with open(self.path, "rb") as file, \
+             mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from self._iter_elements(data)
+
+    def _iter_elements(self, data: mmap.mmap) -> Iterator[tuple[str, dict, str, int]]:
+        # the range may start between a separator and its element
+        pos = self.start
+        while pos > 0 and data[pos - 1:pos] in b" \t\n\r":
+            pos -= 1
+        if pos > 0 and data[pos - 1:pos] in b"[,":
+            pos -= 1
+
+        while True:
+            # resync: find the next array element that is a coll or a doc
+            match = _ELEMENT_START.search(data, pos)
+            if match is None:
+                return
+            offset = match.end() - 1
+            window = _ShardWindow(data, offset, self.window)
+            decoded = window.decode(resync=True)
+            section = library_element_section(decoded[0]) if decoded else None
+            if section is None:
+                pos = offset + 1
+                continue
+
+            # read the rest of this array element by element
+            while True:
+                if offset >= self.end:
+                    self.next_start = offset
+                    return
+                if self.first_start is None:
+                    self.first_start = offset
+
+                item, raw = decoded
+                yield section, item, raw, offset
+
+                # "]" or anything unexpected ends the array, resync from there
+                pos = window.byte_pos
+                if window.peek() != ",":
+                    break
+                window.advance()
+                window.peek()
+                offset = window.byte_pos
+                decoded = window.decode(resync=False)
+                section = library_element_section(decoded[0]) if decoded else None
+                if section is None:
+                    break
+
+#=================================================
+# FUNCTIONS: library source
+#=================================================
+def resolve_library_source(path: str) -> str:
+    """
+    Return the file to load for the given source path.
+    A directory resolves to its newest ReadEra backup (.bak),
+    or to the library.json inside it if there is no backup.
+    Raises FileNotFoundError if nothing can be loaded.
+    """
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Library source not found: {path}")
+        return path
+
+    backups = [
+        entry.path for entry in os.scandir(path)
+        if entry.is_file() and entry.name.lower().endswith(BACKUP_EXTENSION)
+    ]
+    if backups:
+        return max(backups, key=os.path.getmtime)
+
+    library_path = os.path.join(path, LIBRARY_FILE_NAME)
+    if not os.path.exists(library_path):
+        raise FileNotFoundError(f"No {BACKUP_EXTENSION} file or {LIBRARY_FILE_NAME} in: {path}")
+    return library_path
+
+
+@contextmanager
+def open_library(source_path: str) -> Iterator[TextIO]:
+    """
+    Open a resolved library source for reading as text.
+    ReadEra backups are zip archives, library.json is streamed straight
+    out of the archive member without extracting it to disk.
+    Raises FileNotFoundError if the archive has no library.json.
+    """
+    if not zipfile.is_zipfile(source_path):
+        with open(source_path, "r", encoding="utf8") as file:
+            yield file
+        return
+
+    with zipfile.ZipFile(source_path) as archive:
+        member = next(
+            (name for name in archive.namelist()
+             if os.path.basename(name) == LIBRARY_FILE_NAME),
+            None
+        )
+        if member is None:
+            raise FileNotFoundError(f"No {LIBRARY_FILE_NAME} in backup: {source_path}")
+
+        with archive.open(member) as raw_file:
+            yield io.TextIOWrapper(raw_file, encoding="utf8")
+
+#=================================================
+# FUNCTIONS: streaming
+#=================================================
+def iter_library(
+    file: TextIO,
+    sections: tuple[str, ...] = LIBRARY_SECTIONS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[str, dict]]:
+    """
+    Walk a ReadEra library.json incrementally.
+    Yields (section, element) pairs for every element of the requested
+    top-level arrays, in file order, so only one element is decoded at a time.
+    Other top-level values are decoded and discarded.
+    Raises json.JSONDecodeError on malformed input.
+    """
+    for section, item, _raw in _iter_elements(file, sections, chunk_size, keep_raw=False):
+        yield section, item
+
+
+def iter_library_raw(
+    file: TextIO,
+    sections: tuple[str, ...] = LIBRARY_SECTIONS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[str, dict, str]]:
+    """
+    Same as iter_library, but also yields the JSON text of each element.
+    """
+    yield from _iter_elements(file, sections, chunk_size, keep_raw=True)
+
+
+def library_element_section(item: Any) -> str | None:
+    """
+    Return the section ("colls" or "docs") an element belongs to, or None.
+    """
+    if not isinstance(item, dict) or not isinstance(item.get("data"), dict):
+        return None
+    if "uri" in item:
+        return "docs"
+    if "coll_title" in item["data"] and "docs" in item:
+        return "colls"
+    return None
+
+
+def _is_truncation_error(error: json.JSONDecodeError, text: str) -> bool:
+    # a value cut by the window fails at its end, or inside an open string
+    return error.pos >= len(text) - 6 or error.msg.startswith("Unterminated string")
+
+
+def raw_fingerprint(raw: str) -> bytes:
+    """
+    Return a content hash for the JSON text of an element.
+    """
+    return hashlib.blake2b(raw.encode("utf8"), digest_size=16).digest()
+
+
+def _iter_elements(
+    file: TextIO,
+    sections: tuple[str, ...],
+    chunk_size: int,
+    keep_raw: bool
+) -> Iterator[tuple[str, dict, str]]:
+    stream = _StreamBuffer(file, chunk_size)
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+
+    while True:
+        key = stream.decode_value()
+        if not isinstance(key, str):
+            raise stream.error("Expecting property name")
+        stream.expect(":")
+
+        if key in sections and stream.peek() == "[":
+            stream.pos += 1
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    item = stream.decode_value()
+                    raw = stream.buf[stream.start:stream.pos] if keep_raw else ""
+                    yield key, item, raw
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            stream.decode_value()
+
+        if stream.expect(",}") == "}":
+            return
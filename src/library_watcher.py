@@ -0,0 +1,115 @@
+#=================================================
+# IMPORT
+#=================================================
+import os
+import threading
+import time
+
+from book_collection import BookCollection
+from constants_loader import constants
+from library_reader import resolve_library_source
+from quote_search import search_index
+
+#=================================================
+# CLASSES
+#=================================================
+class LibraryWatcher:
+    """
+    Detects changes of the library source by polling os.stat and reloads the
+    collection on a worker thread (see BookCollection.load_changes).
+    Toolkit independent: the GUI calls poll() from its own timer, poll() never
+    blocks and hands over the reloaded collection once it is ready, so it is
+    adopted on the UI thread.
+    A change is only acted on after the source stopped changing for the
+    debounce period, so a backup that is still being written is not read.
+    A failed reload is tried again after the next debounce period, its error
+    is handed over once per state of the source.
+    """
+
+    def __init__(self, collection: BookCollection, debounce_ms: int) -> None:
+        self.collection = collection
+        self.debounce: float = debounce_ms / 1000
+
+        # (path, size, mtime) of every source the collection was built from
+        self._signature: tuple | None = self._current_signature()
+        self._pending: tuple | None = None
+        self._pending_since: float = 0.0
+
+        self._worker: threading.Thread | None = None
+        self._result: tuple[BookCollection, Exception | None] | None = None
+        # the signature being reloaded and the last one whose reload failed
+        self._loading: tuple | None = None
+        self._failed: tuple | None = None
+
+    def poll(self) -> tuple[BookCollection, Exception | None] | None:
+        """
+        Check the source, returns (reloaded collection, error) when a reload
+        has finished, otherwise None.
+        """
+        # a reload is running, its result is picked up by a later poll
+        if self._worker is not None:
+            if self._worker.is_alive():
+                return None
+            self._worker = None
+            result, self._result = self._result, None
+            signature, self._loading = self._loading, None
+            if result[1] is None:
+                self._signature = signature
+                self._failed = None
+                return result
+            # the signature is kept, so the change is retried
+            if signature == self._failed:
+                return None
+            self._failed = signature
+            return result
+
+        signature = self._current_signature()
+        if signature == self._signature:
+            self._pending = None
+            return None
+
+        # changed (again), wait until it stays the same for a while
+        now = time.monotonic()
+        if signature != self._pending:
+            self._pending = signature
+            self._pending_since = now
+            return None
+        if now - self._pending_since < self.debounce:
+            return None
+
+        self._pending = None
+
+        # a removed source keeps the current collection
+        if signature is None:
+            self._signature = signature
+            return None
+
+        self._loading = signature
+        self._worker = threading.Thread(target=self._reload, daemon=True)
+        self._worker.start()
+        return None
+
+    def _reload(self) -> None:
+        # any error ends up in the result, the worker must not die silently
+        try:
+            collection, error = self.collection.load_changes()
+            # indexed here, so the first search after the refresh does not block the UI
+            if error is None and constants.SEARCH_INDEX_AT_LOAD:
+                search_index(collection)
+            self._result = collection, error
+        except Exception as error:
+            self._result = self.collection, error
+
+    def _current_signature(self) -> tuple | None:
+        # a folder source resolves to its newest backup, so a new backup is a change
+        source = self.collection.source
+        sources = source if isinstance(source, list) else [source]
+        signature = []
+        try:
+            for source in sources:
+                path = resolve_library_source(source)
+                stat = os.stat(path)
+                signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            return None
+        return tuple(signature)
@@ -0,0 +1,161 @@
+#=================================================
+# IMPORT
+#=================================================
+import json
+import os
+import time
+
+from collections import Counter
+from constants_loader import constants
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+#=================================================
+# CONSTANTS
+#=================================================
+# set to 1 to print the report, or to "json" for a machine readable one
+PROFILE_ENV_VAR = "READERA_LOAD_PROFILE"
+
+#=================================================
+# CLASSES
+#=================================================
+@dataclass
+class LoadReport:
+    """
+    Phase timings and counters of one collection build.
+    Per-doc phases are summed over all docs (and over all worker processes
+    in a parallel load), so they can exceed the wall clock total.
+    """
+
+    source_path: str = ""
+    # json / streaming / parallel / snapshot / reload / merged
+    mode: str = ""
+    total_seconds: float = 0.0
+
+    # phase name -> seconds, in the order the phases first ran
+    phases: dict[str, float] = field(default_factory=dict)
+    counters: Counter = field(default_factory=Counter)
+    # field name -> docs where it could not be parsed
+    parse_failures: Counter = field(default_factory=Counter)
+
+    # one report per source of a merged collection
+    parts: list["LoadReport"] = field(default_factory=list)
+
+    #=================================================
+    # recording
+    #=================================================
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def clock(self) -> float:
+        return time.perf_counter()
+
+    def lap(self, name: str, start: float) -> float:
+        # add the time since start to the phase, returns the new start
+        now = time.perf_counter()
+        self.add_time(name, now - start)
+        return now
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def fail(self, field_name: str) -> None:
+        self.parse_failures[field_name] += 1
+
+    def merge(self, other: "LoadReport") -> None:
+        for name, seconds in other.phases.items():
+            self.add_time(name, seconds)
+        self.counters.update(other.counters)
+        self.parse_failures.update(other.parse_failures)
+
+    #=================================================
+    # output
+    #=================================================
+    def as_dict(self) -> dict:
+        # (dataclasses.asdict would rebuild the Counters from their item pairs)
+        return {
+            "source_path": self.source_path,
+            "mode": self.mode,
+            "total_seconds": self.total_seconds,
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+            "parse_failures": dict(self.parse_failures),
+            "parts": [part.as_dict() for part in self.parts],
+        }
+
+    def format(self, indent: str = "") -> str:
+        lines = [f"{indent}Load report: {self.source_path} ({self.mode})"]
+        lines.append(f"{indent}  {'total':<28}{self.total_seconds:8.3f} s")
+
+        if self.phases:
+            lines.append(f"{indent}  phases:")
+            for name, seconds in self.phases.items():
+                share = 100 * seconds / self.total_seconds if self.total_seconds else 0.0
+                lines.append(f"{indent}    {name:<26}{seconds:8.3f} s {share:6.1f} %")
+
+        for title, counter in (("counters", self.counters), ("parse failures", self.parse_failures)):
+            if counter:
+                lines.append(f"{indent}  {title}:")
+                for name, value in counter.items():
+                    lines.append(f"{indent}    {name:<26}{value:8d}")
+
+        for part in self.parts:
+            lines.append(part.format(indent + "    "))
+
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.format()
+
+
+class _NullLoadReport(LoadReport):
+    # used while profiling is off, so the instrumented code needs no checks
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        yield
+
+    def clock(self) -> float:
+        return 0.0
+
+    def lap(self, name: str, start: float) -> float:
+        return 0.0
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def fail(self, field_name: str) -> None:
+        pass
+
+
+NULL_LOAD_REPORT: LoadReport = _NullLoadReport()
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def profiling_enabled() -> bool:
+    return constants.LOAD_PROFILE or os.environ.get(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes", "json")
+
+
+def print_load_report(report: LoadReport | None) -> None:
+    """
+    Print the report of the last build (nothing if profiling was off).
+    """
+    if report is None:
+        return
+    if os.environ.get(PROFILE_ENV_VAR, "").lower() == "json":
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report.format())
@@ -3,17 +3,32 @@
 #=================================================
 import book_utils
 import os
+import queue
+import quote_rng
+import threading
 import tkinter as tk
 import unicodedata
 import webbrowser
 
 from book_collection import BookCollection, Book
+from book_filter import book_index, facet_label
 from book_statistics import Statistics, StatisticsReporter
 from book_utils import SearchMatches
 from constants_loader import constants
+from library_watcher import LibraryWatcher
+from load_report import print_load_report
+from picker_model import PickerModel
 from quote_manager import QuoteManager, QuoteManagerUI
+from quote_search import search_index
+from search_query import QueryError
 from tkinter import ttk, messagebox, font
 
+#=================================================
+# CONSTANTS
+#=================================================
+# keys that move in (or close) a dropdown, they leave the type-ahead text alone
+NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Home", "End", "Return", "KP_Enter", "Escape", "Tab"}
+
 #=================================================
 # FILTER PANEL
 #=================================================
@@ -29,6 +44,10 @@ class FilterPanel(ttk.Frame):
     folders_dropdown: ttk.Combobox
     authors_dropdown: ttk.Combobox
     books_dropdown: ttk.Combobox
+    # the entries of every dropdown (value, shown text, selection, type-ahead),
+    # its list is only filled when it opens (rows as filled)
+    pickers: dict[ttk.Combobox, PickerModel]
+    posted_rows: dict[ttk.Combobox, list[int]]
 
     search_hint: str
     search_var: tk.StringVar
@@ -38,7 +57,7 @@ class FilterPanel(ttk.Frame):
         super().__init__(parent)
 
         # search helper variable
-        self.search_hint = "Type at least 3 letters to search..."
+        self.search_hint = "Type at least 3 letters to search (~ for fuzzy)..."
         self.search_var = tk.StringVar(value=self.search_hint)
 
         # folder/author/book filters (widgets belong to this Frame and are arranged in _build_layout)
@@ -50,6 +69,14 @@ class FilterPanel(ttk.Frame):
         self.folders_dropdown = ttk.Combobox(self)
         self.authors_dropdown = ttk.Combobox(self)
         self.books_dropdown = ttk.Combobox(self)
+        self.pickers = {}
+        self.posted_rows = {}
+        for combobox in (self.folders_dropdown, self.authors_dropdown, self.books_dropdown):
+            self.pickers[combobox] = PickerModel()
+            self.posted_rows[combobox] = []
+            combobox.configure(postcommand=lambda cb=combobox: self._fill_list(cb))
+            combobox.bind("<KeyRelease>", lambda event, cb=combobox: self._on_type_ahead(event, cb))
+            combobox.bind("<FocusOut>", lambda event, cb=combobox: self._show_selected(cb))
         self.search_entry = ttk.Entry(self, textvariable=self.search_var)
         self.search_entry.bind("<FocusIn>", self.clear_search_hint)
 
@@ -70,14 +97,19 @@ class FilterPanel(ttk.Frame):
         # allow dropdown widgets (in column 1) to stretch when space is available
         self.columnconfigure(1, weight=1)
 
-    def set_folders_list(self, folders: list[str]) -> None:
-        self.folders_dropdown["values"] = folders
+    def set_folders_list(self, folders: list[str], labels: list[str] | None = None) -> None:
+        self._set_values(self.folders_dropdown, folders, labels)
 
-    def set_authors_list(self, authors: list[str]) -> None:
-        self.authors_dropdown["values"] = authors
+    def set_authors_list(self, authors: list[str], labels: list[str] | None = None) -> None:
+        self._set_values(self.authors_dropdown, authors, labels)
 
     def set_books_list(self, books: list[str]) -> None:
-        self.books_dropdown["values"] = books
+        self._set_values(self.books_dropdown, books)
+
+    def _set_values(self, combobox: ttk.Combobox, values: list[str], labels: list[str] | None = None) -> None:
+        # the dropdown shows the labels (default: the values themselves),
+        # a long list is not handed to Tk before it is opened
+        self.pickers[combobox].set_items(values, labels)
 
     def select_first_all(self) -> None:
         self.select_first_folder()
@@ -93,10 +125,76 @@ class FilterPanel(ttk.Frame):
     def select_first_book(self) -> None:
         self._select_first_value(self.books_dropdown)
 
-    @staticmethod
-    def _select_first_value(combobox: ttk.Combobox) -> None:
-        if combobox["values"]:
-            combobox.current(0)
+    def _select_first_value(self, combobox: ttk.Combobox) -> None:
+        picker = self.pickers[combobox]
+        if len(picker):
+            picker.select_first()
+            self._show_selected(combobox)
+
+    def select_folder(self, folder: str) -> bool:
+        return self._select_value(self.folders_dropdown, folder)
+
+    def select_author(self, author: str) -> bool:
+        return self._select_value(self.authors_dropdown, author)
+
+    def select_book(self, book: str) -> bool:
+        return self._select_value(self.books_dropdown, book)
+
+    def _select_value(self, combobox: ttk.Combobox, value: str) -> bool:
+        if not self.pickers[combobox].select(value):
+            return False
+        self._show_selected(combobox)
+        return True
+
+    def _show_selected(self, combobox: ttk.Combobox) -> None:
+        # the text of the selected entry replaces a typed one
+        picker = self.pickers[combobox]
+        picker.set_filter("")
+        combobox.set(picker.label_of(picker.selected) if picker.selected else "")
+
+    #=================================================
+    # lazy lists and type-ahead
+    #=================================================
+    def _fill_list(self, combobox: ttk.Combobox) -> None:
+        # runs when the list opens: the entries matching the typed text
+        picker = self.pickers[combobox]
+        self.posted_rows[combobox] = list(picker.rows)
+        combobox["values"] = picker.shown_labels()
+
+    def _on_type_ahead(self, event, combobox: ttk.Combobox) -> None:
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        self.pickers[combobox].set_filter(combobox.get())
+
+    def _choose_row(self, combobox: ttk.Combobox, row: int) -> None:
+        picker = self.pickers[combobox]
+        picker.select(picker.values[row])
+        self._show_selected(combobox)
+
+    def _on_selected(self, combobox: ttk.Combobox, source: str, callback) -> None:
+        # the index is one of the rows the list was filled with
+        i = combobox.current()
+        rows = self.posted_rows[combobox]
+        if 0 <= i < len(rows):
+            self._choose_row(combobox, rows[i])
+        callback(source)
+
+    def _on_return(self, combobox: ttk.Combobox, source: str, callback) -> None:
+        # Enter takes the best match of the typed text
+        picker = self.pickers[combobox]
+        if not picker.text or not picker.rows:
+            return
+        self._choose_row(combobox, picker.rows[0])
+        callback(source)
+
+    def set_enabled(self, enabled: bool) -> None:
+        for widget in (
+            self.folders_dropdown,
+            self.authors_dropdown,
+            self.books_dropdown,
+            self.search_entry,
+        ):
+            widget.state(["!disabled"] if enabled else ["disabled"])
 
     def set_dropdowns_font(self, dropdown_font: font.Font) -> None:
         for dropdown in (
@@ -107,9 +205,13 @@ class FilterPanel(ttk.Frame):
             dropdown.configure(font=dropdown_font)
 
     def set_on_change_callback(self, callback) -> None:
-        self.folders_dropdown.bind("<<ComboboxSelected>>", lambda e: callback("folder"))
-        self.authors_dropdown.bind("<<ComboboxSelected>>", lambda e: callback("author"))
-        self.books_dropdown.bind("<<ComboboxSelected>>", lambda e: callback("book"))
+        for combobox, source in (
+            (self.folders_dropdown, "folder"),
+            (self.authors_dropdown, "author"),
+            (self.books_dropdown, "book"),
+        ):
+            combobox.bind("<<ComboboxSelected>>", lambda e, cb=combobox, src=source: self._on_selected(cb, src, callback))
+            combobox.bind("<Return>", lambda e, cb=combobox, src=source: self._on_return(cb, src, callback))
 
     def set_search_callback(self, callback) -> None:
         # use lambda to adapt Tkinter's event callback to a query-string callback
@@ -124,15 +226,15 @@ class FilterPanel(ttk.Frame):
 
     @property
     def selected_folder(self) -> str:
-        return self.folders_dropdown.get()
+        return self.pickers[self.folders_dropdown].selected
 
     @property
     def selected_author(self) -> str:
-        return self.authors_dropdown.get()
+        return self.pickers[self.authors_dropdown].selected
 
     @property
     def selected_book(self) -> str:
-        return self.books_dropdown.get()
+        return self.pickers[self.books_dropdown].selected
 
 #=================================================
 # MAIN WINDOW
@@ -144,9 +246,13 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     #=================================================
     collection: BookCollection
     quote_manager: QuoteManager
+    watcher: LibraryWatcher | None
+    # progressive startup: messages from the loader thread (see _start_loader)
+    load_queue: queue.Queue | None
+    _loaded_authors: set[str]
+    _loaded_quotes: int
 
     filtered_books: list[str]
-    authors_with_quotes: list[str]
 
     #===================
     # UI elements
@@ -163,6 +269,7 @@ class MainWindow(tk.Tk, QuoteManagerUI):
 
     every_q_btn: ttk.Button
     random_q_btn: ttk.Button
+    review_btn: ttk.Button
     delay_source_btn: ttk.Checkbutton
     delay_source_toggle: tk.BooleanVar
     clear_btn: ttk.Button
@@ -171,18 +278,20 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     #=================================================
     # initialization
     #=================================================
-    def __init__(self, collection: BookCollection):
+    def __init__(self, collection: BookCollection | None = None):
         super().__init__()
 
         #=================================================
         # instance attributes
         #=================================================
-        self.collection = collection
+        # without a collection, it is built on a worker thread once the window is up
+        self.collection = collection if collection is not None else BookCollection()
         self.stats = Statistics.from_collection(self.collection)
 
         self.quote_manager = QuoteManager(self)
+        self.watcher = None
+        self.load_queue = None
         self.filtered_books = []
-        self.authors_with_quotes = []
         self.quotes_remaining_var = tk.StringVar(value=f"{self.stats.total_quotes_count}")
 
         #=================================================
@@ -204,7 +313,13 @@ class MainWindow(tk.Tk, QuoteManagerUI):
         self._build_header_frame()
         self._build_text_frame()
         self._build_buttons_frame()
-        self._init_signals()
+
+        if collection is None:
+            self._start_loader()
+        else:
+            self._init_signals()
+            self._init_watcher()
+            self.quote_manager.open_history(self.collection)
 
     #=================================================
     # main window
@@ -274,12 +389,8 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     # data preparation
     #=================================================
     def _init_data(self) -> None:
-        authors_set = set()
-        for book in self.collection.books:
-            if book.total_quotes > 0:
-                self.filtered_books.append(book.title)
-                authors_set.add(book.author)
-        self.authors_with_quotes = sorted(authors_set)
+        index = book_index(self.collection)
+        self.filtered_books = index.titles_of(index.with_quotes)
 
     #=================================================
     # ComboBox filters (dropdowns)
@@ -288,21 +399,25 @@ class MainWindow(tk.Tk, QuoteManagerUI):
         self.filters.set_dropdowns_font(self.default_font)
 
         # sort folders ignoring case and diacritical marks (accents).
-        self.filters.set_folders_list(
-            [constants.ANY_FOLDER] +
-            sorted(
-                self.collection.folders.keys(),
-                key=lambda s: ''.join(
-                    c for c in unicodedata.normalize('NFD', s)
-                    if unicodedata.category(c) != 'Mn'
-                ).lower()
-            )
+        folders = [constants.ANY_FOLDER] + sorted(
+            self.collection.folders.keys(),
+            key=lambda s: ''.join(
+                c for c in unicodedata.normalize('NFD', s)
+                if unicodedata.category(c) != 'Mn'
+            ).lower()
         )
 
-        self.filters.set_authors_list(
-            [constants.ANY_AUTHOR] + self.authors_with_quotes
+        # every folder with its number of books with quotes
+        index = book_index(self.collection)
+        counts = index.folder_counts(index.with_quotes)
+        counts[constants.ANY_FOLDER] = index.count(index.with_quotes)
+        self.filters.set_folders_list(
+            folders,
+            [facet_label(folder, counts.get(folder, 0)) for folder in folders]
         )
 
+        self._set_authors_for_folder(constants.ANY_FOLDER)
+
         self.filters.set_books_list(
             [constants.ANY_BOOK] + self.filtered_books
         )
@@ -329,6 +444,12 @@ class MainWindow(tk.Tk, QuoteManagerUI):
             style="Big.TButton"
         )
 
+        self.review_btn = ttk.Button(
+            self.buttons_frame,
+            text="Review",
+            style="Big.TButton"
+        )
+
         # this will be a special Tkinter variable
         self.delay_source_toggle = tk.BooleanVar(value=False)
         self.delay_source_btn = tk.Checkbutton(
@@ -442,17 +563,19 @@ class MainWindow(tk.Tk, QuoteManagerUI):
         # left buttons
         self.every_q_btn.grid(row=0, column=0, padx=(25, 0), sticky="ew")
         self.random_q_btn.grid(row=0, column=1, padx=(15, 0), sticky="ew")
-        self.delay_source_btn.grid(row=0, column=2, padx=(15, 0))
+        self.review_btn.grid(row=0, column=2, padx=(15, 0), sticky="ew")
+        self.delay_source_btn.grid(row=0, column=3, padx=(15, 0))
         # right buttons
-        self.clear_btn.grid(row=0, column=4, padx=(15, 0), sticky="ew")
-        self.reset_btn.grid(row=0, column=5, padx=(15, 25), sticky="ew")
+        self.clear_btn.grid(row=0, column=5, padx=(15, 0), sticky="ew")
+        self.reset_btn.grid(row=0, column=6, padx=(15, 25), sticky="ew")
 
         self.buttons_frame.columnconfigure(0, weight=1)  # every quote
         self.buttons_frame.columnconfigure(1, weight=1)  # random quote
-        self.buttons_frame.columnconfigure(2, weight=0)  # toggle
-        self.buttons_frame.columnconfigure(3, weight=10) # spacer
-        self.buttons_frame.columnconfigure(4, weight=1)  # clear
-        self.buttons_frame.columnconfigure(5, weight=1)  # reset
+        self.buttons_frame.columnconfigure(2, weight=1)  # review
+        self.buttons_frame.columnconfigure(3, weight=0)  # toggle
+        self.buttons_frame.columnconfigure(4, weight=10) # spacer
+        self.buttons_frame.columnconfigure(5, weight=1)  # clear
+        self.buttons_frame.columnconfigure(6, weight=1)  # reset
 
     #=================================================
     # signals (event bindings)
@@ -467,10 +590,159 @@ class MainWindow(tk.Tk, QuoteManagerUI):
 
         self.every_q_btn.configure(command=self.quote_manager.print_every_quote)
         self.random_q_btn.configure(command=self.quote_manager.print_random_quote)
+        self.review_btn.configure(command=self.quote_manager.print_review_quote)
         self.delay_source_btn.configure(command=self.quote_manager.on_delay_source_toggle)
         self.clear_btn.configure(command=self.clear_text_output)
         self.reset_btn.configure(command=self.reset)
 
+        # review feedback (see quote_manager.REVIEW_KEYS_HINT)
+        self.bind("<Control-Right>", lambda e: self._on_review_key(e, "seen"))
+        self.bind("<Control-Left>", lambda e: self._on_review_key(e, "again"))
+
+    def _on_review_key(self, event, grade: str) -> None:
+        # the keys keep their meaning in the search field and the dropdowns
+        if isinstance(event.widget, ttk.Entry):
+            return
+        self.quote_manager.grade_review(grade)
+
+    #=================================================
+    # progressive startup (collection built on a worker thread)
+    #=================================================
+    def _start_loader(self) -> None:
+        # the loader thread never touches Tk, it only feeds the queue
+        self.load_queue = queue.Queue()
+        self._loaded_authors = set()
+        self._loaded_quotes = 0
+
+        self._set_controls_enabled(False)
+        self.log("Loading the collection...")
+
+        # daemon thread, closing the window does not wait for the build
+        threading.Thread(target=self._load_in_background, daemon=True).start()
+        self.schedule(constants.LOAD_PROGRESS_POLL_MS, self._poll_loader)
+
+    def _load_in_background(self) -> None:
+        # _poll_loader waits for "done" or "failed", an exception must not end the thread silently
+        try:
+            collection = BookCollection()
+            error = collection.build_the_collection(
+                on_progress=lambda books: self.load_queue.put(("books", books))
+            )
+            stats = Statistics.from_collection(collection)
+            if constants.SEARCH_INDEX_AT_LOAD:
+                search_index(collection)
+        except Exception as error:
+            self.load_queue.put(("failed", error))
+            return
+        self.load_queue.put(("done", (collection, stats, error)))
+
+    def _poll_loader(self) -> None:
+        # take everything that arrived since the last poll, the widgets are updated once
+        parsed_books: list[Book] = []
+        while True:
+            try:
+                kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "done":
+                self._on_collection_loaded(*payload)
+                return
+            if kind == "failed":
+                self._on_collection_failed(payload)
+                return
+            parsed_books.extend(payload)
+
+        if parsed_books:
+            self._on_books_parsed(parsed_books)
+        self.schedule(constants.LOAD_PROGRESS_POLL_MS, self._poll_loader)
+
+    def _on_books_parsed(self, books: list[Book]) -> None:
+        # books arrive unsorted and without folders, the folder list waits for the end
+        for book in books:
+            if book.total_quotes > 0:
+                self.filtered_books.append(book.title)
+                self._loaded_authors.add(book.author)
+                self._loaded_quotes += book.total_quotes
+
+        self.filters.set_authors_list([constants.ANY_AUTHOR] + sorted(self._loaded_authors))
+        self.filters.set_books_list([constants.ANY_BOOK] + sorted(self.filtered_books))
+        self.filters.select_first_all()
+        self.set_quotes_counter(self._loaded_quotes)
+
+        self._clear_text()
+        self.log(
+            f"Loading the collection... {self._loaded_quotes}"
+            f" quotes from {len(self.filtered_books)} books so far."
+        )
+
+    def _on_collection_loaded(self, collection: BookCollection, stats: Statistics, error: Exception | None) -> None:
+        print_load_report(collection.load_report)
+
+        self.collection = collection
+        self.stats = stats
+        self._init_data()
+        self._init_filters()
+        self._init_signals()
+        self._init_watcher()
+        self.quote_manager.open_history(self.collection)
+
+        self.load_queue = None
+        self._set_controls_enabled(True)
+        self._clear_text()
+        self.update_quotes_counter()
+        self.log_collection_summary(error)
+
+    def _on_collection_failed(self, error: Exception) -> None:
+        # an empty collection keeps the window usable, Reset loads it again
+        messagebox.showerror("Loading failed", f"The collection could not be loaded:\n{error}", parent=self)
+        collection = BookCollection()
+        self._on_collection_loaded(collection, Statistics.from_collection(collection), error)
+
+    def _set_controls_enabled(self, enabled: bool) -> None:
+        self.filters.set_enabled(enabled)
+        for button in (self.every_q_btn, self.random_q_btn, self.review_btn, self.clear_btn, self.reset_btn):
+            button.state(["!disabled"] if enabled else ["disabled"])
+        self.delay_source_btn.configure(state="normal" if enabled else "disabled")
+
+    #=================================================
+    # auto-refresh (library source changed)
+    #=================================================
+    def _init_watcher(self) -> None:
+        if not constants.AUTO_REFRESH:
+            return
+        self.watcher = LibraryWatcher(self.collection, constants.AUTO_REFRESH_DEBOUNCE_MS)
+        self.schedule(constants.AUTO_REFRESH_POLL_MS, self._poll_library)
+
+    def _poll_library(self) -> None:
+        # the reload runs on a worker thread, this only picks up its result
+        result = self.watcher.poll()
+        if result is not None:
+            collection, error = result
+            if error:
+                self.log(f"Error reloading JSON file: {error}\n")
+            else:
+                self.refresh_collection(collection)
+        self.schedule(constants.AUTO_REFRESH_POLL_MS, self._poll_library)
+
+    def refresh_collection(self, collection: BookCollection) -> None:
+        # keep the current selection where it still exists
+        folder = self.filters.selected_folder
+        author = self.filters.selected_author
+        book = self.filters.selected_book
+
+        self.collection.adopt(collection)
+        self.quote_manager.restore_selection(self.collection.books)
+        self.stats = Statistics.from_collection(self.collection)
+        self._init_data()
+        self._init_filters()
+
+        self.filters.select_folder(folder)
+        self._on_dropdown_change("folder")
+        if self.filters.select_author(author):
+            self._on_dropdown_change("author")
+        self.filters.select_book(book)
+        self.update_quotes_counter()
+
     #=================================================
     # search
     #=================================================
@@ -493,10 +765,15 @@ class MainWindow(tk.Tk, QuoteManagerUI):
             self.log("No books to search.")
             return
 
-        matches: SearchMatches = book_utils.search_books(
-            books_to_search,
-            query
-        )
+        try:
+            matches: SearchMatches = book_utils.search_books(
+                books_to_search,
+                query,
+                self.collection
+            )
+        except QueryError as e:
+            self.log(f"Invalid query: {e}")
+            return
 
         formatted = book_utils.format_search_results_text(
             matches,
@@ -527,16 +804,25 @@ class MainWindow(tk.Tk, QuoteManagerUI):
             self.scroll_to_bottom()
         self.text_output.config(state="disabled")
 
+    def log_collection_summary(self, error: Exception | None) -> None:
+        if error:
+            self.log(f"Error reading JSON file: {error}\n")
+        else:
+            self.log(
+                f"This collection has {self.stats.total_quotes_count}"
+                f" quotes from {len(self.filtered_books)} books.\n\n"
+            )
+
     def log_book_list(self) -> None:
 
-        matching_books = [
-            book for book in self.collection.books
-            if self._book_matches_filters(
-                book,
+        index = book_index(self.collection)
+        matching_books = index.books_of(
+            index.select(
                 self.filters.selected_folder,
-                self.filters.selected_author
+                self.filters.selected_author,
+                with_quotes=False
             )
-        ]
+        )
 
         # print a summary header
         shown = len(matching_books)
@@ -568,12 +854,20 @@ class MainWindow(tk.Tk, QuoteManagerUI):
         if not reply:
             return
 
-        # rebuild collection and reset dropdowns
+        # rebuild collection and reset dropdowns, shown quotes are forgotten
+        self.quote_manager.clear_selection()
         self.collection.build_the_collection()
-        self.filters.select_first_all()
-        self.filters.set_search_hint()
+        # indexed now, not on the first search
+        if constants.SEARCH_INDEX_AT_LOAD:
+            search_index(self.collection)
+        self.quote_manager.ensure_history(self.collection)
 
-        # build full dropdown lists again
+        # statistics and dropdown lists of the new books (e.g. the folders
+        # after a failed first load)
+        self.stats = Statistics.from_collection(self.collection)
+        self._init_data()
+        self._init_filters()
+        self.filters.set_search_hint()
         self._on_dropdown_change("folder")
 
         # in Tkinter:
@@ -590,6 +884,9 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     def _on_dropdown_change(self, source: str) -> None:
         chosen_folder = self.filters.selected_folder
 
+        # quotes drawn ahead for the previous selection go back
+        self.quote_manager.drop_prefetched()
+
         if source == "book":
             self.update_quotes_counter()
             # book name should be printed before the first quote
@@ -598,36 +895,14 @@ class MainWindow(tk.Tk, QuoteManagerUI):
 
         # update authors dropdown, if folder changed
         if source == "folder":
-            if chosen_folder == constants.ANY_FOLDER:
-                authors = [constants.ANY_AUTHOR] + self.authors_with_quotes
-            else:
-                folder_authors = {
-                    book.author
-                    for book in self.collection.books
-                    if book.folder == chosen_folder
-                    and book.total_quotes > 0
-                }
-                folder_authors = sorted(folder_authors)
-                authors = [constants.ANY_AUTHOR] + folder_authors
-
-            self.filters.set_authors_list(authors)
+            self._set_authors_for_folder(chosen_folder)
             self.filters.select_first_author()
 
-        # gather books for dropdown into a filtered books list
-        self.filtered_books = [constants.ANY_BOOK]
-
-        for book in self.collection.books:
-            # check selected folder and/or author for matching books
-            matches_filter = self._book_matches_filters(
-                book,
-                chosen_folder,
-                self.filters.selected_author
-            )
-
-            has_quotes = book.total_quotes > 0
-
-            if matches_filter and has_quotes:
-                self.filtered_books.append(book.title)
+        # gather books with quotes of the selected folder and/or author
+        # (intersection of their bitsets) into a filtered books list
+        index = book_index(self.collection)
+        mask = index.select(chosen_folder, self.filters.selected_author)
+        self.filtered_books = [constants.ANY_BOOK] + index.titles_of(mask)
 
         # set gathered list and reset dropdown
         self.filters.set_books_list(self.filtered_books)
@@ -678,13 +953,18 @@ class MainWindow(tk.Tk, QuoteManagerUI):
         )
 
     #=================================================
-    # filter match for a book instance
+    # authors dropdown with facet counts
     #=================================================
-    @staticmethod
-    def _book_matches_filters(book, chosen_folder, chosen_author) -> bool:
-        return (
-            (chosen_folder == constants.ANY_FOLDER or book.folder == chosen_folder)
-            and (chosen_author == constants.ANY_AUTHOR or book.author == chosen_author)
+    def _set_authors_for_folder(self, chosen_folder: str) -> None:
+        # the authors with quotes in the folder, with their number of books there
+        index = book_index(self.collection)
+        mask = index.select(chosen_folder)
+        counts = index.author_counts(mask)
+        authors = [constants.ANY_AUTHOR, *counts]
+        counts[constants.ANY_AUTHOR] = index.count(mask)
+        self.filters.set_authors_list(
+            authors,
+            [facet_label(author, counts[author]) for author in authors]
         )
 
     #=================================================
@@ -692,21 +972,22 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     #=================================================
     def clear_text_output(self) -> None:
         self.quote_manager.reset_state()
+        self._clear_text()
+        self.update_quotes_counter()
+
+    def _clear_text(self) -> None:
         self.text_output.config(state="normal")
         self.text_output.delete("1.0", "end")
         self.text_output.config(state="disabled")
-        self.update_quotes_counter()
 
     def update_quotes_counter(self, use_book_total=False) -> None:
         selected_book = self.filters.selected_book
 
         if selected_book == constants.ANY_BOOK:
-            chosen_folder = self.filters.selected_folder
-            chosen_author = self.filters.selected_author
-            quotes_count = sum(
-                book.remaining_quote_count
-                for book in self.collection.books
-                if self._book_matches_filters(book, chosen_folder, chosen_author)
+            # kept up to date by every draw, O(1)
+            quotes_count = book_index(self.collection).remaining.count(
+                self.filters.selected_folder,
+                self.filters.selected_author
             )
         else:
             book = self.collection.get_book_by_title(selected_book)
@@ -719,6 +1000,10 @@ class MainWindow(tk.Tk, QuoteManagerUI):
             else:
                 quotes_count = 0
 
+        # prefetched quotes (of the current selection) were not shown yet
+        if not use_book_total:
+            quotes_count += self.quote_manager.prefetched_count()
+
         self.set_quotes_counter(quotes_count)
 
     def set_quotes_counter(self, value: int | str) -> None:
@@ -740,9 +1025,8 @@ class MainWindow(tk.Tk, QuoteManagerUI):
     def scroll_to_bottom(self) -> None:
         self.text_output.see("end")
 
-    def get_collection_books(self) -> list[Book]:
-        # provide a copy of the original list
-        return list(self.collection.books)
+    def get_collection(self) -> BookCollection:
+        return self.collection
 
     def get_filtered_books(self) -> list[str]:
         return self.filtered_books
@@ -757,15 +1041,16 @@ class MainWindow(tk.Tk, QuoteManagerUI):
 # MAIN
 #=================================================
 if __name__ == "__main__":
+    # --seed and --record (see quote_rng)
+    quote_rng.apply_command_line()
     print("mini-gui is running...")
-    The_Collection = BookCollection()
-    error = The_Collection.build_the_collection()
-    window = MainWindow(The_Collection)
-    if error:
-        window.log(f"Error reading JSON file: {error}\n")
+    if constants.PROGRESSIVE_STARTUP:
+        # the window is shown right away, the collection fills in while it loads
+        window = MainWindow()
     else:
-        window.log(
-            f"This collection has {window.stats.total_quotes_count}"
-            f" quotes from {len(window.filtered_books)} books.\n\n"
-        )
+        The_Collection = BookCollection()
+        error = The_Collection.build_the_collection()
+        print_load_report(The_Collection.load_report)
+        window = MainWindow(The_Collection)
+        window.log_collection_summary(error)
     window.mainloop()
@@ -0,0 +1,103 @@
+#=================================================
+# IMPORT
+#=================================================
+from collections.abc import Sequence
+
+#=================================================
+# CLASSES
+#=================================================
+class PickerModel:
+    """
+    The entries of a filter dropdown: a value per row and the text shown for
+    it (e.g. with a facet count), plus the value that is selected.
+    Setting new entries only keeps the lists, the rest is built when first
+    needed. Typing narrows the shown rows to the entries whose value contains
+    the text, prefix matches first; the case-folded keys are built on the
+    first keystroke, and a text that extends the previous one only searches
+    the previous matches, so a keystroke costs O(matches so far).
+    """
+
+    def __init__(self) -> None:
+        self.values: Sequence[str] = ()
+        self.labels: Sequence[str] = ()
+        self.selected: str = ""
+        # type-ahead text (case folded), "" shows every entry
+        self.text: str = ""
+        self._rows_by_value: dict[str, int] | None = None
+        self._keys: list[str] | None = None
+        # rows containing the text (in entry order) and the shown rows
+        self._matches: list[int] = []
+        self._rows: list[int] | None = None
+
+    def set_items(self, values: Sequence[str], labels: Sequence[str] | None = None) -> None:
+        # labels default to the values
+        self.values = values
+        self.labels = values if labels is None else labels
+        self.text = ""
+        self._rows_by_value = None
+        self._keys = None
+        self._matches = []
+        self._rows = None
+
+    #=================================================
+    # entries
+    #=================================================
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def row_of(self, value: str) -> int:
+        # -1 if there is no such entry
+        if self._rows_by_value is None:
+            self._rows_by_value = {}
+            for row, entry in enumerate(self.values):
+                self._rows_by_value.setdefault(entry, row)
+        return self._rows_by_value.get(value, -1)
+
+    def label_of(self, value: str) -> str:
+        row = self.row_of(value)
+        return self.labels[row] if row >= 0 else value
+
+    def select(self, value: str) -> bool:
+        if self.row_of(value) < 0:
+            return False
+        self.selected = value
+        return True
+
+    def select_first(self) -> None:
+        if self.values:
+            self.selected = self.values[0]
+
+    #=================================================
+    # type-ahead
+    #=================================================
+    def set_filter(self, text: str) -> None:
+        key = text.strip().casefold()
+        if not key:
+            self.text = ""
+            self._rows = None
+            return
+
+        if self._keys is None:
+            self._keys = [value.casefold() for value in self.values]
+        keys = self._keys
+
+        # a longer text only matches entries that matched the shorter one
+        candidates: Sequence[int] = (
+            self._matches if self.text and key.startswith(self.text) else range(len(keys))
+        )
+        self._matches = [row for row in candidates if key in keys[row]]
+        self.text = key
+        self._rows = sorted(self._matches, key=lambda row: not keys[row].startswith(key))
+
+    @property
+    def rows(self) -> Sequence[int]:
+        # the shown rows, every entry without a type-ahead text
+        return range(len(self.values)) if self._rows is None else self._rows
+
+    def shown_values(self) -> list[str]:
+        values = self.values
+        return [values[row] for row in self.rows]
+
+    def shown_labels(self) -> list[str]:
+        labels = self.labels
+        return [labels[row] for row in self.rows]
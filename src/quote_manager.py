@@ -2,12 +2,31 @@
 # IMPORT
 #=================================================
 import book_utils
+import quote_rng
+import random
+import time
 
-from book_collection import Book, Quote
-from collections.abc import Iterator
+from book_collection import Book, BookCollection, Quote
+from book_filter import book_index
+from collections.abc import Callable, Iterable, Iterator
 from constants_loader import constants
+from datetime import datetime
+from quote_prefetch import PrefetchedQuote, QuotePrefetcher
+from quote_sampler import QuoteSampler
+from quote_session import SessionRecorder, open_session_recorder
+from review_scheduler import ReviewScheduler, open_review_scheduler
+from selection_journal import SelectionJournal, open_selection_journal
 from typing import Protocol
 
+#=================================================
+# CONSTANTS
+#=================================================
+# feedback keys of the review mode, bound by both GUIs
+REVIEW_KEYS_HINT = "Ctrl+Right = seen, Ctrl+Left = again"
+
+# the next random quotes are drawn after the shown one was painted
+PREFETCH_DELAY_MS = 20
+
 #=================================================
 # PROTOCOL
 #=================================================
@@ -31,7 +50,7 @@ class QuoteManagerUI(Protocol):
 
     # data access
     def get_selected_book_title(self) -> str: ...
-    def get_collection_books(self) -> list[Book]: ...
+    def get_collection(self) -> BookCollection: ...
     def get_filtered_books(self) -> list[str]: ...
     def get_book_by_title(self, title: str) -> Book | None: ...
 
@@ -52,17 +71,65 @@ class QuoteManager:
     book_quote_count: int
     quote_iter: Iterator[tuple[int, Quote]]
 
+    # random draws: the stream, the sampler weighting and the time
+    # the samplers age books up to (replaced by a replay)
+    rng: random.Random
+    weighting: str
+    clock: Callable[[], float]
+
+    # the books of the filtered titles list (resolved once per list)
+    scope_books: tuple[list[str], list[Book]] | None
+
+    # one sampler per quote length, built for the filtered titles list
+    samplers: dict[str, QuoteSampler]
+    sampler_titles: list[str] | None
+
+    # random quotes drawn ahead for (filtered titles, selected title, length)
+    prefetcher: QuotePrefetcher | None
+    prefetch_scope: tuple[list[str], str, str] | None
+    prefetch_timer: object | None
+    prefetch_message: str | None
+
+    # shown quotes of random draws (see selection_journal)
+    journal: SelectionJournal | None
+    # source_path the journal and the review schedule were opened for
+    history_path: str | None
+
+    # review mode: the scheduler, its scope and the quote waiting for feedback
+    scheduler: ReviewScheduler | None
+    review_scope: tuple[list[str], str] | None
+    review_item: tuple[Book, Quote] | None
+
+    # records the random draws for a replay (see quote_session)
+    recorder: SessionRecorder | None
+
     #=================================================
     # initialization
     #=================================================
-    def __init__(self, ui: QuoteManagerUI):
+    def __init__(self, ui: QuoteManagerUI, rng: random.Random | None = None):
         self.ui = ui
+        self.rng = rng or quote_rng.quote_stream
+        self.weighting = constants.RANDOM_QUOTE_WEIGHTING
+        self.clock = time.time
 
         # set default state
         self.quote_printed = False
         self.book_header_printed = False
         self.pending_book_data = None
         self.book_data_timer = None
+        self.scope_books = None
+        self.samplers = {}
+        self.sampler_titles = None
+        self.prefetcher = None
+        self.prefetch_scope = None
+        self.prefetch_timer = None
+        self.prefetch_message = None
+        self.journal = None
+        self.history_path = None
+        self.scheduler = None
+        self.review_scope = None
+        self.review_item = None
+        self.recorder = None
 
     #=================================================
     # print random quote
@@ -73,21 +140,29 @@ class QuoteManager:
 
         # get dropdown selections
         selected_title = self.ui.get_selected_book_title()
+        filtered_titles = self.ui.get_filtered_books()
         is_book_selected = selected_title != constants.ANY_BOOK
-
-        book, message = book_utils.get_book_for_random_quote(
-            self.ui.get_collection_books(),
-            selected_title,
-            self.ui.get_filtered_books(),
-            length
-        )
+        now = self.clock()
+        ready = self.prefetched_count()
+
+        # the quote was drawn ahead (or is drawn now) for these selections
+        item = self._get_prefetcher(filtered_titles, selected_title, length).take()
+        if self.recorder is not None:
+            if item is None:
+                self.recorder.record_draw("quote", filtered_titles, selected_title, now, length, None, ready=ready)
+            else:
+                self.recorder.record_draw("quote", filtered_titles, selected_title, now, length, item.book, item.quote, ready)
 
         # something went wrong, return early
-        if book is None:
-            if message is not None:
-                self.ui.log(message)
+        if item is None:
+            if self.prefetch_message is not None:
+                self.ui.log(self.prefetch_message, scroll_to_bottom=True)
             return
 
+        book = item.book
+        if self.journal is not None:
+            self.journal.record(book, item.quote)
+
         # add space before previous print (but not before the first)
         if self.quote_printed:
             self.ui.log("\n")
@@ -103,25 +178,19 @@ class QuoteManager:
             self.ui.log(f"{'-'*len(book.title)}\n", scroll_to_bottom=True)
             self.book_header_printed = True
 
-        # get the random quote and print it
-        random_quote, quotes_left_in_book = book_utils.get_random_quote(book, length)
-
-        # something went wrong, inform user
-        if random_quote is None:
-            self.ui.log(f'Failed to get a quote from "{book.title}"', scroll_to_bottom=True)
-            return
-
-        self.ui.log(random_quote.text, scroll_to_bottom=True)
+        # print the prepared quote
+        self.ui.log(item.text, scroll_to_bottom=True)
         self.quote_printed = True
 
         if not is_book_selected:
             if not self.ui.delay_source_enabled():
-                self._print_author_now(book, quotes_left_in_book)
+                self._print_author_now(book, item.quotes_left)
             else:
-                self._schedule_author_print(book, quotes_left_in_book, len(random_quote.text))
+                self._schedule_author_print(book, item.quotes_left, len(item.text))
 
         # call counter update
         self.ui.update_quotes_counter()
+        self._schedule_prefetch()
 
     def _print_author_now(
         self,
@@ -195,10 +264,15 @@ class QuoteManager:
                 "A random book was chosen from the current selection.\n\n"
             )
 
+            filtered_titles = self.ui.get_filtered_books()
             book = book_utils.get_random_book(
-                self.ui.get_collection_books(),
-                self.ui.get_filtered_books()
+                self._get_scope_books(filtered_titles),
+                rng=self.rng
             )
+            if self.recorder is not None:
+                self.recorder.record_draw(
+                    "every", filtered_titles, selected_title, self.clock(), "any", book, ready=self.prefetched_count()
+                )
         else:
             book = self.ui.get_book_by_title(selected_title)
 
@@ -237,6 +311,218 @@ class QuoteManager:
         # schedule next iteration
         self.ui.schedule(5, self._print_next_quote)
 
+    #=================================================
+    # prefetched random quotes
+    #=================================================
+    def _get_prefetcher(self, titles: list[str], selected_title: str, length: str) -> QuotePrefetcher:
+        # quotes drawn for other selections go back first
+        scope = (titles, selected_title, length)
+        if (self.prefetcher is None
+                or self.prefetch_scope is None
+                or titles is not self.prefetch_scope[0]
+                or scope[1:] != self.prefetch_scope[1:]):
+            self.drop_prefetched()
+            self.prefetcher = QuotePrefetcher(
+                constants.PREFETCH_QUOTES,
+                lambda: self._draw_quote(titles, selected_title, length)
+            )
+            self.prefetch_scope = scope
+        return self.prefetcher
+
+    def _draw_quote(self, titles: list[str], selected_title: str, length: str) -> PrefetchedQuote | None:
+        # a quote taken from its book with the text resolved, None with a
+        # message if there is none
+        is_book_selected = selected_title != constants.ANY_BOOK
+        book, message = book_utils.get_book_for_random_quote(
+            self.ui.get_collection().books_by_title,
+            selected_title,
+            self._get_scope_books(titles),
+            length,
+            None if is_book_selected else self._get_sampler(titles, length, self.clock()),
+            self.rng
+        )
+        if book is None:
+            self.prefetch_message = message
+            return None
+
+        random_quote, quotes_left_in_book = book_utils.get_random_quote(book, length, self.rng)
+        for sampler in self.samplers.values():
+            sampler.update(book)
+        if random_quote is None:
+            self.prefetch_message = f'Failed to get a quote from "{book.title}"'
+            return None
+        return PrefetchedQuote(book, random_quote, quotes_left_in_book, random_quote.text)
+
+    def _schedule_prefetch(self) -> None:
+        self.cancel_prefetch()
+        self.prefetch_timer = self.ui.schedule(PREFETCH_DELAY_MS, self._fill_prefetch)
+
+    def _fill_prefetch(self) -> None:
+        self.prefetch_timer = None
+        if self.prefetcher is not None:
+            self.prefetcher.fill()
+
+    def cancel_prefetch(self) -> None:
+        # the scheduled drawing ahead (the quotes drawn so far stay)
+        if self.prefetch_timer is not None:
+            self.ui.cancel_timer(self.prefetch_timer)
+            self.prefetch_timer = None
+
+    def drop_prefetched(self) -> None:
+        # put the quotes drawn ahead back (the UI calls this when the filters change)
+        self.cancel_prefetch()
+        if self.prefetcher is not None:
+            for book in self.prefetcher.drop():
+                for sampler in self.samplers.values():
+                    sampler.update(book)
+        self.prefetcher = None
+        self.prefetch_scope = None
+
+    def prefetched_count(self) -> int:
+        # drawn but not shown yet, still remaining for the counters
+        return len(self.prefetcher) if self.prefetcher is not None else 0
+
+    #=================================================
+    # filtered books
+    #=================================================
+    def _get_scope_books(self, titles: list[str]) -> list[Book]:
+        # the UI assigns a new list whenever the filters change
+        if self.scope_books is None or titles is not self.scope_books[0]:
+            index = book_index(self.ui.get_collection())
+            self.scope_books = (titles, index.books_of(index.mask_of_titles(titles)))
+        return self.scope_books[1]
+
+    #=================================================
+    # random book sampler
+    #=================================================
+    def _get_sampler(self, titles: list[str], length: str, now: float) -> QuoteSampler:
+        # the UI assigns a new list whenever the filters change
+        if titles is not self.sampler_titles:
+            self.samplers = {}
+            self.sampler_titles = titles
+
+        sampler = self.samplers.get(length)
+        if sampler is None:
+            sampler = QuoteSampler(self._get_scope_books(titles), length, self.weighting, self.rng, now)
+            self.samplers[length] = sampler
+        return sampler
+
+    #=================================================
+    # review (spaced repetition)
+    #=================================================
+    def print_review_quote(self) -> None:
+        # serve the quote due first within the selected book or the filters
+        self._flush_pending_author()
+        scheduler = self._get_scheduler()
+        item = scheduler.next_due()
+
+        if item is None:
+            self.review_item = None
+            due = scheduler.next_due_time()
+            if due is None:
+                self.ui.log("No quotes to review.")
+            else:
+                self.ui.log(f"Nothing to review, the next quote is due {datetime.fromtimestamp(due):%Y-%m-%d %H:%M}.")
+            return
+
+        # add space before previous print (but not before the first)
+        if self.quote_printed:
+            self.ui.log("\n")
+        else:
+            self.ui.clear_text_output()
+            self.ui.log(f"Review: {REVIEW_KEYS_HINT}\n")
+
+        book, quote = item
+        state = scheduler.state_of(book, quote)
+        if state is None:
+            status = "new"
+        elif not state.repetitions:
+            status = "relearning"
+        else:
+            status = f"every {state.interval:.0f} days"
+        self.ui.log(quote.text, scroll_to_bottom=True)
+        self.ui.log(f"\n{book.title}   / {status} /", scroll_to_bottom=True)
+        self.ui.log(f"{'-'*len(book.title)}", scroll_to_bottom=True)
+
+        self.quote_printed = True
+        self.review_item = item
+
+    def grade_review(self, grade: str) -> None:
+        # feedback for the last review quote ("again", "seen" or "easy"), then the next one
+        if self.review_item is None:
+            return
+        book, quote = self.review_item
+        self._get_scheduler().grade(book, quote, grade)
+        self.print_review_quote()
+
+    def _get_scheduler(self) -> ReviewScheduler:
+        if self.scheduler is None:
+            self.scheduler = ReviewScheduler()
+
+        # rebuild the heap when the filters or the selected book changed
+        scope = (self.ui.get_filtered_books(), self.ui.get_selected_book_title())
+        if (self.review_scope is None
+                or scope[0] is not self.review_scope[0]
+                or scope[1] != self.review_scope[1]):
+            titles, selected_title = scope
+            if selected_title != constants.ANY_BOOK:
+                book = self.ui.get_book_by_title(selected_title)
+                books = [book] if book is not None else []
+            else:
+                books = self._get_scope_books(titles)
+            self.scheduler.set_books(books)
+            self.review_scope = scope
+        return self.scheduler
+
+    #=================================================
+    # selection journal and review states
+    #=================================================
+    def open_history(self, collection: BookCollection) -> None:
+        # the quotes shown in earlier sessions are selected again,
+        # the review states continue where they were
+        # (a second call, e.g. after a Reset, first closes the open files)
+        if self.journal is not None:
+            self.journal.close()
+        if self.scheduler is not None:
+            self.scheduler.close()
+        self.journal = open_selection_journal(collection)
+        self.scheduler = open_review_scheduler(collection)
+        self.history_path = collection.source_path
+        self.review_scope = None
+        self.drop_prefetched()
+
+        # recorded from the selection the session starts with
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = open_session_recorder(collection, self.rng)
+
+    def ensure_history(self, collection: BookCollection) -> None:
+        # after a rebuild: a collection that failed to load had no source to
+        # keep the journal and the review schedule next to
+        if self.history_path != collection.source_path:
+            self.open_history(collection)
+
+    def restore_selection(self, books: Iterable[Book]) -> None:
+        # re-parsed books (e.g. after a reload) start unselected
+        self.drop_prefetched()
+        self.scope_books = None
+        if self.journal is not None:
+            self.journal.apply(books)
+        if self.recorder is not None:
+            self.recorder.record_event("reload")
+
+    def clear_selection(self) -> None:
+        # before a reset: the samplers and the review scope hold the old books
+        self.drop_prefetched()
+        self.scope_books = None
+        self.samplers = {}
+        self.sampler_titles = None
+        self.review_scope = None
+        if self.journal is not None:
+            self.journal.clear_all()
+        if self.recorder is not None:
+            self.recorder.record_event("reset")
+
     #=================================================
     # reset state
     #=================================================
@@ -244,3 +530,4 @@ class QuoteManager:
         self._flush_pending_author(print_data=False)
         self.quote_printed = False
         self.book_header_printed = False
+        self.review_item = None
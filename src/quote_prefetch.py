@@ -0,0 +1,63 @@
+#=================================================
+# IMPORT
+#=================================================
+from book_collection import Book, Quote
+from collections import deque
+from collections.abc import Callable
+
+#=================================================
+# CLASSES
+#=================================================
+class PrefetchedQuote:
+    __slots__ = ("book", "quote", "quotes_left", "text")
+
+    def __init__(self, book: Book, quote: Quote, quotes_left: int, text: str) -> None:
+        self.book = book
+        self.quote = quote
+        # remaining quotes of the book after this one was drawn
+        self.quotes_left = quotes_left
+        # the output ready to show (e.g. the resolved or wrapped quote text)
+        self.text = text
+
+
+class QuotePrefetcher:
+    """
+    The next random quotes of one scope (filters, selected book, length),
+    drawn ahead with their text prepared, so showing one only costs the output.
+    draw() takes the quote from its book like a shown one; drop() puts the
+    unshown quotes back when the scope changes, in reverse draw order, so
+    every return is O(1).
+    """
+
+    def __init__(self, size: int, draw: Callable[[], PrefetchedQuote | None]) -> None:
+        self.size = size
+        self._draw = draw
+        self._queue: deque[PrefetchedQuote] = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def take(self) -> PrefetchedQuote | None:
+        # the next quote (drawn now if none is ready), None if there is none left
+        if self._queue:
+            return self._queue.popleft()
+        return self._draw()
+
+    def fill(self, count: int | None = None) -> None:
+        # up to count quotes (default: the size)
+        if count is None:
+            count = self.size
+        while len(self._queue) < count:
+            item = self._draw()
+            if item is None:
+                return
+            self._queue.append(item)
+
+    def drop(self) -> list[Book]:
+        # the books that got quotes back (e.g. to update their sampler weights)
+        books: list[Book] = []
+        while self._queue:
+            item = self._queue.pop()
+            item.book.return_quote(item.quote)
+            books.append(item.book)
+        return books
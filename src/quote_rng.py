@@ -0,0 +1,86 @@
+#=================================================
+# IMPORT
+#=================================================
+import argparse
+import os
+import random
+
+from constants_loader import constants
+
+#=================================================
+# CONSTANTS
+#=================================================
+SEED_ENV_VAR = "READERA_SEED"
+
+#=================================================
+# STREAMS
+#=================================================
+# every draw of random quotes and books uses quote_stream (unless another
+# random.Random is passed in), the review mode has a stream of its own,
+# so reviewing does not shift the quote draws
+quote_stream = random.Random()
+review_stream = random.Random()
+
+# seed of the streams, recorded with a session
+session_seed: int = 0
+
+# --record of the command line, wins over constants.SESSION_RECORD_FILE
+record_path: str | None = None
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def configured_seed() -> int | None:
+    # the environment variable wins over constants.RANDOM_SEED
+    value = os.environ.get(SEED_ENV_VAR, "").strip()
+    if value:
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{SEED_ENV_VAR} must be an integer, got {value!r}") from None
+    return constants.RANDOM_SEED
+
+
+def seed_streams(seed: int | None = None, environment: bool = True) -> int:
+    """
+    Seed both streams in place and return the seed. Without a seed the
+    configured one is used (READERA_SEED only if environment), else a new
+    one is drawn, so every session has a seed it can be replayed with.
+    """
+    global session_seed
+    if seed is None:
+        seed = configured_seed() if environment else constants.RANDOM_SEED
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+
+    quote_stream.seed(seed)
+    review_stream.seed(f"{seed}/review")
+    session_seed = seed
+    return seed
+
+
+def apply_command_line(argv: list[str] | None = None, recording: bool = True) -> argparse.Namespace:
+    """
+    Seed the random streams from --seed (else READERA_SEED / RANDOM_SEED)
+    and remember --record (see quote_session). Unknown arguments are
+    left to the caller (e.g. Qt).
+    """
+    global record_path
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="seed of the random draws")
+    if recording:
+        parser.add_argument("--record", metavar="FILE", help="record the random draws of the session for replay")
+    args, _ = parser.parse_known_args(argv)
+
+    try:
+        seed_streams(args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    if recording:
+        record_path = args.record
+    return args
+
+
+# the environment is read by apply_command_line, so a bad READERA_SEED is a
+# usage error of the entry point instead of failing every import
+seed_streams(environment=False)
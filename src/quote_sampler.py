@@ -0,0 +1,173 @@
+#=================================================
+# IMPORT
+#=================================================
+import quote_rng
+import random
+import time
+
+from book_collection import Book
+from collections.abc import Iterable, Sequence
+from constants_loader import constants
+
+#=================================================
+# CONSTANTS
+#=================================================
+# books: every book with remaining quotes is equally likely
+# quotes: every remaining quote is equally likely
+# rating / recency / length: like quotes, times a per-book factor
+WEIGHTINGS = ("books", "quotes", "rating", "recency", "length")
+
+# factors are scaled to integer weights, so the sums stay exact
+WEIGHT_SCALE = 1000
+
+# factor of books without a Goodreads rating (middle of the 0-5 scale)
+UNRATED_FACTOR = 2.5
+
+#=================================================
+# CLASSES
+#=================================================
+class FenwickTree:
+    """
+    Binary indexed tree over integer weights: O(log n) updates and O(log n)
+    search of the index a cumulative weight falls into, O(n) to build.
+    """
+
+    def __init__(self, weights: Sequence[int]) -> None:
+        self.weights: list[int] = list(weights)
+        self.total: int = sum(self.weights)
+
+        # every node adds itself to its parent once, in index order
+        size = len(self.weights)
+        self._tree: list[int] = [0, *self.weights]
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+
+        # largest power of two not above the size (start of the search)
+        self._top: int = 1 << (size.bit_length() - 1) if size else 0
+
+    def set(self, index: int, weight: int) -> None:
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        self.total += delta
+
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, target: int) -> int:
+        # the index whose cumulative range contains target (0 <= target < total)
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class QuoteSampler:
+    """
+    Draws books for random quotes, the chance of a book follows its remaining
+    quotes of the given length (see WEIGHTINGS). Draws and weight updates are
+    O(log n), a new book list (filter change) rebuilds the tree in O(n).
+    Call update() after a quote was taken from a book. A book that lost quotes
+    elsewhere is corrected when it is drawn.
+    Draws use rng (default: the quote stream), "recency" ages books up to now
+    (default: the current time).
+    """
+
+    def __init__(
+        self,
+        books: Iterable[Book],
+        length: str = "any",
+        weighting: str = "quotes",
+        rng: random.Random | None = None,
+        now: float | None = None
+    ) -> None:
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown weighting: {weighting!r} (expected one of {', '.join(WEIGHTINGS)})")
+        self.length = length
+        self.weighting = weighting
+        self.rng: random.Random = rng or quote_rng.quote_stream
+
+        # per-book factors survive a rebuild, only new books are computed
+        self._factors: dict[Book, float] = {}
+        self._now: float = time.time() if now is None else now
+
+        self.books: list[Book] = []
+        self._index: dict[Book, int] = {}
+        self._tree = FenwickTree([])
+        self.set_books(books)
+
+    def set_books(self, books: Iterable[Book]) -> None:
+        self.books = list(books)
+        self._index = {book: i for i, book in enumerate(self.books)}
+        self._tree = FenwickTree([self._weight(book) for book in self.books])
+
+    def draw(self) -> Book | None:
+        """
+        Return a random book with remaining quotes, None if there is none.
+        """
+        while self._tree.total > 0:
+            i = self._tree.find(self.rng.randrange(self._tree.total))
+            book = self.books[i]
+            weight = self._weight(book)
+            if weight == self._tree.weights[i]:
+                return book
+            # the book changed since its weight was stored, draw again
+            self._tree.set(i, weight)
+        return None
+
+    def update(self, book: Book) -> None:
+        i = self._index.get(book)
+        if i is not None:
+            self._tree.set(i, self._weight(book))
+
+    @property
+    def has_remaining_quotes(self) -> bool:
+        return self._tree.total > 0
+
+    #=================================================
+    # weights
+    #=================================================
+    def _weight(self, book: Book) -> int:
+        remaining: int = (
+            book.remaining_short_quote_count
+            if self.length == "short"
+            else book.remaining_quote_count
+        )
+        if not remaining:
+            return 0
+        if self.weighting == "books":
+            return WEIGHT_SCALE
+
+        factor = self._factors.get(book)
+        if factor is None:
+            factor = self._factors[book] = self._book_factor(book)
+        # a tiny factor still leaves the book a chance
+        return max(1, round(remaining * factor * WEIGHT_SCALE))
+
+    def _book_factor(self, book: Book) -> float:
+        if self.weighting == "rating":
+            return book.rating or UNRATED_FACTOR
+
+        if self.weighting == "recency":
+            # halves every RECENCY_HALF_LIFE_DAYS since the last quote was taken
+            age_days = max(0.0, self._now - book.last_q_timestamp) / constants.ONE_DAY_IN_SECONDS
+            return 0.5 ** (age_days / constants.RECENCY_HALF_LIFE_DAYS)
+
+        if self.weighting == "length":
+            # average characters per quote, in hundreds
+            quotes = book.short_quotes if self.length == "short" else book.get_all_quotes_list()
+            if not quotes:
+                return 1.0
+            return sum(len(quote.text) for quote in quotes) / len(quotes) / 100
+
+        return 1.0
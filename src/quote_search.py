@@ -0,0 +1,286 @@
+#=================================================
+# IMPORT
+#=================================================
+import re
+import weakref
+
+from array import array
+from bisect import bisect_left, bisect_right
+from book_collection import Book, BookCollection, Quote
+from collections.abc import Iterable, Sequence
+
+#=================================================
+# CLASSES
+#=================================================
+class WordTrigramIndex:
+    """
+    Substring lookup over numbered (lowercased) texts. Every text is split in
+    words at whitespace, each word has the posting list of the texts containing
+    it and each trigram of a word lists the words containing it. A word of the
+    query lies inside a single word of every text that contains the query, so
+    the candidates are the texts of the words containing each query word of
+    3+ characters; they still have to be checked with a substring test.
+    """
+
+    def __init__(self) -> None:
+        self.words: list[str] = []
+        self._word_ids: dict[str, int] = {}
+        self._postings: list = []
+        self._trigrams: dict[str, array] = {}
+
+    def add(self, doc: int, text: str) -> None:
+        # docs are added in increasing order, the posting lists stay sorted
+        word_ids = self._word_ids
+        postings = self._postings
+        for word in set(text.split()):
+            word_id = word_ids.get(word)
+            if word_id is None:
+                word_ids[word] = len(self.words)
+                self.words.append(word)
+                postings.append([doc])
+            else:
+                postings[word_id].append(doc)
+
+    def finish(self) -> None:
+        # compact posting lists and the trigrams of the vocabulary
+        self._postings = [array("I", docs) for docs in self._postings]
+        self._word_ids = {}
+
+        trigrams: dict[str, list[int]] = {}
+        for word_id, word in enumerate(self.words):
+            for trigram in {word[i:i + 3] for i in range(len(word) - 2)}:
+                trigrams.setdefault(trigram, []).append(word_id)
+        self._trigrams = {trigram: array("I", word_ids) for trigram, word_ids in trigrams.items()}
+
+    def docs_of(self, word_id: int) -> Sequence[int]:
+        return self._postings[word_id]
+
+    def words_containing(self, part: str) -> list[int]:
+        # the rarest trigram of the part narrows the vocabulary (part: 3+ characters)
+        word_ids = min((self._trigrams.get(part[i:i + 3], ()) for i in range(len(part) - 2)), key=len)
+        words = self.words
+        return [word_id for word_id in word_ids if part in words[word_id]]
+
+    def candidates(self, query: str, limit: int) -> set[int] | None:
+        """
+        Return the docs that may contain the (lowercased) query. None if it has
+        no word of 3 characters to look up or if even its rarest one is in more
+        than limit docs (reading the docs is cheaper then).
+        """
+        postings = self._postings
+        # (postings of a query word, their total size), rarest first
+        parts: list[tuple[list, int]] = []
+        for part in {part for part in query.split() if len(part) >= 3}:
+            lists = [postings[word_id] for word_id in self.words_containing(part)]
+            parts.append((lists, sum(map(len, lists))))
+        parts.sort(key=lambda item: item[1])
+        if not parts or parts[0][1] > limit:
+            return None
+
+        docs: set[int] | None = None
+        for lists, size in parts:
+            if docs is not None and size > limit:
+                # the rest is left to the substring test
+                break
+            part_docs: set[int] = set().union(*lists)
+            docs = part_docs if docs is None else docs & part_docs
+            if not docs:
+                break
+        return docs
+
+
+class SearchHit:
+    __slots__ = ("book", "quote", "spans", "score")
+
+    def __init__(self, book: Book, quote: Quote, spans: list[tuple[int, int]], score: float = 1.0) -> None:
+        self.book = book
+        self.quote = quote
+        # (start, end) of the matches in quote.text, in order (see match_spans)
+        self.spans = spans
+        # 1.0 for exact matches, lower for fuzzy ones (see fuzzy_search)
+        self.score = score
+
+
+class RangeIndex:
+    """
+    Ids sorted by an integer value, a range of values is two binary searches.
+    """
+
+    def __init__(self, values: Sequence[int]) -> None:
+        self.ids = array("I", sorted(range(len(values)), key=values.__getitem__))
+        self.values = array("q", [values[i] for i in self.ids])
+
+    def between(self, low: int, high: int) -> array:
+        # ids with low <= value <= high
+        return self.ids[bisect_left(self.values, low):bisect_right(self.values, high)]
+
+
+class QuoteSearchIndex:
+    """
+    Case-insensitive substring search over the quotes (long and short) and the
+    titles of a collection's books, plus the quotes by page. Quotes are
+    numbered in collection order; a text looks up its candidates in a
+    WordTrigramIndex and only reads their texts, so its cost follows the
+    number of matches, not the collection.
+    A scope is a set of book positions (e.g. from BookIndex.positions_of).
+    """
+
+    def __init__(self, books: Sequence[Book]) -> None:
+        self.books = books
+        self.size = len(books)
+        self.quotes: list[Quote] = []
+        # book position of every quote
+        self.quote_books = array("I")
+        # quotes of books[i] are quotes[first_quote[i]:first_quote[i + 1]]
+        self.first_quote = array("I")
+        self._positions: dict[str, int] = {}
+        self.quote_words = WordTrigramIndex()
+        self.title_words = WordTrigramIndex()
+
+        quotes = self.quotes
+        for position, book in enumerate(books):
+            self._positions[book.title] = position
+            self.title_words.add(position, book.title.lower())
+            self.first_quote.append(len(quotes))
+            for quote in book.get_all_quotes_list():
+                self.quote_words.add(len(quotes), quote.text.lower())
+                quotes.append(quote)
+                self.quote_books.append(position)
+        self.first_quote.append(len(quotes))
+
+        self.quote_words.finish()
+        self.title_words.finish()
+        self.pages = RangeIndex([quote.page for quote in quotes])
+
+    def positions_of(self, books: Iterable[Book]) -> set[int]:
+        positions = self._positions
+        return {positions[book.title] for book in books if book.title in positions}
+
+    def quotes_of(self, positions: Iterable[int]) -> set[int]:
+        # ids of the quotes of the books at positions
+        first = self.first_quote
+        return {i for position in positions for i in range(first[position], first[position + 1])}
+
+    def in_scope(self, ids: Iterable[int], scope: set[int] | None) -> set[int]:
+        # the quotes of ids whose book is in the scope (None: every book)
+        if scope is None:
+            return set(ids)
+        quote_books = self.quote_books
+        return {i for i in ids if quote_books[i] in scope}
+
+    def quote_count(self, scope: set[int] | None) -> int:
+        if scope is None:
+            return len(self.quotes)
+        first = self.first_quote
+        return sum(first[position + 1] - first[position] for position in scope)
+
+    #=================================================
+    # queries
+    #=================================================
+    def find_titles(self, text: str, scope: set[int] | None = None) -> list[int]:
+        """
+        Return the positions of the books whose title contains the text.
+        """
+        key = text.strip().lower()
+        if not key:
+            return []
+        candidates = self.title_words.candidates(key, self.size if scope is None else len(scope))
+        if candidates is None:
+            candidates = set(range(self.size)) if scope is None else scope
+        elif scope is not None:
+            candidates &= scope
+        books = self.books
+        return [position for position in sorted(candidates) if key in books[position].title.lower()]
+
+    def find_quotes(self, text: str, scope: set[int] | None = None) -> set[int]:
+        """
+        Return the quotes of the scope's books that contain the text
+        (case-insensitive). Only the candidates of the index are read, unless
+        the text has no word to look up or a very common one.
+        """
+        key = text.strip().lower()
+        candidates = self.quote_words.candidates(key, self.quote_count(scope))
+        if candidates is None:
+            ids = range(len(self.quotes)) if scope is None else self.quotes_of(scope)
+        else:
+            ids = self.in_scope(candidates, scope)
+        quotes = self.quotes
+        return {i for i in ids if key in quotes[i].text.lower()}
+
+    def containing(self, text: str, ids: set[int]) -> set[int]:
+        """
+        Return the quotes of ids that contain the text (case-insensitive).
+        """
+        key = text.strip().lower()
+        # read the candidates instead if there are fewer
+        candidates = self.quote_words.candidates(key, len(ids))
+        if candidates is not None:
+            ids = candidates & ids
+        quotes = self.quotes
+        return {i for i in ids if key in quotes[i].text.lower()}
+
+    def hits(self, ids: Iterable[int], texts: Sequence[str] = ()) -> list[SearchHit]:
+        """
+        Return the quotes of ids in collection order, with the spans of the texts.
+        """
+        pattern = span_pattern(texts)
+        books, quotes, quote_books = self.books, self.quotes, self.quote_books
+        return [
+            SearchHit(books[quote_books[i]], quotes[i], match_spans(quotes[i].text, pattern) if pattern else [])
+            for i in sorted(ids)
+        ]
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def span_pattern(texts: Iterable[str]) -> re.Pattern | None:
+    """
+    Return the pattern matching any of the texts (case-insensitive),
+    None if there is none.
+    """
+    # longer texts first, a text containing another one wins
+    keys = sorted({text.strip().lower() for text in texts} - {""}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, keys)), re.IGNORECASE) if keys else None
+
+def match_spans(text: str, pattern: re.Pattern) -> list[tuple[int, int]]:
+    """
+    Return the (start, end) of the non-overlapping matches of the pattern
+    (see span_pattern) in text.
+    """
+    lowered = text.lower()
+    # lowercasing changed the length (e.g. "İ"), the spans come from the text
+    return [match.span() for match in pattern.finditer(lowered if len(lowered) == len(text) else text)]
+
+def mark_matches(text: str, spans: Sequence[tuple[int, int]]) -> str:
+    """
+    Return the text with the matches in upper case.
+    """
+    parts: list[str] = []
+    last = 0
+    for start, end in spans:
+        parts.append(text[last:start])
+        parts.append(text[start:end].upper())
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+# one index per collection, rebuilt when its books were replaced (build, reload)
+_indexes: "weakref.WeakKeyDictionary[BookCollection, QuoteSearchIndex]" = weakref.WeakKeyDictionary()
+
+def search_index(collection: BookCollection) -> QuoteSearchIndex:
+    """
+    Return the search index of the collection's books (built on first use).
+    """
+    index = _indexes.get(collection)
+    if index is None or index.books is not collection.books or index.size != len(collection.books):
+        index = _indexes[collection] = QuoteSearchIndex(collection.books)
+    return index
+
+def adopt_index(collection: BookCollection, other: BookCollection) -> None:
+    """
+    Give the collection the index built for other (see BookCollection.adopt),
+    so a reload indexed on a worker thread is not indexed again on first use.
+    """
+    index = _indexes.pop(other, None)
+    if index is not None:
+        _indexes[collection] = index
@@ -0,0 +1,128 @@
+#=================================================
+# IMPORT
+#=================================================
+import json
+import quote_rng
+import random
+import time
+
+from book_collection import Book, BookCollection, Quote
+from constants_loader import constants
+from typing import Any, TextIO
+
+#=================================================
+# CONSTANTS
+#=================================================
+SESSION_FORMAT_VERSION = 1
+
+#=================================================
+# CLASSES
+#=================================================
+class SessionRecorder:
+    """
+    Writes the actions of a GUI session that draw from the quote stream as
+    JSON lines: a header with the stream state, the weighting and the quotes
+    selected at the start, then one line per action with the dropdown state
+    it ran with and the quote it printed. session-replay.py runs the actions
+    again through a QuoteManager without a window and compares the results.
+    """
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+        # last written filtered titles list (the UI assigns a new one on changes)
+        self._titles: list[str] | None = None
+
+    def write_header(self, collection: BookCollection, rng: random.Random) -> None:
+        version, internal_state, gauss_next = rng.getstate()
+        selected: dict[str, list[int]] = {}
+        for book in collection.books:
+            quotes = book.selected_quotes
+            if quotes:
+                selected[book.file_id] = [quote.insert_time for quote in quotes]
+
+        self._write({
+            "version": SESSION_FORMAT_VERSION,
+            "seed": quote_rng.session_seed,
+            "state": [version, list(internal_state), gauss_next],
+            "source": collection.source,
+            "weighting": constants.RANDOM_QUOTE_WEIGHTING,
+            "selected": selected,
+        })
+
+    def record_draw(
+        self,
+        op: str,
+        titles: list[str],
+        selected_title: str,
+        now: float,
+        length: str,
+        book: Book | None,
+        quote: Quote | None = None,
+        ready: int = 0
+    ) -> None:
+        # ready: quotes drawn ahead before the action (see QuoteManager.prefetched_count)
+        event: dict[str, Any] = {"op": op, "time": now, "book": selected_title, "length": length, "ready": ready}
+        if titles is not self._titles:
+            event["titles"] = titles
+            self._titles = titles
+
+        if book is None:
+            event["result"] = None
+        elif quote is None:
+            event["result"] = [book.title]
+        else:
+            event["result"] = [book.title, quote.insert_time]
+        self._write(event)
+
+    def record_event(self, op: str) -> None:
+        # reset / reload
+        self._write({"op": op, "time": time.time()})
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _write(self, event: dict[str, Any]) -> None:
+        # one line per action, the file is line buffered
+        self._file.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+#=================================================
+# FUNCTIONS: recording
+#=================================================
+def open_session_recorder(collection: BookCollection, rng: random.Random) -> SessionRecorder | None:
+    """
+    Start recording if a session file is configured, None otherwise
+    (or if it cannot be written).
+    """
+    path = quote_rng.record_path or constants.SESSION_RECORD_FILE
+    if not path:
+        return None
+    try:
+        file = open(path, "w", encoding="utf8", buffering=1)
+    except OSError as e:
+        print(f"The session is not recorded: {e}")
+        return None
+
+    recorder = SessionRecorder(file)
+    recorder.write_header(collection, rng)
+    print(f"Recording the session to {path} (seed {quote_rng.session_seed})")
+    return recorder
+
+#=================================================
+# FUNCTIONS: reading
+#=================================================
+def read_session(path: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """
+    Return the header and the events of a recorded session. A line cut short
+    by a crash ends the session.
+    """
+    events: list[dict[str, Any]] = []
+    with open(path, encoding="utf8") as file:
+        header: dict[str, Any] = json.loads(file.readline())
+        if header.get("version") != SESSION_FORMAT_VERSION:
+            raise ValueError(f"{path} is not a session of format version {SESSION_FORMAT_VERSION}")
+        for line in file:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return header, events
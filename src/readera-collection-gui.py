@@ -1,22 +1,149 @@
 #=================================================
 # IMPORT
 #=================================================
-import book_utils
-import re
+from __future__ import annotations
+
+import quote_rng
 import sys
+import threading
 
-from book_collection import BookCollection, Book
-from book_statistics import Statistics, StatisticsReporter
 from constants_loader import constants
 from datetime import datetime
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QStandardItem, QStandardItemModel, QTextBlockFormat, QTextCharFormat, QTextCursor, QTextOption
+from picker_model import PickerModel
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, QTimer, Signal
+from PySide6.QtGui import QFont, QKeySequence, QShortcut, QStandardItem, QStandardItemModel, QTextBlockFormat, QTextCharFormat, QTextCursor, QTextOption
 from PySide6.QtWidgets import (
-    QApplication, QComboBox, QGridLayout, QHBoxLayout, QHeaderView, QLabel,
-    QInputDialog, QMainWindow, QMessageBox, QPushButton, QSizePolicy, QStackedWidget,
+    QApplication, QComboBox, QCompleter, QGridLayout, QHBoxLayout, QHeaderView, QLabel,
+    QInputDialog, QLineEdit, QListView, QMainWindow, QMessageBox, QProgressBar, QPushButton, QSizePolicy, QStackedWidget,
     QVBoxLayout, QTableView, QTextEdit, QWidget
 )
-from quote_manager import QuoteManager
+from typing import TYPE_CHECKING
+
+# the collection modules are imported when they are first needed
+# (mostly by the loader thread), so the window is shown without waiting for them
+if TYPE_CHECKING:
+    from book_collection import BookCollection, Book
+    from library_watcher import LibraryWatcher
+    from quote_manager import QuoteManager
+
+#=================================================
+# COLLECTION LOADER
+#=================================================
+class CollectionLoader(QObject):
+    """
+    Builds the collection on a worker thread, loaded(collection, error) is
+    delivered on the GUI thread (queued connection), failed(error) instead
+    if the build raised.
+    """
+    loaded = Signal(object, object)
+    failed = Signal(object)
+
+    def start(self):
+        # daemon thread, closing the window does not wait for the build
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        # the window waits for one of the signals, an exception must not end the thread silently
+        try:
+            from book_collection import BookCollection
+            from quote_search import search_index
+
+            collection = BookCollection()
+            error = collection.build_the_collection()
+            if constants.SEARCH_INDEX_AT_LOAD:
+                search_index(collection)
+        except Exception as error:
+            self.failed.emit(error)
+            return
+        self.loaded.emit(collection, error)
+
+#=================================================
+# FILTER PICKERS
+#=================================================
+class PickerListModel(QAbstractListModel):
+    """
+    Qt list over the entries of a PickerModel (or only its type-ahead matches):
+    the text is the label, the UserRole data the value. New entries are one
+    model reset instead of removing and inserting every item.
+    """
+
+    def __init__(self, picker: PickerModel, matches_only: bool = False, parent: QObject | None = None):
+        super().__init__(parent)
+        self.picker = picker
+        self.matches_only = matches_only
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.picker.rows) if self.matches_only else len(self.picker)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.picker.rows[index.row()] if self.matches_only else index.row()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.picker.labels[row]
+        if role == Qt.ItemDataRole.UserRole:
+            return self.picker.values[row]
+        return None
+
+    def update(self, change) -> None:
+        # runs change() on the picker between a begin/end reset
+        self.beginResetModel()
+        change()
+        self.endResetModel()
+
+
+class FilterPicker(QObject):
+    """
+    A filter dropdown backed by a PickerModel: the combobox lists every entry
+    (uniform rows, sized without measuring them), typing shows the matches
+    in a completer popup, Enter takes the best match.
+    """
+
+    def __init__(self, combobox: QComboBox):
+        super().__init__(combobox)
+        self.combobox = combobox
+        self.picker = PickerModel()
+        self.model = PickerListModel(self.picker, parent=self)
+        self.matches = PickerListModel(self.picker, matches_only=True, parent=self)
+
+        view = QListView()
+        view.setUniformItemSizes(True)
+        combobox.setView(view)
+        combobox.setModel(self.model)
+        combobox.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
+        combobox.setMinimumContentsLength(constants.PICKER_MIN_CHARS)
+
+        # the combobox picks the activated match by its text
+        combobox.setEditable(True)
+        combobox.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.completer = QCompleter(self.matches, combobox)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.popup().setUniformItemSizes(True)
+        combobox.setCompleter(self.completer)
+
+        line_edit = combobox.lineEdit()
+        line_edit.textEdited.connect(self._on_text_edited)
+        line_edit.returnPressed.connect(self._on_return)
+        line_edit.editingFinished.connect(self._show_current)
+
+    def set_items(self, values: list[str], labels: list[str] | None = None) -> None:
+        self.model.update(lambda: self.matches.update(lambda: self.picker.set_items(values, labels)))
+
+    def _on_text_edited(self, text: str) -> None:
+        self.matches.update(lambda: self.picker.set_filter(text))
+        if self.picker.text:
+            self.completer.complete()
+
+    def _on_return(self) -> None:
+        if self.picker.text and self.picker.rows:
+            self.combobox.setCurrentIndex(self.picker.rows[0])
+
+    def _show_current(self) -> None:
+        # a typed text gives way to the selected entry
+        self.matches.update(lambda: self.picker.set_filter(""))
+        self.combobox.setEditText(self.combobox.itemText(self.combobox.currentIndex()))
 
 #=================================================
 # MAIN WINDOW
@@ -26,11 +153,13 @@ class MainWindow(QMainWindow):
     #=================================================
     # type hints
     #=================================================
-    collection: BookCollection
-    quote_manager: QuoteManager
+    collection: BookCollection | None
+    quote_manager: QuoteManager | None
+    loader: CollectionLoader | None
+    watcher: LibraryWatcher | None
+    watcher_timer: QTimer | None
 
     filtered_books: list[str]
-    authors_with_quotes: list[str]
 
     #===================
     # output state
@@ -45,6 +174,9 @@ class MainWindow(QMainWindow):
     folders_dropdown: QComboBox
     authors_dropdown: QComboBox
     books_dropdown: QComboBox
+    folders_picker: FilterPicker
+    authors_picker: FilterPicker
+    books_picker: FilterPicker
     mode_dropdown: QComboBox
 
     delay_source_toggle: QPushButton
@@ -55,32 +187,35 @@ class MainWindow(QMainWindow):
     output_stack: QStackedWidget
     text_output: QTextEdit
     table_output: QTableView
+    progress_bar: QProgressBar
 
     #=================================================
     # initialization
     #=================================================
-    def __init__(self, collection: BookCollection):
+    def __init__(self):
         super().__init__()
 
         #=================================================
         # instance attributes
         #=================================================
-        self.collection = collection
-        self.quote_manager = QuoteManager(self)
+        # set once the collection is loaded (see load_collection)
+        self.collection = None
+        self.quote_manager = None
+        self.loader = None
+        self.watcher = None
+        self.watcher_timer = None
         self.filtered_books = []
-        self.authors_with_quotes = []
 
         #=================================================
         # call init and build functions
         #=================================================
         self._init_window()
-        self._init_data()
         self._init_state()
         self._init_filters()
         self._init_actions()
-        self._init_signals()
         self._init_output()
         self._build_main_layout()
+        self._init_progress()
         self.show()
 
     #=================================================
@@ -97,16 +232,11 @@ class MainWindow(QMainWindow):
     # data preparation
     #=================================================
     def _init_data(self):
-        authors_set = set()
+        from book_filter import book_index
 
-        # filtered books start with full list
-        for book in self.collection.books:
-            if book.total_quotes > 0:
-                self.filtered_books.append(book.title)
-                authors_set.add(book.author)
-
-        # sorted returns a list
-        self.authors_with_quotes = sorted(authors_set)
+        # filtered books start with full list (of books with quotes)
+        index = book_index(self.collection)
+        self.filtered_books = index.titles_of(index.with_quotes)
 
     #=================================================
     # default state
@@ -119,12 +249,15 @@ class MainWindow(QMainWindow):
     # ComboBox filters (dropdowns)
     #=================================================
     def _init_filters(self):
+        # items are added once the collection is loaded (see refresh_collection)
         self.folders_dropdown = QComboBox()
         self.authors_dropdown = QComboBox()
         self.books_dropdown = QComboBox()
-        self.folders_dropdown.addItems([constants.ANY_FOLDER] + sorted(list(self.collection.folders.keys())))
-        self.authors_dropdown.addItems([constants.ANY_AUTHOR] + self.authors_with_quotes)
-        self.books_dropdown.addItems([constants.ANY_BOOK] + self.filtered_books)
+
+        # the entries live in list models with type-ahead
+        self.folders_picker = FilterPicker(self.folders_dropdown)
+        self.authors_picker = FilterPicker(self.authors_dropdown)
+        self.books_picker = FilterPicker(self.books_dropdown)
 
         # increase font size for dropdowns
         font = self.folders_dropdown.font()
@@ -159,7 +292,9 @@ class MainWindow(QMainWindow):
             "search": QPushButton("Search"),
             "clear": QPushButton("Clear window"),
             "list": QPushButton("Book list"),
+            "review": QPushButton("Review quote"),
         }
+        self.buttons["review"].setToolTip("Spaced repetition of the selected quotes\nCtrl+Right: seen\nCtrl+Left: again")
 
         # adjustment buttons
         self.btn_increase = QPushButton("▲")
@@ -207,6 +342,19 @@ class MainWindow(QMainWindow):
         self.btn_increase.clicked.connect(lambda: self.on_adjust_button("increase"))
         self.btn_decrease.clicked.connect(lambda: self.on_adjust_button("decrease"))
 
+        # review feedback (see quote_manager.REVIEW_KEYS_HINT)
+        self.buttons["review"].clicked.connect(self.quote_manager.print_review_quote)
+        QShortcut(QKeySequence("Ctrl+Right"), self).activated.connect(lambda: self._on_review_key("seen"))
+        QShortcut(QKeySequence("Ctrl+Left"), self).activated.connect(lambda: self._on_review_key("again"))
+
+    def _on_review_key(self, grade: str):
+        # the keys keep their meaning (word-wise cursor moves) in the type-ahead pickers
+        # and any editable text, a quote is only graded from the rest of the window
+        focus = QApplication.focusWidget()
+        if isinstance(focus, QLineEdit) or (isinstance(focus, QTextEdit) and not focus.isReadOnly()):
+            return
+        self.quote_manager.grade_review(grade)
+
     #===============
     # header layout
     # +----------------------------------------------------------------------------------------------+
@@ -324,6 +472,8 @@ class MainWindow(QMainWindow):
     # | Random short quote    | Quote distribution    | Search                |   mode_dropdown   |
     # |-----------------------|-----------------------|-----------------------|-------------------|
     # | Delay author toggle   | Clear window          | Book list by property |         ▼         |
+    # |-----------------------|-----------------------|-----------------------|-------------------|
+    # | Review quote          |                       |                       |                   |
     # +-------------------------------------------------------------------------------------------+
     def _build_button_grid(self):
         button_grid = QGridLayout()
@@ -337,6 +487,7 @@ class MainWindow(QMainWindow):
         positions = [(i, j) for i in range(3) for j in range(4)]
         for pos, w in zip(positions, widgets):
             button_grid.addWidget(w, pos[0], pos[1])
+        button_grid.addWidget(self.buttons["review"], 3, 0)
 
         return button_grid
 
@@ -347,7 +498,7 @@ class MainWindow(QMainWindow):
     # +-------------------------------------------------+
     # | output_widget (text output)                     |
     # +-------------------------------------------------+
-    # | grid_layout (3x4 buttons)                       |
+    # | grid_layout (3x4 buttons + review)              |
     # +-------------------------------------------------+
     # | reset_button (full-width reset button)          |
     # +-------------------------------------------------+
@@ -368,47 +519,151 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(reset)
         self.panel.setLayout(main_layout)
 
+    #=================================================
+    # background loading
+    #=================================================
+    def _init_progress(self):
+        # controls stay disabled until the collection is loaded
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumWidth(200)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().showMessage("Loading the collection...")
+        self.panel.setEnabled(False)
+
+    def load_collection(self):
+        self.loader = CollectionLoader(self)
+        self.loader.loaded.connect(self._on_collection_loaded)
+        self.loader.failed.connect(self._on_collection_failed)
+        self.loader.start()
+
+    def _on_collection_loaded(self, collection: BookCollection, error: Exception | None):
+        from load_report import print_load_report
+        from quote_manager import QuoteManager
+
+        print_load_report(collection.load_report)
+
+        self.quote_manager = QuoteManager(self)
+        self.refresh_collection(collection)
+        self._init_signals()
+        self._init_watcher()
+        self.quote_manager.open_history(self.collection)
+
+        self.statusBar().hide()
+        self.panel.setEnabled(True)
+        self.loader = None
+
+        if error:
+            self.log(f"Error reading JSON file: {error}")
+
+    def _on_collection_failed(self, error: Exception):
+        from book_collection import BookCollection
+
+        # an empty collection keeps the window usable, Reset loads it again
+        QMessageBox.critical(self, "Loading failed", f"The collection could not be loaded:\n{error}")
+        self._on_collection_loaded(BookCollection(), error)
+
+    #=================================================
+    # auto-refresh (library source changed)
+    #=================================================
+    def _init_watcher(self):
+        from library_watcher import LibraryWatcher
+
+        if not constants.AUTO_REFRESH:
+            return
+        self.watcher = LibraryWatcher(self.collection, constants.AUTO_REFRESH_DEBOUNCE_MS)
+        self.watcher_timer = QTimer(self)
+        self.watcher_timer.timeout.connect(self._poll_library)
+        self.watcher_timer.start(constants.AUTO_REFRESH_POLL_MS)
+
+    def _poll_library(self):
+        # the reload runs on a worker thread, this only picks up its result
+        result = self.watcher.poll()
+        if result is None:
+            return
+        collection, error = result
+        if error:
+            self.log(f"Error reloading JSON file: {error}")
+        else:
+            self.refresh_collection(collection)
+
+    def refresh_collection(self, collection: BookCollection):
+        # keep the current selection where it still exists
+        # the folder and author items hold their value, the text has the count
+        folder = self.folders_dropdown.currentData()
+        author = self.authors_dropdown.currentData()
+        book = self.books_dropdown.currentData()
+
+        # the watcher keeps a reference, so later loads are adopted in place
+        if self.collection is None:
+            self.collection = collection
+        else:
+            self.collection.adopt(collection)
+            self.quote_manager.restore_selection(self.collection.books)
+        self._init_data()
+
+        # refill the dropdowns without triggering a change per step
+        for cb in (self.folders_dropdown, self.authors_dropdown):
+            cb.blockSignals(True)
+
+        self._fill_folders_dropdown()
+        self.folders_dropdown.setCurrentIndex(max(0, self.folders_picker.picker.row_of(folder)))
+
+        self._fill_authors_dropdown(self.folders_dropdown.currentData())
+        self.authors_dropdown.setCurrentIndex(max(0, self.authors_picker.picker.row_of(author)))
+
+        for cb in (self.folders_dropdown, self.authors_dropdown):
+            cb.blockSignals(False)
+
+        # rebuild the books list, then select the book again
+        self.on_folder_or_author_change()
+        self.books_dropdown.setCurrentIndex(max(0, self.books_picker.picker.row_of(book)))
+
     #=================================================
     # FUNCTION: folder/author dropdown change
     #=================================================
     def on_folder_or_author_change(self):
-        chosen_folder = self.folders_dropdown.currentText()
-        chosen_author = self.authors_dropdown.currentText()
+        from book_filter import book_index
+
+        chosen_folder = self.folders_dropdown.currentData()
+        chosen_author = self.authors_dropdown.currentData()
 
         # gets the trigger widget, update authors dropdown if folder changed
         if self.sender() == self.folders_dropdown:
-            if chosen_folder == constants.ANY_FOLDER:
-                # use full list (again)
-                authors = [constants.ANY_AUTHOR] + self.authors_with_quotes
-            else:
-                # build list based on current folder (set comprehension)
-                folder_authors = {
-                    book.author
-                    for book in self.collection.books
-                    if book.folder == chosen_folder and book.total_quotes > 0
-                }
-                folder_authors = sorted(folder_authors)
-                authors = [constants.ANY_AUTHOR] + folder_authors
-
-            self.authors_dropdown.clear()
-            self.authors_dropdown.addItems(authors)
+            self.authors_dropdown.blockSignals(True)
+            self._fill_authors_dropdown(chosen_folder)
             self.authors_dropdown.setCurrentIndex(0)
+            self.authors_dropdown.blockSignals(False)
             chosen_author = constants.ANY_AUTHOR
 
-        # update books based on current folder and author
-        self.filtered_books = [constants.ANY_BOOK]
-        for book in self.collection.books:
-            if chosen_folder != constants.ANY_FOLDER and book.folder != chosen_folder:
-                continue
-            if chosen_author != constants.ANY_AUTHOR and book.author != chosen_author:
-                continue
-            if book.total_quotes > 0:
-                self.filtered_books.append(book.title)
-
-        self.books_dropdown.clear()
-        self.books_dropdown.addItems(self.filtered_books)
+        # update books based on current folder and author (intersection of their bitsets)
+        index = book_index(self.collection)
+        self.filtered_books = [constants.ANY_BOOK] + index.titles_of(index.select(chosen_folder, chosen_author))
+
+        self.books_picker.set_items(self.filtered_books)
         self.books_dropdown.setCurrentIndex(0)
 
+    def _fill_folders_dropdown(self):
+        from book_filter import book_index, facet_label
+
+        # every folder with its number of books with quotes
+        index = book_index(self.collection)
+        counts = index.folder_counts(index.with_quotes)
+        counts[constants.ANY_FOLDER] = index.count(index.with_quotes)
+        folders = [constants.ANY_FOLDER] + sorted(self.collection.folders)
+        self.folders_picker.set_items(folders, [facet_label(folder, counts.get(folder, 0)) for folder in folders])
+
+    def _fill_authors_dropdown(self, chosen_folder):
+        from book_filter import book_index, facet_label
+
+        # the authors with quotes in the folder, with their number of books there
+        index = book_index(self.collection)
+        mask = index.select(chosen_folder)
+        counts = index.author_counts(mask)
+        authors = [constants.ANY_AUTHOR, *counts]
+        counts[constants.ANY_AUTHOR] = index.count(mask)
+        self.authors_picker.set_items(authors, [facet_label(author, counts[author]) for author in authors])
+
     #=================================================
     # FUNCTION: adjust buttons function
     #=================================================
@@ -447,18 +702,20 @@ class MainWindow(QMainWindow):
         # make sure text output is visible
         self.show_text_output()
         # use insertPlainText to prevent automatic scrolling
+        start = self.text_output.textCursor().position()
         self.text_output.insertPlainText(message + "\n")
-        self.set_output_line_height(self.line_height_percent)
+        # only the inserted blocks need the line height, not the whole output
+        self.set_output_line_height(self.line_height_percent, start, self.text_output.textCursor().position())
         if scroll_to_bottom:
             self.scroll_to_bottom()
 
-    def set_output_line_height(self, line_height_percent):
+    def set_output_line_height(self, line_height_percent, start: int = 0, end: int | None = None):
         cursor = self.text_output.textCursor()
         cursor.beginEditBlock()
 
-        # iterate over all blocks in the document
-        block = self.text_output.document().firstBlock()
-        while block.isValid():
+        # iterate over the blocks between the positions (default: all of them)
+        block = self.text_output.document().findBlock(start)
+        while block.isValid() and (end is None or block.position() <= end):
             # select block
             cursor.setPosition(block.position())
             cursor.setPosition(block.position() + block.length() - 1, QTextCursor.MoveMode.KeepAnchor)
@@ -532,28 +789,26 @@ class MainWindow(QMainWindow):
         return headers, indexes
 
     def _get_filtered_books(self, book_property):
-        folder = self.folders_dropdown.currentText()
+        from book_filter import book_index
 
-        books = (
-            self.collection.books
-            if folder == constants.ANY_FOLDER
-            else [b for b in self.collection.books if b.folder == folder]
-        )
-        # further filter books based on selected property
+        index = book_index(self.collection)
+        folder = self.folders_dropdown.currentData()
+
+        # further filter books based on selected property (read state bitset)
         if book_property == constants.PROP_READING_NOW:
-            return [b for b in books if b.activity_time and not b.is_read]
+            return [b for b in index.books_of(index.select(folder, with_quotes=False, read=False)) if b.activity_time]
 
         if book_property == constants.PROP_FINISHED_LIST:
-            return [b for b in books if b.is_read]
+            return index.books_of(index.select(folder, with_quotes=False, read=True))
 
         if book_property == constants.PROP_READ_DURATION:
             return sorted(
-                (b for b in books if b.is_read),
+                index.books_of(index.select(folder, with_quotes=False, read=True)),
                 key=lambda b: b.first_q_timestamp,
                 reverse=True
             )
 
-        return books
+        return index.books_of(index.select(folder, with_quotes=False))
 
     def _build_row_items(self, book, book_property, displayed_indexes):
         if book_property == constants.PROP_READ_DURATION:
@@ -571,7 +826,7 @@ class MainWindow(QMainWindow):
             int(book.published_date),
             float(book.rating),
             book.ratings_count,
-            book.folder,
+            ", ".join(book.folders) or book.folder,
             int(book.total_quotes),
             int(book.pages_count),
             book.quotes_per_page,
@@ -655,10 +910,25 @@ class MainWindow(QMainWindow):
         # reset QuoteManager state
         self.quote_manager.reset_state()
 
-        # rebuild collection and reset dropdowns
+        # rebuild collection and reset dropdowns, shown quotes are forgotten
+        self.quote_manager.clear_selection()
         self.collection.build_the_collection()
+        # indexed now, not on the first search
+        if constants.SEARCH_INDEX_AT_LOAD:
+            from quote_search import search_index
+            search_index(self.collection)
+        self.quote_manager.ensure_history(self.collection)
+
+        # dropdown lists of the new books (e.g. the folders after a failed first load)
+        self._init_data()
+        for cb in (self.folders_dropdown, self.authors_dropdown):
+            cb.blockSignals(True)
+        self._fill_folders_dropdown()
+        self._fill_authors_dropdown(constants.ANY_FOLDER)
         self.folders_dropdown.setCurrentIndex(0)
         self.authors_dropdown.setCurrentIndex(0)
+        for cb in (self.folders_dropdown, self.authors_dropdown):
+            cb.blockSignals(False)
         self.books_dropdown.setCurrentIndex(0)
         # build full dropdown lists again
         self.on_folder_or_author_change()
@@ -715,15 +985,15 @@ class MainWindow(QMainWindow):
         self.text_output.setTextCursor(cursor)
         self.text_output.ensureCursorVisible()
 
-    def get_collection_books(self) -> list[Book]:
-        # provide a copy of the original list
-        return list(self.collection.books)
+    def get_collection(self) -> BookCollection:
+        return self.collection
 
     def get_filtered_books(self) -> list[str]:
         return self.filtered_books
 
     def get_selected_book_title(self) -> str:
-        return self.books_dropdown.currentText()
+        # the value, the text may be typed
+        return self.books_dropdown.currentData()
 
     def get_book_by_title(self, title: str) -> Book | None:
         return self.collection.get_book_by_title(title)
@@ -732,6 +1002,8 @@ class MainWindow(QMainWindow):
     # FUNCTION: print statistics
     #=================================================
     def print_statistics(self):
+        from book_statistics import Statistics, StatisticsReporter
+
         self.clear()
         reporter = StatisticsReporter(self.log)
         reporter.report(
@@ -749,6 +1021,8 @@ class MainWindow(QMainWindow):
     # FUNCTION: print quote distribution
     #=================================================
     def print_quote_distribution(self):
+        import book_utils
+
         self.clear()
 
         # get the book
@@ -789,6 +1063,9 @@ class MainWindow(QMainWindow):
     # FUNCTION: search in quotes
     #=================================================
     def search(self):
+        from book_filter import book_index
+        from search_query import QueryError, search
+
         # create normal/match text formats
         fmt_normal = QTextCharFormat()
         fmt_normal.setFontWeight(QFont.Weight.Normal)
@@ -799,7 +1076,7 @@ class MainWindow(QMainWindow):
         fmt_match.setFontWeight(QFont.Weight.Bold)
 
         # popup for user input
-        text, ok = QInputDialog.getText(self, "Search", "Enter at least 3 characters:")
+        text, ok = QInputDialog.getText(self, "Search", "Enter at least 3 characters (~ for fuzzy):")
         if not ok:
             # user canceled
             return
@@ -807,50 +1084,65 @@ class MainWindow(QMainWindow):
             self.clear()
 
         # check length
-        str_to_search = text.strip().lower()
+        str_to_search = text.strip()
         if len(str_to_search) < 3:
             self.log("Incorrect input. Please enter at least 3 characters.\n")
             return
 
+        # both indexes number the books in collection order
         selected_title = self.get_selected_book_title()
         if selected_title == constants.ANY_BOOK:
-            books = [book for book in self.collection.books if book.title in self.filtered_books]
+            index = book_index(self.collection)
+            scope = set(index.positions_of(index.mask_of_titles(self.filtered_books)))
         else:
-            book = self.collection.get_book_by_title(selected_title)
-            books = [book] if book else []
+            position = book_index(self.collection).position(selected_title)
+            scope = set() if position is None else {position}
+
+        try:
+            hits, titles, fuzzy = search(self.collection, str_to_search, scope)
+        except QueryError as e:
+            self.log(f"Invalid query: {e}\n")
+            return
+
+        # fuzzy results are ranked: the closest books, then the quotes best first
+        if fuzzy:
+            self.log("Closest results (fuzzy search):\n")
+            for position, score in titles:
+                self.log(f"{self.collection.books[position].title}  ({score:.2f})")
+            if titles:
+                self.log('\n')
 
         counter = 0
-        for book in books:
-            match_in_book = False
-            for quote in book.get_all_quotes_list():
-                quote_text = quote.text.lower()
-                if str_to_search in quote_text:
-                    if not match_in_book:
-                        self.log(f"{book.title}\n{'-'*len(book.title)}")
-                        match_in_book = True
-                    self.log('\n')
-                    self.highlight(quote.text, str_to_search, fmt_normal, fmt_match)
-                    counter += len(re.findall(str_to_search, quote_text))
+        last_book = None
+        for hit in hits:
+            if hit.book is not last_book:
+                self.log(f"{hit.book.title}\n{'-'*len(hit.book.title)}")
+                last_book = hit.book
+            self.log(f"\n({hit.score:.2f})" if fuzzy else '\n')
+            self.highlight(hit.quote.text, hit.spans, fmt_normal, fmt_match)
+            counter += len(hit.spans)
 
         # print result summary
         result = f"\nMatched {counter} time{'s' if counter != 1 else ''}."
-        self.log(result if counter else "No match found.")
         if counter:
+            self.log(result)
             self.log('-'*len(result))
+        elif not titles:
+            self.log("No match found.")
 
 
-    def highlight(self, text, term, fmt_normal, fmt_match):
+    def highlight(self, text, spans, fmt_normal, fmt_match):
         cursor = self.text_output.textCursor()
         cursor.movePosition(QTextCursor.MoveOperation.End)
 
-        pattern = re.compile(re.escape(term), re.IGNORECASE)
         last_pos = 0
 
-        for match in pattern.finditer(text):
+        # offsets of the matches found by the search
+        for start, end in spans:
             # insert text before match (normal) and match with modified
-            cursor.insertText(text[last_pos:match.start()], fmt_normal)
-            cursor.insertText(text[match.start():match.end()], fmt_match)
-            last_pos = match.end()
+            cursor.insertText(text[last_pos:start], fmt_normal)
+            cursor.insertText(text[start:end], fmt_match)
+            last_pos = end
 
         # insert the remaining text after last match
         cursor.insertText(text[last_pos:], fmt_normal)
@@ -860,10 +1152,10 @@ class MainWindow(QMainWindow):
 # MAIN
 #=================================================
 if __name__ == "__main__":
-    The_Collection = BookCollection()
-    error = The_Collection.build_the_collection()
+    # --seed and --record (see quote_rng), the other arguments are Qt's
+    quote_rng.apply_command_line()
     app = QApplication(sys.argv)
-    window = MainWindow(The_Collection)
-    if error:
-        window.log(f"Error reading JSON file: {error}")
+    # the window is shown at once, the collection is loaded in the background
+    window = MainWindow()
+    window.load_collection()
     sys.exit(app.exec())
@@ -0,0 +1,119 @@
+#=================================================
+# IMPORT
+#=================================================
+import atexit
+import os
+import struct
+import threading
+
+from collections.abc import Iterable
+
+#=================================================
+# CLASSES
+#=================================================
+class RecordLog:
+    """
+    Append-only file of fixed-size struct records behind a magic header.
+    append() only queues a record, a flusher thread writes and fsyncs the
+    queued records in batches, so the caller never waits on the disk.
+    Owners replay read() on startup and rewrite() the live records to compact.
+    """
+
+    def __init__(self, path: str, magic: bytes, record: struct.Struct, flush_ms: int) -> None:
+        self.path = path
+        self.magic = magic
+        self.record = record
+        self.flush_interval: float = flush_ms / 1000
+        # records in the file (including written batches)
+        self.size: int = 0
+
+        self._file = None
+        self._pending: list[bytes] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    #=================================================
+    # reading and compaction (before open)
+    #=================================================
+    def read(self) -> list[tuple] | None:
+        """
+        Return the records of the file, None if it is missing or not a log
+        of this kind. A record cut short by a crash is dropped.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                if file.read(len(self.magic)) != self.magic:
+                    return None
+                data = file.read()
+        except OSError:
+            return None
+
+        usable = len(data) - len(data) % self.record.size
+        records = list(self.record.iter_unpack(memoryview(data)[:usable]))
+        self.size = len(records)
+        return records
+
+    def rewrite(self, records: Iterable[tuple]) -> None:
+        # the new content replaces the file atomically
+        tmp_path = f"{self.path}.tmp"
+        count = 0
+        with open(tmp_path, "wb") as file:
+            file.write(self.magic)
+            for values in records:
+                file.write(self.record.pack(*values))
+                count += 1
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        self.size = count
+
+    #=================================================
+    # appending
+    #=================================================
+    def open(self) -> None:
+        self._file = open(self.path, "ab")
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.close)
+
+    def append(self, *values) -> None:
+        data = self.record.pack(*values)
+        with self._lock:
+            self._pending.append(data)
+        self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            # records of the next interval go into the same write
+            self._stop.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with self._write_lock:
+            if self._file is None or self._file.closed:
+                return
+            try:
+                self._file.write(b"".join(pending))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                # the owner still has the state in memory for this session
+                return
+            self.size += len(pending)
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
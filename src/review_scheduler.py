@@ -0,0 +1,238 @@
+#=================================================
+# IMPORT
+#=================================================
+import heapq
+import os
+import quote_rng
+import random
+import struct
+import time
+
+from book_collection import Book, BookCollection, Quote
+from collections.abc import Iterable
+from constants_loader import constants
+from record_log import RecordLog
+from selection_journal import book_key
+
+#=================================================
+# CONSTANTS
+#=================================================
+REVIEW_MAGIC = b"RCREVW\x00\x01"
+
+# book key, note_insert_time, due (epoch seconds), interval (days), ease, repetitions
+RECORD = struct.Struct("<QqdffI")
+
+# SM-2 response quality of the feedback keys (below 3 = not remembered)
+GRADE_QUALITY = {"again": 1, "seen": 4, "easy": 5}
+MIN_EASE = 1.3
+
+# rewrite the file once it holds this many records more than twice the live ones
+COMPACT_SLACK = 1024
+
+#=================================================
+# CLASSES
+#=================================================
+class ReviewState:
+    __slots__ = ("due", "interval", "ease", "repetitions")
+
+    def __init__(self, due: float, interval: float, ease: float, repetitions: int) -> None:
+        self.due = due
+        self.interval = interval
+        self.ease = ease
+        self.repetitions = repetitions
+
+
+class ReviewScheduler:
+    """
+    SM-2 style spaced repetition over quotes. Graded quotes in scope are kept
+    in a heap keyed by their next due time, so the next due quote is served
+    and a graded quote rescheduled in O(log n). A rescheduled quote leaves its
+    old heap entry behind, it is dropped when it reaches the top.
+    Due quotes come first, then quotes that were never graded, in random order
+    (drawn from a pool like Book's quote decks).
+    The states are persisted in a RecordLog, the last record of a quote wins.
+    """
+
+    def __init__(self, path: str | None = None, flush_ms: int = 0, rng: random.Random | None = None) -> None:
+        # new quotes are drawn from rng (default: the review stream)
+        self.rng: random.Random = rng or quote_rng.review_stream
+
+        # book key -> note_insert_time -> state, for every quote ever graded
+        self.states: dict[int, dict[int, ReviewState]] = {}
+
+        # scope: heap of (due, sequence, book, quote) and the never graded quotes
+        # (parallel lists, no object per quote), the first _new_left are unserved
+        self._books: set[Book] = set()
+        self._heap: list[tuple[float, int, Book, Quote]] = []
+        self._new_books: list[Book] = []
+        self._new_quotes: list[Quote] = []
+        self._new_left: int = 0
+        self._sequence: int = 0
+
+        self._log: RecordLog | None = None
+        if path is not None:
+            self._open_log(path, flush_ms)
+
+    def _open_log(self, path: str, flush_ms: int) -> None:
+        log = RecordLog(path, REVIEW_MAGIC, RECORD, flush_ms)
+        records: list[tuple] | None = log.read()
+        for key, insert_time, due, interval, ease, repetitions in records or ():
+            self.states.setdefault(key, {})[insert_time] = ReviewState(due, interval, ease, repetitions)
+
+        live = sum(len(book_states) for book_states in self.states.values())
+        if records is None or log.size > 2 * live + COMPACT_SLACK:
+            log.rewrite(
+                (key, insert_time, state.due, state.interval, state.ease, state.repetitions)
+                for key, book_states in self.states.items()
+                for insert_time, state in book_states.items()
+            )
+        log.open()
+        self._log = log
+
+    #=================================================
+    # scope
+    #=================================================
+    def set_books(self, books: Iterable[Book]) -> None:
+        """
+        Review the quotes of these books (O(n), states are kept).
+        """
+        self._books = set()
+        self._heap = []
+        new_books: list[Book] = []
+        new_quotes: list[Quote] = []
+        for book in books:
+            self._books.add(book)
+            quotes = book.get_all_quotes_list()
+            book_states = self.states.get(book_key(book))
+            if book_states:
+                graded = [quote for quote in quotes if quote.insert_time in book_states]
+                for quote in graded:
+                    self._push(book_states[quote.insert_time].due, book, quote)
+                if graded:
+                    quotes = [quote for quote in quotes if quote.insert_time not in book_states]
+            new_quotes.extend(quotes)
+            new_books.extend([book] * len(quotes))
+
+        heapq.heapify(self._heap)
+        self._new_books = new_books
+        self._new_quotes = new_quotes
+        self._new_left = len(new_quotes)
+        self._next_new()
+
+    #=================================================
+    # serving and grading
+    #=================================================
+    def next_due(self, now: float | None = None) -> tuple[Book, Quote] | None:
+        """
+        Return (book, quote) to review next, None if nothing is due yet.
+        """
+        if now is None:
+            now = time.time()
+        due = self.next_due_time()
+        if due is not None and due <= now:
+            _, _, book, quote = self._heap[0]
+            return book, quote
+        if self._new_left:
+            return self._new_books[self._new_left - 1], self._new_quotes[self._new_left - 1]
+        return None
+
+    def next_due_time(self) -> float | None:
+        # of the graded quotes in scope
+        heap = self._heap
+        while heap:
+            due, _, book, quote = heap[0]
+            state = self.state_of(book, quote)
+            if state is not None and state.due == due:
+                return due
+            # superseded by a later grade
+            heapq.heappop(heap)
+        return None
+
+    def grade(self, book: Book, quote: Quote, grade: str, now: float | None = None) -> ReviewState:
+        """
+        Reschedule the quote from the feedback ("again", "seen" or "easy").
+        """
+        if now is None:
+            now = time.time()
+        quality = GRADE_QUALITY[grade]
+        key = book_key(book)
+
+        book_states = self.states.setdefault(key, {})
+        state = book_states.get(quote.insert_time)
+        if state is None:
+            state = book_states[quote.insert_time] = ReviewState(0.0, 0.0, constants.REVIEW_INITIAL_EASE, 0)
+
+        if quality < 3:
+            # not remembered: start over, shown again later in the session
+            state.repetitions = 0
+            state.interval = 0.0
+            state.due = now + constants.REVIEW_AGAIN_MINUTES * 60
+        else:
+            state.repetitions += 1
+            if state.repetitions == 1:
+                state.interval = 1.0
+            elif state.repetitions == 2:
+                state.interval = 6.0
+            else:
+                state.interval *= state.ease
+            state.due = now + state.interval * constants.ONE_DAY_IN_SECONDS
+        state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        if book in self._books:
+            heapq.heappush(self._heap, self._entry(state.due, book, quote))
+            self._drop_graded_new()
+        if self._log is not None:
+            self._log.append(key, quote.insert_time, state.due, state.interval, state.ease, state.repetitions)
+        return state
+
+    def state_of(self, book: Book, quote: Quote) -> ReviewState | None:
+        book_states = self.states.get(book_key(book))
+        return book_states.get(quote.insert_time) if book_states else None
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+
+    #=================================================
+    # helpers
+    #=================================================
+    def _entry(self, due: float, book: Book, quote: Quote) -> tuple[float, int, Book, Quote]:
+        # the sequence number keeps the comparison away from books and quotes
+        self._sequence += 1
+        return due, self._sequence, book, quote
+
+    def _push(self, due: float, book: Book, quote: Quote) -> None:
+        self._heap.append(self._entry(due, book, quote))
+
+    def _next_new(self) -> None:
+        # the candidate is the last unserved new quote: swap a random one there,
+        # so the pool is shuffled lazily, one quote per review
+        last = self._new_left - 1
+        if last >= 0:
+            i = self.rng.randrange(last + 1)
+            books, quotes = self._new_books, self._new_quotes
+            books[i], books[last] = books[last], books[i]
+            quotes[i], quotes[last] = quotes[last], quotes[i]
+
+    def _drop_graded_new(self) -> None:
+        # a graded candidate leaves the pool (quotes graded out of turn leave it
+        # when they become the candidate)
+        while self._new_left and self.state_of(self._new_books[self._new_left - 1], self._new_quotes[self._new_left - 1]) is not None:
+            self._new_left -= 1
+            self._next_new()
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def open_review_scheduler(collection: BookCollection) -> ReviewScheduler:
+    """
+    Scheduler with the review states stored next to the library source,
+    kept in memory only if the file cannot be written.
+    """
+    if collection.source_path:
+        path = os.path.join(os.path.dirname(collection.source_path), constants.REVIEW_FILE)
+        try:
+            return ReviewScheduler(path, constants.SELECTION_JOURNAL_FLUSH_MS)
+        except OSError:
+            pass
+    return ReviewScheduler()
@@ -0,0 +1,371 @@
+#=================================================
+# IMPORT
+#=================================================
+import re
+
+from book_collection import BookCollection
+from book_filter import BookIndex, book_index
+from constants_loader import constants
+from fuzzy_search import fuzzy_index
+from quote_search import QuoteSearchIndex, SearchHit, search_index
+
+#=================================================
+# CONSTANTS
+#=================================================
+# scopes of a field:value term, a term without one searches the quote text
+FIELDS = ("author", "folder", "title", "page", "year")
+OPERATORS = ("AND", "OR", "NOT")
+# a query starting with it is searched fuzzy
+FUZZY_PREFIX = "~"
+
+# a parenthesis or a term: optionally negated (-), scoped (field:),
+# a "phrase" (the closing quote may be missing) or a word
+TOKEN_PATTERN = re.compile(
+    r'\s*(?:(?P<paren>[()])|(?P<neg>-)?(?:(?P<field>\w+):)?(?:"(?P<phrase>[^"]*)"?|(?P<word>[^\s()"]+)))'
+)
+RANGE_PATTERN = re.compile(r"(\d+)(?:-(\d+))?")
+
+#=================================================
+# CLASSES
+#=================================================
+class QueryError(ValueError):
+    pass
+
+
+class Term:
+    __slots__ = ("field", "value")
+
+    def __init__(self, field: str | None, value: str) -> None:
+        # None: the quote text
+        self.field = field
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"{self.field}:{self.value!r}" if self.field else repr(self.value)
+
+
+class Not:
+    __slots__ = ("child",)
+
+    def __init__(self, child: "Node") -> None:
+        self.child = child
+
+    def __repr__(self) -> str:
+        return f"NOT {self.child!r}"
+
+
+class And:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list["Node"]) -> None:
+        self.children = children
+
+    def __repr__(self) -> str:
+        return "(" + " AND ".join(map(repr, self.children)) + ")"
+
+
+class Or:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list["Node"]) -> None:
+        self.children = children
+
+    def __repr__(self) -> str:
+        return "(" + " OR ".join(map(repr, self.children)) + ")"
+
+
+Node = Term | Not | And | Or
+
+
+class _Parser:
+    """
+    query   := and (OR and)*
+    and     := unary ([AND] unary)*
+    unary   := NOT unary | ( query ) | term
+    """
+
+    def __init__(self, tokens: list[str | Term]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise QueryError("The query is empty.")
+        node = self._query()
+        if self.pos < len(self.tokens):
+            raise QueryError("Unmatched ')'.")
+        return node
+
+    def _peek(self) -> str | Term | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _query(self) -> Node:
+        children = [self._and()]
+        while self._peek() == "OR":
+            self.pos += 1
+            children.append(self._and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _and(self) -> Node:
+        children = [self._unary()]
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.pos += 1
+            children.append(self._unary())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _unary(self) -> Node:
+        token = self._peek()
+        self.pos += 1
+        if token is None:
+            raise QueryError("The query ends with an operator.")
+        if isinstance(token, Term):
+            return token
+        if token == "NOT":
+            return Not(self._unary())
+        if token == "(":
+            node = self._query()
+            if self._peek() != ")":
+                raise QueryError("Missing ')'.")
+            self.pos += 1
+            return node
+        if token == ")":
+            raise QueryError("Unmatched ')'.")
+        raise QueryError(f"{token} needs a term on both sides.")
+
+#=================================================
+# FUNCTIONS: parsing
+#=================================================
+def tokenize(text: str) -> list[str | Term]:
+    """
+    Split a query in parentheses, operators (AND, OR, NOT in capitals, a
+    leading - is NOT) and terms. field:value is a scoped term for the
+    FIELDS, any other word with a colon is searched as it is.
+    """
+    tokens: list[str | Term] = []
+    text = text.strip()
+    pos = 0
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        pos = match.end()
+        if match["paren"]:
+            tokens.append(match["paren"])
+            continue
+
+        field, phrase, word = match["field"], match["phrase"], match["word"]
+        if phrase is None and not match["neg"] and not field and word in OPERATORS:
+            tokens.append(word)
+            continue
+        if field and field.lower() not in FIELDS:
+            # not a scope, e.g. a time like 10:30
+            word = f"{field}:{word if phrase is None else phrase}"
+            phrase, field = None, None
+
+        value = (phrase if phrase is not None else word).strip()
+        if not value:
+            continue
+        if match["neg"]:
+            tokens.append("NOT")
+        tokens.append(Term(field.lower() if field else None, value))
+    return tokens
+
+def parse_query(text: str) -> Node:
+    """
+    Return the tree of a query, raises QueryError if it is not valid.
+    Adjacent terms must all match (AND), AND binds tighter than OR.
+    """
+    return _Parser(tokenize(text)).parse()
+
+def highlighted_texts(node: Node, negated: bool = False) -> list[str]:
+    """
+    Return the texts of the quote text terms that are not negated.
+    """
+    if isinstance(node, Term):
+        return [node.value] if node.field is None and not negated else []
+    if isinstance(node, Not):
+        return highlighted_texts(node.child, not negated)
+    return [text for child in node.children for text in highlighted_texts(child, negated)]
+
+def fuzzy_text(node: Node) -> str:
+    """
+    Return the words of the terms that are not negated and search text,
+    titles or authors (what a fuzzy search looks for).
+    """
+    if isinstance(node, Term):
+        return node.value if node.field in (None, "title", "author") else ""
+    if isinstance(node, Not):
+        return ""
+    return " ".join(filter(None, map(fuzzy_text, node.children)))
+
+#=================================================
+# FUNCTIONS: evaluation
+#=================================================
+def search(
+    collection: BookCollection,
+    text: str,
+    scope: set[int] | None = None
+) -> tuple[list[SearchHit], list[tuple[int, float]], bool]:
+    """
+    Return the quotes and the (book position, score) title matches of a query
+    (see run_query) and whether they are fuzzy: a query starting with
+    FUZZY_PREFIX is, so is one that finds nothing if FUZZY_SEARCH_FALLBACK
+    is on. Fuzzy results are the FUZZY_TOP_K best, best first.
+    """
+    text = text.strip()
+    if text.startswith(FUZZY_PREFIX):
+        return (*_fuzzy(collection, text[len(FUZZY_PREFIX):], scope), True)
+
+    hits, titles = run_query(collection, text, scope)
+    words = fuzzy_text(parse_query(text)) if not (hits or titles) and constants.FUZZY_SEARCH_FALLBACK else ""
+    if not words:
+        return hits, [(position, 1.0) for position in titles], False
+    return (*_fuzzy(collection, words, scope), True)
+
+def _fuzzy(
+    collection: BookCollection,
+    text: str,
+    scope: set[int] | None
+) -> tuple[list[SearchHit], list[tuple[int, float]]]:
+    index = fuzzy_index(collection)
+    return (
+        index.find_quotes(text, scope, constants.FUZZY_TOP_K),
+        index.find_books(text, scope, constants.FUZZY_TOP_K)
+    )
+
+def run_query(
+    collection: BookCollection,
+    text: str,
+    scope: set[int] | None = None
+) -> tuple[list[SearchHit], list[int]]:
+    """
+    Return the quotes (long and short) of the scope's books matching the query,
+    with the spans of its text terms, and the positions of the books whose title
+    matches it if it only has text terms (and one that is not negated).
+    Terms are looked up in the search index (quote_search) and the facet
+    bitsets (book_filter), the operators are set operations on quote ids.
+    """
+    node = parse_query(text)
+    quotes = search_index(collection)
+    facets = book_index(collection)
+
+    # matches come from the postings and facet masks, the scope is tested per match
+    ids = _evaluate(node, None, scope, quotes, facets)
+
+    texts = highlighted_texts(node)
+    titles: list[int] = []
+    if texts and not _has_fields(node):
+        titles = sorted(_title_positions(node, None, scope, quotes))
+    return quotes.hits(ids, texts), titles
+
+def _evaluate(
+    node: Node,
+    ids: set[int] | None,
+    scope: set[int] | None,
+    quotes: QuoteSearchIndex,
+    facets: BookIndex
+) -> set[int]:
+    # the quotes of ids matching node, ids None: any quote of the scope
+    if isinstance(node, Term):
+        return _term_ids(node, ids, scope, quotes, facets)
+    if isinstance(node, Not):
+        # the quotes of the scope are only listed for a NOT with nothing to subtract from
+        if ids is None:
+            ids = set(range(len(quotes.quotes))) if scope is None else quotes.quotes_of(scope)
+        return ids - _evaluate(node.child, ids, scope, quotes, facets)
+    if isinstance(node, Or):
+        result: set[int] = set()
+        for child in node.children:
+            result |= _evaluate(child, ids, scope, quotes, facets)
+        return result
+
+    # index-only scopes first, every term then only checks what is left
+    for child in sorted(node.children, key=_cost):
+        ids = _evaluate(child, ids, scope, quotes, facets)
+        if not ids:
+            break
+    return ids
+
+def _has_fields(node: Node) -> bool:
+    if isinstance(node, Term):
+        return node.field is not None
+    if isinstance(node, Not):
+        return _has_fields(node.child)
+    return any(map(_has_fields, node.children))
+
+def _title_positions(
+    node: Node,
+    positions: set[int] | None,
+    scope: set[int] | None,
+    quotes: QuoteSearchIndex
+) -> set[int]:
+    # the books of positions whose title matches node (text terms only),
+    # positions None: any book of the scope
+    if isinstance(node, Term):
+        return set(quotes.find_titles(node.value, scope if positions is None else positions))
+    if isinstance(node, Not):
+        if positions is None:
+            positions = set(range(quotes.size)) if scope is None else scope
+        return positions - _title_positions(node.child, positions, scope, quotes)
+    if isinstance(node, Or):
+        result: set[int] = set()
+        for child in node.children:
+            result |= _title_positions(child, positions, scope, quotes)
+        return result
+    for child in sorted(node.children, key=_cost):
+        positions = _title_positions(child, positions, scope, quotes)
+        if not positions:
+            break
+    return positions
+
+def _cost(node: Node) -> int:
+    if isinstance(node, Term):
+        return 0 if node.field is not None else 1
+    return 2 if isinstance(node, Not) else 1
+
+def _term_ids(
+    term: Term,
+    ids: set[int] | None,
+    scope: set[int] | None,
+    quotes: QuoteSearchIndex,
+    facets: BookIndex
+) -> set[int]:
+    if term.field is None:
+        return quotes.find_quotes(term.value, scope) if ids is None else quotes.containing(term.value, ids)
+    if term.field == "page":
+        low, high = _parse_range(term)
+        if ids is None:
+            return quotes.in_scope(quotes.pages.between(low, high), scope)
+        texts = quotes.quotes
+        return {i for i in ids if low <= texts[i].page <= high}
+
+    # title and facets select books: every author/folder whose name contains
+    # the value, years in the range (names are strings, a book without an
+    # author is under "")
+    if term.field == "title":
+        positions = set(quotes.find_titles(term.value, scope))
+    else:
+        mask = 0
+        if term.field == "year":
+            low, high = _parse_range(term)
+            for year, bits in facets.by_year.items():
+                if low <= year <= high:
+                    mask |= bits
+        else:
+            key = term.value.lower()
+            facet = facets.by_author if term.field == "author" else facets.by_folder
+            for name, bits in facet.items():
+                if key in name.lower():
+                    mask |= bits
+        positions = {position for position in facets.positions_of(mask) if scope is None or position in scope}
+
+    if ids is None:
+        return quotes.quotes_of(positions)
+    quote_books = quotes.quote_books
+    return {i for i in ids if quote_books[i] in positions}
+
+def _parse_range(term: Term) -> tuple[int, int]:
+    match = RANGE_PATTERN.fullmatch(term.value)
+    if match is None:
+        raise QueryError(f"{term.field}: takes a number or a range like {term.field}:10-20, not '{term.value}'.")
+    low = int(match[1])
+    return low, int(match[2] or low)
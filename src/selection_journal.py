@@ -0,0 +1,142 @@
+#=================================================
+# IMPORT
+#=================================================
+import hashlib
+import os
+import struct
+
+from book_collection import Book, BookCollection, Quote
+from collections.abc import Container, Iterable
+from constants_loader import constants
+from functools import lru_cache
+from record_log import RecordLog
+
+#=================================================
+# CONSTANTS
+#=================================================
+JOURNAL_MAGIC = b"RCJRNL\x00\x01"
+
+# op, book key, note_insert_time (ms): 17 bytes per record
+RECORD = struct.Struct("<cQq")
+OP_SHOWN = b"S"
+OP_CLEAR_BOOK = b"B"
+OP_CLEAR_ALL = b"A"
+
+# rewrite the file once it holds this many records more than twice the live ones
+COMPACT_SLACK = 1024
+
+#=================================================
+# CLASSES
+#=================================================
+class SelectionJournal:
+    """
+    Append-only log of the quotes shown by random draws, so they stay selected
+    across restarts. A quote is identified by its doc uri and note_insert_time
+    (see quote_id). Recording is O(1), the records are written in batches by
+    the RecordLog flusher, so a draw never waits on the disk.
+    The file is replayed when opened and rewritten with the live records only
+    once it has grown well beyond them.
+    """
+
+    def __init__(self, path: str, flush_ms: int) -> None:
+        self.path = path
+        # book key -> note_insert_time of its shown quotes
+        self.shown: dict[int, set[int]] = {}
+
+        self._log = RecordLog(path, JOURNAL_MAGIC, RECORD, flush_ms)
+        records: list[tuple] | None = self._log.read()
+        for op, key, insert_time in records or ():
+            if op == OP_SHOWN:
+                self.shown.setdefault(key, set()).add(insert_time)
+            elif op == OP_CLEAR_BOOK:
+                self.shown.pop(key, None)
+            elif op == OP_CLEAR_ALL:
+                self.shown.clear()
+
+        # a missing or unreadable file is started over
+        live = sum(len(times) for times in self.shown.values())
+        if records is None or self._log.size > 2 * live + COMPACT_SLACK:
+            self._log.rewrite(
+                (OP_SHOWN, key, insert_time)
+                for key, times in self.shown.items()
+                for insert_time in times
+            )
+        self._log.open()
+
+    #=================================================
+    # recording (UI thread)
+    #=================================================
+    def record(self, book: Book, quote: Quote) -> None:
+        key = book_key(book)
+        self.shown.setdefault(key, set()).add(quote.insert_time)
+        self._log.append(OP_SHOWN, key, quote.insert_time)
+
+    def clear_book(self, book: Book) -> None:
+        key = book_key(book)
+        if self.shown.pop(key, None) is not None:
+            self._log.append(OP_CLEAR_BOOK, key, 0)
+
+    def clear_all(self) -> None:
+        self.shown.clear()
+        self._log.append(OP_CLEAR_ALL, 0, 0)
+
+    def close(self) -> None:
+        self._log.close()
+
+    #=================================================
+    # replay
+    #=================================================
+    def apply(self, books: Iterable[Book]) -> None:
+        """
+        Select the journaled quotes of the books (e.g. after a build or reload).
+        """
+        for book in books:
+            times = self.shown.get(book_key(book))
+            if times:
+                select_quotes(book, times)
+
+#=================================================
+# FUNCTIONS
+#=================================================
+@lru_cache(maxsize=None)
+def _uri_key(uri: str) -> int:
+    return int.from_bytes(hashlib.blake2b(uri.encode("utf8"), digest_size=8).digest(), "little")
+
+
+def book_key(book: Book) -> int:
+    # 64-bit hash of the doc uri, stable across launches and devices
+    return _uri_key(book.file_id)
+
+
+def quote_id(book: Book, quote: Quote) -> tuple[int, int]:
+    return book_key(book), quote.insert_time
+
+
+def select_quotes(book: Book, insert_times: Container[int]) -> None:
+    # exactly the quotes with these note_insert_times are selected,
+    # one bit per quote in get_all_quotes_list order
+    quotes = book.get_all_quotes_list()
+    bitmap = bytearray((len(quotes) + 7) // 8)
+    for i, quote in enumerate(quotes):
+        if quote.insert_time in insert_times:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    book.restore_selection(bitmap)
+
+
+def journal_path_for(source_path: str) -> str:
+    return os.path.join(os.path.dirname(source_path), constants.SELECTION_JOURNAL_FILE)
+
+
+def open_selection_journal(collection: BookCollection) -> SelectionJournal | None:
+    """
+    Open the journal next to the library source and select the quotes it
+    lists. None if journaling is off or the journal cannot be written.
+    """
+    if not constants.SELECTION_JOURNAL or not collection.source_path:
+        return None
+    try:
+        journal = SelectionJournal(journal_path_for(collection.source_path), constants.SELECTION_JOURNAL_FLUSH_MS)
+    except OSError:
+        return None
+    journal.apply(collection.books)
+    return journal
@@ -0,0 +1,239 @@
+#=================================================
+# IMPORT
+#=================================================
+import argparse
+import io
+import random
+import sys
+import time
+
+from book_collection import Book, BookCollection
+from collections.abc import Callable
+from constants_loader import constants
+from dataclasses import dataclass, field
+from quote_manager import QuoteManager
+from quote_sampler import WEIGHTINGS
+from quote_session import SessionRecorder, read_session
+from selection_journal import select_quotes
+from typing import Any
+
+#=================================================
+# CONSTANTS
+#=================================================
+# recorded actions that draw from the quote stream (see QuoteManager)
+DRAW_OPS = ("quote", "every")
+
+#=================================================
+# CLASSES
+#=================================================
+class HeadlessUI:
+    """
+    QuoteManagerUI without a window: the output is collected and the timers
+    run when the replay drains them.
+    """
+
+    def __init__(self, collection: BookCollection) -> None:
+        self.collection = collection
+        self.quote_manager: QuoteManager | None = None
+        self.output: list[str] = []
+        self.titles: list[str] = []
+        self.selected_title: str = constants.ANY_BOOK
+        self.timers: list[Callable[[], None]] = []
+
+    # output
+    def log(self, message: str, scroll_to_bottom: bool = False) -> None:
+        self.output.append(message)
+
+    def clear_text_output(self) -> None:
+        # like the GUIs: a cleared output starts the quote manager over
+        if self.quote_manager is not None:
+            self.quote_manager.reset_state()
+        self.output.clear()
+
+    # scheduling
+    def schedule(self, ms: int, callback) -> object:
+        self.timers.append(callback)
+        return callback
+
+    def cancel_timer(self, timer: object) -> None:
+        if timer in self.timers:
+            self.timers.remove(timer)
+
+    def run_timers(self) -> None:
+        while self.timers:
+            self.timers.pop(0)()
+
+    # navigation
+    def scroll_to_top(self) -> None:
+        pass
+
+    def scroll_to_bottom(self) -> None:
+        pass
+
+    # state
+    def delay_source_enabled(self) -> bool:
+        return False
+
+    def update_quotes_counter(self, use_book_total: bool = False) -> None:
+        pass
+
+    def set_quotes_counter(self, value: int) -> None:
+        pass
+
+    # data access
+    def get_selected_book_title(self) -> str:
+        return self.selected_title
+
+    def get_collection(self) -> BookCollection:
+        return self.collection
+
+    def get_filtered_books(self) -> list[str]:
+        return self.titles
+
+    def get_book_by_title(self, title: str) -> Book | None:
+        return self.collection.get_book_by_title(title)
+
+
+class ReplayCapture(SessionRecorder):
+    # keeps the events of the replayed actions instead of writing them
+    def __init__(self) -> None:
+        super().__init__(io.StringIO())
+        self.events: list[dict[str, Any]] = []
+
+    def _write(self, event: dict[str, Any]) -> None:
+        self.events.append(event)
+
+
+@dataclass
+class ReplayReport:
+    session_path: str
+    weighting: str = ""
+    events: int = 0
+    draws: int = 0
+    draw_seconds: float = 0.0
+    # (event index, recorded result, replayed result)
+    mismatches: list[tuple[int, Any, Any]] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        per_draw = self.draw_seconds / self.draws * 1e6 if self.draws else 0.0
+        lines = [
+            f"Replay of {self.session_path} ({self.weighting} weighting)",
+            f"  events:      {self.events}",
+            f"  draws:       {self.draws} in {self.draw_seconds * 1000:.1f} ms ({per_draw:.1f} us per draw)",
+            f"  mismatches:  {len(self.mismatches)}",
+        ]
+        if self.mismatches:
+            index, recorded, replayed = self.mismatches[0]
+            lines.append(f"  first at event {index}: recorded {recorded}, replayed {replayed}")
+        lines.extend(f"  note: {note}" for note in self.notes)
+        return "\n".join(lines)
+
+#=================================================
+# FUNCTIONS
+#=================================================
+def replay(
+    header: dict[str, Any],
+    events: list[dict[str, Any]],
+    collection: BookCollection,
+    session_path: str = "",
+    weighting: str | None = None
+) -> ReplayReport:
+    """
+    Run the recorded actions again on a freshly built collection, with the
+    recorded stream state and clock. With another weighting the draws are
+    timed but will not match the recording.
+    """
+    # the quotes selected when the recording started, the decks of the
+    # other books start fresh (as after a build)
+    selected: dict[str, list[int]] = header["selected"]
+    for book in collection.books:
+        select_quotes(book, set(selected.get(book.file_id, ())))
+
+    version, internal_state, gauss_next = header["state"]
+    rng = random.Random()
+    rng.setstate((version, tuple(internal_state), gauss_next))
+
+    ui = HeadlessUI(collection)
+    manager = QuoteManager(ui, rng)
+    ui.quote_manager = manager
+    capture = ReplayCapture()
+    manager.recorder = capture
+    manager.weighting = weighting or header["weighting"]
+
+    # samplers age books up to the recorded time of the action
+    event_time: float = 0.0
+    manager.clock = lambda: event_time
+
+    report = ReplayReport(session_path, manager.weighting, len(events))
+    for index, event in enumerate(events):
+        op = event["op"]
+        event_time = event["time"]
+
+        if op == "reset":
+            # the GUIs rebuild the collection: nothing selected, fresh decks
+            manager.reset_state()
+            manager.clear_selection()
+            for book in collection.books:
+                book.restore_selection(b"")
+            continue
+        if op == "reload":
+            report.notes.append(f"the library was reloaded at event {index}, later draws may differ")
+            continue
+        if op not in DRAW_OPS:
+            report.notes.append(f"unknown event {op!r} at {index} was skipped")
+            continue
+
+        if "titles" in event:
+            ui.titles = event["titles"]
+        ui.selected_title = event["book"]
+
+        # the quotes the GUI had drawn ahead by then (its timer is not replayed,
+        # returned quotes change the deck order, so the count has to match)
+        ready = event.get("ready", 0)
+        if manager.prefetched_count() > ready:
+            manager.drop_prefetched()
+        elif manager.prefetcher is not None:
+            manager.prefetcher.fill(ready)
+
+        start = time.perf_counter()
+        if op == "quote":
+            manager.print_random_quote(event["length"])
+        else:
+            manager.print_every_quote()
+        report.draw_seconds += time.perf_counter() - start
+        report.draws += 1
+        manager.cancel_prefetch()
+        ui.run_timers()
+
+        replayed = capture.events[-1]["result"] if capture.events else None
+        capture.events.clear()
+        if replayed != event["result"]:
+            report.mismatches.append((index, event["result"], replayed))
+    return report
+
+#=================================================
+# MAIN
+#=================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded quote session without a window.")
+    parser.add_argument("session", help="session file written with --record")
+    parser.add_argument("--source", help="library source (default: the recorded one)")
+    parser.add_argument("--weighting", choices=WEIGHTINGS, help="time another sampler weighting instead of the recorded one")
+    args = parser.parse_args()
+
+    try:
+        header, events = read_session(args.session)
+    except (OSError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+
+    collection = BookCollection()
+    error = collection.build_the_collection(args.source or header["source"])
+    if error:
+        print(error)
+        sys.exit(1)
+
+    report = replay(header, events, collection, args.session, args.weighting)
+    print(report.format())
+    sys.exit(1 if report.mismatches and not args.weighting else 0)
@@ -0,0 +1,95 @@
+#=================================================
+# IMPORT
+#=================================================
+import glob
+import mmap
+import os
+import secrets
+
+from collections.abc import Iterable
+
+#=================================================
+# CLASSES
+#=================================================
+class TextStore:
+    """
+    Read-only UTF-8 blob of texts, accessed through a memory map.
+    Texts are decoded on access, so only what is displayed or searched
+    becomes a Python string. Processes mapping the same file share its pages.
+    Pickled by path, the file is mapped again when unpickled.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # an empty file cannot be mapped (no texts were stored)
+        self._map: mmap.mmap | None = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        )
+
+    def get(self, offset: int, length: int) -> str:
+        if self._map is None:
+            return ""
+        return self._map[offset:offset + length].decode("utf8")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    #=================================================
+    # pickling (see collection_snapshot)
+    #=================================================
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
+
+    #=================================================
+    # writing
+    #=================================================
+    @classmethod
+    def write(cls, file_path: str, texts: Iterable[str]) -> tuple["TextStore", list[tuple[int, int]]]:
+        """
+        Write the texts into a new generation of the store file and remove the
+        older generations if possible (a file still mapped elsewhere is kept).
+        Returns the opened store and (offset, length) for every text.
+        """
+        root, ext = os.path.splitext(os.path.abspath(file_path))
+        path = f"{root}.{secrets.token_hex(4)}{ext}"
+
+        refs: list[tuple[int, int]] = []
+        offset = 0
+        with open(path, "wb") as file:
+            for text in texts:
+                data = text.encode("utf8")
+                file.write(data)
+                refs.append((offset, len(data)))
+                offset += len(data)
+
+        for old_path in glob.glob(f"{glob.escape(root)}.*{ext}"):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+        return cls(path), refs
+
+
+class StoredText:
+    """
+    Reference to a text in a TextStore.
+    """
+    __slots__ = ("store", "offset", "length")
+
+    def __init__(self, store: TextStore, offset: int, length: int) -> None:
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+    def __str__(self) -> str:
+        return self.store.get(self.offset, self.length)